@@ -81,6 +81,11 @@ MIDDLEWARE = [
 
 CORS_ORIGIN_ALLOW_ALL = True
 
+# Errors raised in views are logged and rendered in one place
+REST_FRAMEWORK = {
+    'EXCEPTION_HANDLER': 'NotifyMe.utils.exceptionManager.notifyme_exception_handler',
+}
+
 
 ROOT_URLCONF = 'NotificationModule.urls'
 
@@ -119,6 +124,15 @@ DATABASES = {
     }
 }
 
+# DB_ENGINE=sqlite runs on a local SQLite file instead of MySQL (local development and benchmarks)
+if os.getenv('DB_ENGINE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': Path(__file__).resolve().parent.parent / 'db.sqlite3',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -161,19 +175,75 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
-}
+# CHANNEL_LAYER=redis shares groups, offline queues and presence between Daphne workers through a
+# Redis-compatible broker (a real Redis, or `python manage.py runbroker` for local multi-process runs)
+if os.getenv('CHANNEL_LAYER') == 'redis':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'NotifyMe.layers.redis_layer.RedisChannelLayer',
+            'CONFIG': {
+                'host': os.getenv('REDIS_HOST') or '127.0.0.1',
+                'port': int(os.getenv('REDIS_PORT') or 6379),
+            },
+        },
+    }
+    OFFLINE_QUEUE = {
+        'BACKEND': 'NotifyMe.utils.offline_queue.RedisOfflineQueue',
+        'CONFIG': {
+            'host': os.getenv('REDIS_HOST') or '127.0.0.1',
+            'port': int(os.getenv('REDIS_PORT') or 6379),
+            'max_messages': 100,
+            'ttl': 86400,
+        },
+    }
+    PRESENCE = {
+        'BACKEND': 'NotifyMe.utils.presence.RedisPresenceIndex',
+        'CONFIG': {
+            'host': os.getenv('REDIS_HOST') or '127.0.0.1',
+            'port': int(os.getenv('REDIS_PORT') or 6379),
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+    OFFLINE_QUEUE = {
+        'BACKEND': 'NotifyMe.utils.offline_queue.InMemoryOfflineQueue',
+        'CONFIG': {
+            'max_messages': 100,
+            'ttl': 86400,
+            'max_users': 10000,
+        },
+    }
+    PRESENCE = {
+        'BACKEND': 'NotifyMe.utils.presence.InMemoryPresenceIndex',
+    }
 
 
 
 # settings.py
 
+# LOG_ASYNC=1 moves the file handlers to a listener thread, so requests never wait on disk writes
+LOG_ASYNC = os.getenv('LOG_ASYNC') == '1'
+# Longer messages are truncated; only this fraction (0 to 1) of success responses is logged
+LOG_MAX_MESSAGE_LENGTH = int(os.getenv('LOG_MAX_MESSAGE_LENGTH') or 2000)
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv('LOG_SUCCESS_SAMPLE_RATE') or 1.0)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'truncate': {
+            '()': 'NotifyMe.utils.log_utils.TruncateFilter',
+            'max_length': LOG_MAX_MESSAGE_LENGTH,
+        },
+        'sample_success': {
+            '()': 'NotifyMe.utils.log_utils.SuccessSampleFilter',
+            'rate': LOG_SUCCESS_SAMPLE_RATE,
+        },
+    },
     'formatters': {
         'verbose': {
             'format': '{levelname} {asctime} {module} {message}',
@@ -189,18 +259,21 @@ LOGGING = {
             'level': 'INFO',  # Set this to a higher level to reduce verbosity
             'class': 'logging.FileHandler',
             'formatter': 'verbose',
+            'filters': ['sample_success', 'truncate'],
             'filename' : 'logs/info.log'
         },
         'handlerWarning': {
             'level': 'WARNING',
             'class': 'logging.FileHandler',
             'formatter': 'verbose',
+            'filters': ['truncate'],
             'filename': 'logs/warning.log'
         },
         'handlerError': {
             'level': 'ERROR',
             'class': 'logging.FileHandler',
             'formatter': 'verbose',
+            'filters': ['truncate'],
             'filename': 'logs/error.log'
         },
     },
@@ -1,10 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 
 class NotifymeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'NotifyMe'
-    
-    
-    
\ No newline at end of file
+
+    def ready(self):
+        from NotifyMe import signals  # noqa: F401
+        # Django applies LOGGING after the settings, so the queue goes in once it is configured
+        if settings.LOG_ASYNC:
+            from NotifyMe.utils.log_utils import install_queue_logging
+            install_queue_logging()
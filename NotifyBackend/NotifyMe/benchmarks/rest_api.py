@@ -0,0 +1,226 @@
+import logging
+import time
+from django.db import connection
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from NotifyMe.constants import Plans
+from NotifyMe.models.subscription import Subscription
+from NotifyMe.models.subscriptionPlan import SubscriptionPlan
+from NotifyMe.models.user import User
+from NotifyMe.services.service import UserService
+from NotifyMe.utils.reference_cache import subscription_plan_cache
+from NotifyMe.benchmarks.utils import summarize_latencies
+
+SUCCESS_STATUSES = (200, 201, 204)
+
+
+def seed(users=1000, plans=4):
+    """
+    Bulk-create `plans` subscription plans and `users` users, each with a subscription.
+
+    Returns:
+        dict: The seeded plan, user and subscription ids.
+    """
+    plan_names = [plan.value for plan in Plans]
+    SubscriptionPlan.objects.bulk_create([
+        SubscriptionPlan(subscription_plan=plan_names[i % len(plan_names)]) for i in range(plans)
+    ])
+    plan_objects = list(SubscriptionPlan.objects.order_by("id"))
+    subscription_plan_cache.invalidate()
+
+    User.objects.bulk_create([
+        User(email_id=f"seed-{i}@example.com", first_name="Seed", last_name=str(i),
+             subscription_plan=plan_objects[i % len(plan_objects)])
+        for i in range(users)
+    ], batch_size=1000)
+    seeded_users = list(User.objects.select_related("subscription_plan").order_by("id"))
+    start_date = timezone.now()
+    end_dates = UserService().get_end_times([user.subscription_plan for user in seeded_users], start_date)
+    Subscription.objects.bulk_create([
+        Subscription(user_id=user, subscription_plan=user.subscription_plan, start_date=start_date, end_date=end_date)
+        for user, end_date in zip(seeded_users, end_dates)
+    ], batch_size=1000)
+    return {
+        "plan_ids": [plan.id for plan in plan_objects],
+        "user_ids": [user.id for user in seeded_users],
+        "subscription_ids": list(Subscription.objects.order_by("id").values_list("id", flat=True)),
+    }
+
+
+# Request body of each verb per endpoint, built from the iteration number, the seeded ids and
+# the ids created by the POST run (DELETE removes those, so seeded rows stay comparable)
+SCENARIOS = {
+    "UserAPI": {
+        "url": "/api/user",
+        "model": User,
+        "GET": lambda i, ids: None,
+        "POST": lambda i, ids: {"email_id": f"bench-{i}@example.com", "first_name": "Bench", "last_name": str(i),
+                                "subscription_plan": ids["plan_ids"][i % len(ids["plan_ids"])]},
+        "PUT": lambda i, ids: {"id": ids["user_ids"][i % len(ids["user_ids"])],
+                               "email_id": f"seed-{i % len(ids['user_ids'])}@example.com",
+                               "first_name": "Put", "last_name": str(i),
+                               "subscription_plan": ids["plan_ids"][i % len(ids["plan_ids"])]},
+        "PATCH": lambda i, ids: {"id": ids["user_ids"][i % len(ids["user_ids"])], "first_name": f"Patch{i}"},
+        "DELETE": lambda i, ids: {"id": ids["created"][i % len(ids["created"])]},
+    },
+    "SubscriptionAPI": {
+        "url": "/api/subscription",
+        "model": Subscription,
+        "GET": lambda i, ids: None,
+        "POST": lambda i, ids: {"user_id": ids["user_ids"][i % len(ids["user_ids"])],
+                                "subscription_plan": ids["plan_ids"][i % len(ids["plan_ids"])]},
+        "PUT": lambda i, ids: {"id": ids["subscription_ids"][i % len(ids["subscription_ids"])],
+                               "user_id": ids["user_ids"][i % len(ids["user_ids"])],
+                               "subscription_plan": ids["plan_ids"][i % len(ids["plan_ids"])]},
+        "PATCH": lambda i, ids: {"id": ids["subscription_ids"][i % len(ids["subscription_ids"])],
+                                 "subscription_plan": ids["plan_ids"][(i + 1) % len(ids["plan_ids"])]},
+        "DELETE": lambda i, ids: {"id": ids["created"][i % len(ids["created"])]},
+    },
+    "SubscriptionPlanAPI": {
+        "url": "/api/subscription-plan",
+        "model": SubscriptionPlan,
+        "GET": lambda i, ids: None,
+        "POST": lambda i, ids: {"subscription_plan": f"BENCH-{i}", "duration_days": 30},
+        "DELETE": lambda i, ids: {"id": ids["created"][i % len(ids["created"])]},
+    },
+}
+
+VERBS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+
+def measure(client, method, url, payloads, expected_statuses=SUCCESS_STATUSES):
+    """
+    Send one request per payload and record its latency, query count and outcome.
+
+    A request counts as an error unless both its HTTP status and the status in its body
+    are among `expected_statuses`.
+    """
+    send = getattr(client, method.lower())
+    latencies, query_counts, errors = [], [], 0
+    started_at = time.perf_counter()
+    for payload in payloads:
+        with CaptureQueriesContext(connection) as queries:
+            request_started_at = time.perf_counter()
+            response = send(url, payload, format="json") if payload is not None else send(url)
+            latencies.append(time.perf_counter() - request_started_at)
+        query_counts.append(len(queries))
+        body = getattr(response, "data", None)
+        body_status = body.get("status") if isinstance(body, dict) else response.status_code
+        if response.status_code not in SUCCESS_STATUSES or body_status not in expected_statuses:
+            errors += 1
+    elapsed = time.perf_counter() - started_at
+    return {
+        "requests": len(payloads),
+        "errors": errors,
+        "requests_per_sec": len(payloads) / elapsed if elapsed > 0 else 0.0,
+        "latency": summarize_latencies(latencies),
+        "queries": {
+            "min": min(query_counts, default=0),
+            "max": max(query_counts, default=0),
+            "mean": sum(query_counts) / len(query_counts) if query_counts else 0.0,
+        },
+    }
+
+
+def run_rest_benchmark(users=1000, plans=4, iterations=50, apis=None):
+    """
+    Seed the database, then time every verb of UserAPI, SubscriptionAPI and SubscriptionPlanAPI.
+
+    Args:
+        users (int): Users (each with one subscription) seeded before measuring.
+        plans (int): Subscription plans seeded before measuring.
+        iterations (int): Requests sent per verb.
+        apis (list): Names of the SCENARIOS to run, all of them by default.
+
+    Returns:
+        dict: API name mapped to verb mapped to latency, throughput, query counts and errors.
+    """
+    ids = seed(users=users, plans=plans)
+    client = APIClient()
+    results = {}
+    for api in apis or SCENARIOS:
+        scenario = SCENARIOS[api]
+        model = scenario["model"]
+        results[api] = {}
+        for verb in VERBS:
+            if verb not in scenario:
+                continue
+            if verb == "POST":
+                last_id = model.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+            if verb == "DELETE":
+                ids["created"] = list(model.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True))
+                if not ids["created"]:
+                    continue
+            count = min(iterations, len(ids["created"])) if verb == "DELETE" else iterations
+            payloads = [scenario[verb](i, ids) for i in range(count)]
+            if verb == "GET":
+                # Untimed request so loading the reference caches is not measured
+                client.get(scenario["url"])
+            results[api][verb] = measure(client, verb, scenario["url"], payloads)
+    return results
+
+
+class RecordCounter(logging.Handler):
+    """
+    Count the log records reaching the root logger.
+    """
+
+    def __init__(self, level=logging.WARNING):
+        super().__init__(level)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def run_error_benchmark(requests=1000, users=100):
+    """
+    Time a burst of requests for users that do not exist, the 404 path of UserAPI.
+
+    Args:
+        requests (int): Requests sent, each for a missing user id.
+        users (int): Users seeded before measuring.
+
+    Returns:
+        dict: Latency, throughput and query counts as measure() reports them, plus the
+        warning/error log records emitted per request.
+    """
+    ids = seed(users=users, plans=1)
+    missing_id = max(ids["user_ids"]) + 1
+    counter = RecordCounter()
+    root_logger = logging.getLogger()
+    root_logger.addHandler(counter)
+    try:
+        result = measure(APIClient(), "DELETE", "/api/user", [{"id": missing_id}] * requests, expected_statuses=(404,))
+    finally:
+        root_logger.removeHandler(counter)
+    result["log_records_per_request"] = counter.count / requests if requests else 0.0
+    return result
+
+
+def compare_reports(baseline, current, max_regression=0.2):
+    """
+    List the measurements of `current` that regressed against `baseline`.
+
+    A verb regresses when its p50 latency grew by more than `max_regression` (a ratio)
+    or when it issues more queries on average.
+
+    Returns:
+        list: Human-readable descriptions of each regression.
+    """
+    regressions = []
+    if baseline["parameters"] != current["parameters"]:
+        regressions.append(f"Parameters differ: baseline {baseline['parameters']}, current {current['parameters']}")
+    for api, verbs in current["results"].items():
+        for verb, result in verbs.items():
+            previous = baseline["results"].get(api, {}).get(verb)
+            if previous is None:
+                continue
+            before, after = previous["latency"]["p50_ms"], result["latency"]["p50_ms"]
+            if before > 0 and after > before * (1 + max_regression):
+                regressions.append(f"{api} {verb}: p50 {before:.2f}ms -> {after:.2f}ms")
+            if result["queries"]["mean"] > previous["queries"]["mean"]:
+                regressions.append(f"{api} {verb}: queries {previous['queries']['mean']:.1f} -> {result['queries']['mean']:.1f}")
+    return regressions
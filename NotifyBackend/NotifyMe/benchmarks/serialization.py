@@ -0,0 +1,54 @@
+import time
+from NotifyMe.utils.wire import CODECS, encode_for_all_codecs
+
+
+def make_batch(notifications, payload_size=200):
+    return [
+        {"id": i, "message": "x" * payload_size, "notification_type": 1}
+        for i in range(notifications)
+    ]
+
+
+def run_serialization_benchmark(sockets=50000, notifications=1, payload_size=200, repeat=5):
+    """
+    CPU spent serializing one broadcast, per socket versus once per fan-out.
+
+    `per_socket` is what every consumer did before frames were pre-encoded: encode the
+    batch itself. `pre_encoded` encodes it once in every wire format and has each socket
+    pick its ready-made frames. Sockets are spread evenly over the available codecs.
+
+    Args:
+        sockets (int): Sockets in the broadcast group.
+        notifications (int): Notifications in the broadcast batch.
+        payload_size (int): Characters per notification message.
+        repeat (int): Broadcasts timed per strategy; the best run is reported.
+
+    Returns:
+        dict: CPU milliseconds per broadcast of each strategy and the speed-up.
+    """
+    batch = make_batch(notifications, payload_size)
+    codecs = list(CODECS.values())
+    socket_codecs = [codecs[i % len(codecs)] for i in range(sockets)]
+
+    def per_socket():
+        for codec in socket_codecs:
+            codec.encode_frames(batch)
+
+    def pre_encoded():
+        frames = encode_for_all_codecs(batch)
+        for codec in socket_codecs:
+            frames[codec.key]
+
+    results = {}
+    for name, strategy in (("per_socket", per_socket), ("pre_encoded", pre_encoded)):
+        timings = []
+        for _ in range(repeat):
+            started_at = time.process_time()
+            strategy()
+            timings.append(time.process_time() - started_at)
+        results[name] = {"cpu_ms_per_broadcast": min(timings) * 1000}
+
+    pre_encoded_ms = results["pre_encoded"]["cpu_ms_per_broadcast"]
+    results["speedup"] = results["per_socket"]["cpu_ms_per_broadcast"] / pre_encoded_ms if pre_encoded_ms else None
+    results["codecs"] = [codec.key for codec in codecs]
+    return results
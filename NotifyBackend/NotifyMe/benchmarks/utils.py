@@ -0,0 +1,102 @@
+import json
+import math
+import platform
+from contextlib import contextmanager
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from NotifyMe.utils import offline_queue, presence, websocket_utils
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "CONFIG": {"capacity": 10000},
+    },
+}
+
+IN_MEMORY_OFFLINE_QUEUE = {
+    "BACKEND": "NotifyMe.utils.offline_queue.InMemoryOfflineQueue",
+}
+
+IN_MEMORY_PRESENCE = {
+    "BACKEND": "NotifyMe.utils.presence.InMemoryPresenceIndex",
+}
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers (0 for an empty list).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize_latencies(seconds):
+    """
+    Latency summary in milliseconds of a list of durations in seconds.
+    """
+    milliseconds = [value * 1000 for value in seconds]
+    return {
+        "count": len(milliseconds),
+        "mean_ms": sum(milliseconds) / len(milliseconds) if milliseconds else 0.0,
+        "p50_ms": percentile(milliseconds, 50),
+        "p99_ms": percentile(milliseconds, 99),
+        "max_ms": max(milliseconds, default=0.0),
+    }
+
+
+def build_report(suite, parameters, results):
+    """
+    Wrap benchmark results with what is needed to compare two runs.
+    """
+    return {
+        "suite": suite,
+        "created_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "database": connection.vendor,
+        "parameters": parameters,
+        "results": results,
+    }
+
+
+def write_report(report, path):
+    with open(path, "w") as output:
+        json.dump(report, output, indent=2)
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Run the block against a freshly created test database that is destroyed afterwards.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def in_memory_layers():
+    """
+    Force the in-memory channel layer, offline queue and presence index, so a benchmark needs no broker.
+    """
+    with override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, OFFLINE_QUEUE=IN_MEMORY_OFFLINE_QUEUE,
+                           PRESENCE=IN_MEMORY_PRESENCE):
+        # The process-wide offline queue, presence index and the manager holding them are built lazily from the settings
+        offline_queue._offline_queue = None
+        presence._presence_index = None
+        websocket_utils._notification_manager = None
+        try:
+            yield
+        finally:
+            offline_queue._offline_queue = None
+            presence._presence_index = None
+            websocket_utils._notification_manager = None
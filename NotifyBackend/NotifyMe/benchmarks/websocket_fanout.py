@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from NotifyMe.constants import ChannelGroups
+from NotifyMe.models.subscriptionPlan import SubscriptionPlan
+from NotifyMe.models.user import User
+from NotifyMe.utils.backpressure import metrics as backpressure_metrics
+from NotifyMe.utils.offline_queue import get_offline_queue
+from NotifyMe.utils.presence import get_presence_index
+from NotifyMe.utils.socket_auth import make_socket_token
+from NotifyMe.utils.websocket_utils import NotificationManager, user_group_name
+from NotifyMe.benchmarks.utils import summarize_latencies
+
+BROADCAST = "broadcast"
+USER = "user"
+TARGETS = (BROADCAST, USER)
+
+
+@database_sync_to_async
+def seed_users(count):
+    """
+    Create `count` users on one plan and return their ids.
+    """
+    plan = SubscriptionPlan.objects.create(subscription_plan="BENCHMARK", duration_days=30)
+    run = int(time.time() * 1000)
+    User.objects.bulk_create([
+        User(email_id=f"bench-{run}-{i}@example.com", first_name="Bench", last_name=str(i), subscription_plan=plan)
+        for i in range(count)
+    ])
+    return list(User.objects.filter(subscription_plan=plan).order_by("id").values_list("id", flat=True))
+
+
+async def connect_clients(application, user_ids):
+    clients = []
+    for user_id in user_ids:
+        communicator = WebsocketCommunicator(application, f"/ws/notification/?token={make_socket_token(user_id)}")
+        connected, _ = await communicator.connect()
+        if not connected:
+            raise RuntimeError(f"WebSocket connection refused for user {user_id}")
+        clients.append(communicator)
+    return clients
+
+
+async def receive_all(communicator, expected, timeout):
+    """
+    Read `expected` notifications from one client and return the receive time of each.
+
+    Returns:
+        list: (sent_at, received_at) pairs on the time.perf_counter clock.
+    """
+    timings = []
+    while len(timings) < expected:
+        frame = json.loads(await communicator.receive_from(timeout=timeout))
+        received_at = time.perf_counter()
+        messages = frame["messages"] if "messages" in frame else [frame["message"]]
+        timings.extend((message["sent_at"], received_at) for message in messages)
+    return timings
+
+
+async def run_fanout_benchmark(application, clients=100, notifications=1000, target=BROADCAST,
+                               batch_size=None, timeout=30, pre_encode=True):
+    """
+    Connect simulated NotificationConsumer clients and measure delivery of published notifications.
+
+    Args:
+        application: The ASGI application serving /ws/notification/.
+        clients (int): Number of WebSocket clients, one user each.
+        notifications (int): Number of notifications published.
+        target (str): BROADCAST sends every notification to every client, USER sends
+            each notification to one client, round-robin.
+        batch_size (int): max_batch_size of the NotificationManager, or its default.
+        timeout (float): Seconds a client waits for its next frame before failing.
+        pre_encode (bool): Whether the manager pre-encodes frames once per group send.
+
+    Returns:
+        dict: Delivery latency percentiles, throughput and the manager's group stats.
+    """
+    user_ids = await seed_users(clients)
+    backpressure_metrics.reset()
+    communicators = await connect_clients(application, user_ids)
+    manager_kwargs = {"max_batch_size": batch_size} if batch_size else {}
+    manager = NotificationManager(channel_layer=get_channel_layer(), offline_queue=get_offline_queue(),
+                                  presence=get_presence_index(), pre_encode=pre_encode, **manager_kwargs)
+
+    if target == BROADCAST:
+        expected = [notifications] * clients
+    else:
+        expected = [notifications // clients + (1 if i < notifications % clients else 0) for i in range(clients)]
+
+    try:
+        receivers = [
+            asyncio.ensure_future(receive_all(communicator, count, timeout))
+            for communicator, count in zip(communicators, expected)
+        ]
+        started_at = time.perf_counter()
+        cpu_started_at = time.process_time()
+        for i in range(notifications):
+            message = {"seq": i, "sent_at": time.perf_counter()}
+            if target == BROADCAST:
+                await manager.apublish(ChannelGroups.BROADCAST.value, message, "BENCHMARK")
+            else:
+                await manager.apublish(user_group_name(user_ids[i % clients]), message, "BENCHMARK")
+        await manager.aflush()
+        publish_seconds = time.perf_counter() - started_at
+
+        timings = [timing for result in await asyncio.gather(*receivers) for timing in result]
+        cpu_seconds = time.process_time() - cpu_started_at
+        elapsed = max(received_at for _, received_at in timings) - started_at if timings else 0
+    finally:
+        for communicator in communicators:
+            await communicator.disconnect()
+
+    return {
+        "clients": clients,
+        "notifications": notifications,
+        "target": target,
+        "deliveries": len(timings),
+        "publish_seconds": publish_seconds,
+        "elapsed_seconds": elapsed,
+        "messages_per_sec": len(timings) / elapsed if elapsed > 0 else 0.0,
+        "pre_encode": pre_encode,
+        "cpu_seconds": cpu_seconds,
+        "latency": summarize_latencies([received_at - sent_at for sent_at, received_at in timings]),
+        "groups": manager.stats(),
+        "backpressure": backpressure_metrics.snapshot(),
+    }
@@ -8,15 +8,99 @@ class Plans(Enum):
   PREMIUM_PLAN= "PREMIUM"
 
 
-
 class PlansDuration(Enum):
-  BASIC = 30,
-  REGULAR = 90,
-  STANDARD = 180,
+  BASIC = 30
+  REGULAR = 90
+  STANDARD = 180
   PREMIUM = 365
-  
 
 
+# Plan name -> duration in days, for plans whose row has no duration_days of its own
+PLAN_DURATION_DAYS = {
+  Plans.BASIC_PLAN.value: PlansDuration.BASIC.value,
+  Plans.REGULAR_PLAN.value: PlansDuration.REGULAR.value,
+  Plans.STANDARD_PLAN.value: PlansDuration.STANDARD.value,
+  Plans.PREMIUM_PLAN.value: PlansDuration.PREMIUM.value,
+}
+
+
+class ChannelGroups(Enum):
+  BROADCAST = "Our_clients"
+  USER = "user_{}"
+  PLAN = "plan_{}"
+
+
+class BatchSize(Enum):
+  NOTIFICATIONS = 500
+  REPLAY_FRAME = 50
+  NOTIFICATIONS_PER_FRAME = 50
+  USER_IMPORT = 1000
+  MAX_REPORTED_ERRORS = 1000
+  SUBSCRIPTION_EXPIRY = 500
+  PURGE = 1000
+  USER_DELETE = 1000
+  INBOX_BACKFILL = 1000
+
+
+class SubscriptionExpiry(Enum):
+  REMINDER_WINDOW_DAYS = 3
+  # Subscriptions that ended longer ago than this get no expiry notice (e.g. history older than the scheduler)
+  EXPIRED_NOTICE_WINDOW_DAYS = 3
+  MAX_CHUNKS_PER_RUN = 20
+  CHUNK_PAUSE_SECONDS = 0.5
+  INTERVAL_SECONDS = 60
+  REMINDER_NOTIFICATION = "SUBSCRIPTION_EXPIRY_REMINDER"
+  EXPIRED_NOTIFICATION = "SUBSCRIPTION_EXPIRED"
+
+
+# Soft-deleted rows are hard-deleted once they are RETENTION_DAYS old
+class Purge(Enum):
+  RETENTION_DAYS = 30
+  MAX_CHUNKS_PER_RUN = 100
+  CHUNK_PAUSE_SECONDS = 0.1
+  INTERVAL_SECONDS = 3600
+
+
+class NotificationPriority(Enum):
+  LOW = 0
+  NORMAL = 1
+  HIGH = 2
+
+
+class Backpressure(Enum):
+  HIGH_WATER_FRAMES = 200
+  MAX_BUFFERED_FRAMES = 1000
+  SLOW_CLIENT_TIMEOUT_SECONDS = 30
+  SLOW_CLIENT_CLOSE_CODE = 4008
+  # Notifications written to an acking client and not acked yet before the writer waits
+  MAX_UNACKED_NOTIFICATIONS = 500
+
+
+# Kinds of frames clients send back for notifications they received
+ACK_DELIVERED = "ack"
+ACK_READ = "read"
+
+
+class AckBuffering(Enum):
+  MAX_PENDING = 500
+  FLUSH_INTERVAL_SECONDS = 0.1
+  # Failed writes are retried on the next flushes, then dropped
+  MAX_FLUSH_ATTEMPTS = 3
+
+
+class PageSize(Enum):
+  DEFAULT = 100
+  MAX = 1000
+  STREAM_CHUNK = 500
+
 
+# A socket is considered gone when it has not sent a heartbeat for TTL_SECONDS
+class Presence(Enum):
+  HEARTBEAT_INTERVAL_SECONDS = 30
+  TTL_SECONDS = 90
 
 
+# WebSocket clients authenticate with a signed token, valid TOKEN_MAX_AGE_SECONDS after it is issued
+class SocketAuth(Enum):
+  TOKEN_SALT = "notifyme.websocket"
+  TOKEN_MAX_AGE_SECONDS = 300
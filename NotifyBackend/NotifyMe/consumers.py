@@ -1,30 +1,171 @@
-import json
+import asyncio
+import logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.core import signing
+from NotifyMe.constants import ACK_DELIVERED, ACK_READ, Backpressure, ChannelGroups, BatchSize, NotificationPriority, Presence
+from NotifyMe.services.service import UserService
+from NotifyMe.utils.ack_buffer import get_ack_buffer
+from NotifyMe.utils.backpressure import SendBuffer
+from NotifyMe.utils.exceptionManager import NotifyMeException
+from NotifyMe.utils.offline_queue import get_offline_queue
+from NotifyMe.utils.presence import get_presence_index
+from NotifyMe.utils.socket_auth import read_socket_token
+from NotifyMe.utils.websocket_utils import user_group_name, plan_group_name
+from NotifyMe.utils.wire import negotiate
+
+logger = logging.getLogger(__name__)
+
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.group_name = "Our_clients"
+        self.group_names = []
+        self.send_buffer = None
+        self.heartbeat = None
+        # Live frames wait here until the missed notifications have been replayed, so they never overtake them
+        self.held_frames = []
+        self.offline_queue = get_offline_queue()
+        self.presence = get_presence_index()
+        self.user_service = UserService()
+        self.ack_buffer = get_ack_buffer()
+        self.codec = negotiate(self.scope.get("subprotocols"))
+        self.user = await self.get_user()
+        if self.user is None:
+            await self.close()
+            return
 
-        # Join room group
-        await self.channel_layer.group_add(self.group_name, self.channel_name) 
-        # self.channel_layer.group_add() takes self.group_name and self_channel_name as argument
+        # Join the user's own group, its plan group and the broadcast group
+        self.group_names = [
+            user_group_name(self.user.id),
+            plan_group_name(self.user.subscription_plan_id),
+            ChannelGroups.BROADCAST.value,
+        ]
+        for group_name in self.group_names:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+        await self.presence.add(self.user.id, self.user.subscription_plan_id, self.channel_name)
 
-        await self.accept()
+        await self.accept(subprotocol=self.codec.subprotocol)
+        self.send_buffer = SendBuffer(self.write_frame, self.close_slow_client)
+        self.send_buffer.start()
+        self.heartbeat = asyncio.get_running_loop().create_task(self.send_heartbeats())
+        await self.replay_missed_notifications()
 
     async def disconnect(self, close_code):
-        # Leave room group
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        # Leave every group joined in connect
+        for group_name in self.group_names:
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+        if self.group_names:
+            await self.presence.remove(self.user.id, self.user.subscription_plan_id, self.channel_name)
+        if self.send_buffer is not None:
+            await self.send_buffer.stop()
+
+    async def send_heartbeats(self):
+        """
+        Keep the connection's presence entry and group memberships alive while the socket is open.
+        """
+        while True:
+            await asyncio.sleep(Presence.HEARTBEAT_INTERVAL_SECONDS.value)
+            try:
+                # Re-adding refreshes the membership, so the group does not prune a live socket
+                for group_name in self.group_names:
+                    await self.channel_layer.group_add(group_name, self.channel_name)
+                await self.presence.heartbeat(self.user.id, self.user.subscription_plan_id, self.channel_name)
+            except Exception as e:
+                logger.warning(f"Could not refresh the presence of user {self.user.id}. ERROR: {e}")
+
+    async def close_slow_client(self):
+        logger.warning(f"Disconnecting user {self.user.id}: the client is not keeping up with its notifications")
+        await self.close(code=Backpressure.SLOW_CLIENT_CLOSE_CODE.value)
+
+    async def replay_missed_notifications(self):
+        """
+        Send the notifications queued while the user was offline, oldest first, in batched
+        frames, then the live frames held back meanwhile.
+
+        A failed replay is logged and the held frames are still released, so the
+        connection keeps receiving live notifications.
+        """
+        try:
+            missed = await self.offline_queue.drain(self.user.id)
+            for start in range(0, len(missed), BatchSize.REPLAY_FRAME.value):
+                frame = missed[start:start + BatchSize.REPLAY_FRAME.value]
+                await self.send_buffer.push(self.codec.encode_batch(frame), NotificationPriority.NORMAL.value,
+                                            [notification.get("id") for notification in frame])
+        except Exception as e:
+            logger.warning(f"Could not replay the missed notifications of user {self.user.id}. ERROR: {e}")
+        finally:
+            held, self.held_frames = self.held_frames, None
+            for frame, priority, ids in held:
+                await self.send_buffer.push(frame, priority, ids)
+
+    async def get_user(self):
+        """
+        Resolve the connecting User from the signed `token` query string parameter
+        (see make_socket_token), as browsers cannot set headers on a WebSocket.
+
+        Returns:
+            User: The connecting user, or None if the token is missing, invalid, expired
+            or names an unknown user.
+        """
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        token = query.get("token", [None])[0]
+        if token is None:
+            logger.warning("WebSocket connection rejected: token missing")
+            return None
+        try:
+            user_id = read_socket_token(token)
+        except signing.BadSignature as e:
+            logger.warning(f"WebSocket connection rejected: invalid token. ERROR: {e}")
+            return None
+        try:
+            return await self.user_service.aget_user_by_id({"id": user_id})
+        except NotifyMeException:
+            logger.warning(f"WebSocket connection rejected: unknown user_id {user_id}")
+            return None
+
+    # Receive ack/read frames from WebSocket: {"type": "ack" | "read", "ids": [notification ids]}
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            frame = self.codec.decode(text_data, bytes_data)
+            kind, notification_ids = frame["type"], frame["ids"]
+            if kind not in (ACK_DELIVERED, ACK_READ) or not isinstance(notification_ids, list):
+                raise ValueError(kind)
+            notification_ids = [int(notification_id) for notification_id in notification_ids]
+        except (TypeError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring malformed frame from user {self.user.id}. ERROR: {e}")
+            return
+        # Both kinds mean the client has the notifications, which reopens its send window
+        self.send_buffer.acknowledge(notification_ids)
+        await self.ack_buffer.add(kind, self.user.id, notification_ids)
 
-    # Receive message from WebSocket
-    async def receive(self, text_data):
-        pass
-        
 
     # Receive message from room group
     async def send_notification(self, event):
-        message = event["message"]
-        notification_type = event['notification_type']
-
         # Send message to WebSocket
-        await self.send(text_data=json.dumps({'message':message}))
-    
-    
\ No newline at end of file
+        await self.send_frame(self.codec.encode_one(event), event.get("priority", NotificationPriority.NORMAL.value), [event.get("id")])
+
+    # Receive a batch of messages coalesced by NotificationManager
+    async def send_notification_batch(self, event):
+        # Frames pre-encoded by the publisher are forwarded as they are
+        frames = event["frames"][self.codec.key] if "frames" in event else self.codec.encode_frames(event["notifications"])
+        priority = event.get("priority", NotificationPriority.NORMAL.value)
+        frame_ids = self.codec.frame_ids(event.get("ids", ()))
+        for index, frame in enumerate(frames):
+            await self.send_frame(frame, priority, frame_ids[index] if index < len(frame_ids) else ())
+
+    async def send_frame(self, frame, priority=NotificationPriority.NORMAL.value, ids=()):
+        """
+        Queue a frame on the connection's SendBuffer, which applies backpressure, or hold
+        it while missed notifications are being replayed.
+        """
+        if self.held_frames is not None:
+            self.held_frames.append((frame, priority, ids))
+            return
+        await self.send_buffer.push(frame, priority, ids)
+
+    async def write_frame(self, frame):
+        await self.send(**{self.codec.frame_field: frame})
+
+
@@ -0,0 +1,276 @@
+import asyncio
+import fnmatch
+import logging
+import time
+from collections import deque
+from itertools import islice
+from NotifyMe.layers.resp import RedisError, encode_reply, read_reply
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBroker:
+    """
+    Small in-process server speaking the Redis protocol.
+
+    It implements the list, set, sorted set, string and key commands used by RedisChannelLayer so
+    several Daphne workers on one machine (or the test-suite) can share groups
+    without a real Redis. Data lives in memory and is lost on restart.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        self.host = host
+        self.port = port
+        self.data = {}
+        self.expires = {}
+        self.server = None
+        self._changed = None
+        self._sweeper = None
+
+    async def start(self):
+        self._changed = asyncio.Condition()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 asks the OS for a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_expired())
+        logger.info(f"Local broker listening on {self.host}:{self.port}")
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                command = await read_reply(reader)
+                name = command[0].decode().lower()
+                handler = getattr(self, f"cmd_{name}", None)
+                try:
+                    if handler is None:
+                        raise RedisError(f"ERR unknown command '{name}'")
+                    reply = handler(*command[1:])
+                    if asyncio.iscoroutine(reply):
+                        reply = await reply
+                except RedisError as e:
+                    reply = e
+                except (TypeError, ValueError) as e:
+                    reply = RedisError(f"ERR {e}")
+                writer.write(encode_reply(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Expiry
+
+    async def _sweep_expired(self):
+        while True:
+            await asyncio.sleep(1)
+            now = time.monotonic()
+            for key, deadline in list(self.expires.items()):
+                if deadline <= now:
+                    self._delete(key)
+
+    def _delete(self, key):
+        self.expires.pop(key, None)
+        return self.data.pop(key, None) is not None
+
+    def _get(self, key, kind):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._delete(key)
+        value = self.data.get(key)
+        if value is not None and not isinstance(value, kind):
+            raise RedisError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _get_or_create(self, key, kind):
+        value = self._get(key, kind)
+        if value is None:
+            value = self.data[key] = kind()
+        return value
+
+    # Key commands
+
+    def cmd_ping(self, *args):
+        return "PONG"
+
+    def cmd_del(self, *keys):
+        return sum(self._delete(key) for key in keys)
+
+    def cmd_expire(self, key, seconds):
+        if self._get(key, object) is None:
+            return 0
+        self.expires[key] = time.monotonic() + int(seconds)
+        return 1
+
+    def cmd_keys(self, pattern):
+        pattern = pattern.decode()
+        return [key for key in list(self.data) if self._get(key, object) is not None and fnmatch.fnmatchcase(key.decode(), pattern)]
+
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return "OK"
+
+    # String commands
+
+    def cmd_get(self, key):
+        return self._get(key, bytes)
+
+    def cmd_mget(self, *keys):
+        return [self._get(key, bytes) for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        self._delete(key)
+        self.data[key] = value
+        # Only the EX option is supported
+        if len(options) == 2 and options[0].upper() == b"EX":
+            self.expires[key] = time.monotonic() + int(options[1])
+        return "OK"
+
+    def cmd_incrby(self, key, amount):
+        value = int(self._get(key, bytes) or 0) + int(amount)
+        self.data[key] = str(value).encode()
+        return value
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, 1)
+
+    def cmd_decr(self, key):
+        return self.cmd_incrby(key, -1)
+
+    # List commands
+
+    async def cmd_rpush(self, key, *values):
+        async with self._changed:
+            items = self._get_or_create(key, deque)
+            items.extend(values)
+            self._changed.notify_all()
+            return len(items)
+
+    async def cmd_lpush(self, key, *values):
+        async with self._changed:
+            items = self._get_or_create(key, deque)
+            items.extendleft(values)
+            self._changed.notify_all()
+            return len(items)
+
+    def cmd_lpop(self, key):
+        items = self._get(key, deque)
+        if not items:
+            return None
+        value = items.popleft()
+        if not items:
+            self._delete(key)
+        return value
+
+    async def cmd_blpop(self, *args):
+        keys, timeout = args[:-1], float(args[-1])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        async with self._changed:
+            while True:
+                for key in keys:
+                    value = self.cmd_lpop(key)
+                    if value is not None:
+                        return [key, value]
+                remaining = deadline - loop.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    def cmd_llen(self, key):
+        return len(self._get(key, deque) or ())
+
+    def cmd_lrange(self, key, start, stop):
+        items = self._get(key, deque) or deque()
+        start, stop = self._normalize_range(len(items), int(start), int(stop))
+        return list(islice(items, start, stop))
+
+    def cmd_ltrim(self, key, start, stop):
+        items = self._get(key, deque)
+        if items is not None:
+            start, stop = self._normalize_range(len(items), int(start), int(stop))
+            self.data[key] = deque(islice(items, start, stop))
+            if not self.data[key]:
+                self._delete(key)
+        return "OK"
+
+    @staticmethod
+    def _normalize_range(length, start, stop):
+        """
+        Convert inclusive Redis indexes (negative counts from the end) to a slice.
+        """
+        if start < 0:
+            start = max(length + start, 0)
+        if stop < 0:
+            stop += length
+        return start, max(min(stop + 1, length), start)
+
+    # Set commands
+
+    def cmd_sadd(self, key, *members):
+        members_set = self._get_or_create(key, set)
+        before = len(members_set)
+        members_set.update(members)
+        return len(members_set) - before
+
+    def cmd_srem(self, key, *members):
+        members_set = self._get(key, set)
+        if members_set is None:
+            return 0
+        before = len(members_set)
+        members_set.difference_update(members)
+        if not members_set:
+            self._delete(key)
+        return before - len(members_set)
+
+    def cmd_smembers(self, key):
+        return list(self._get(key, set) or ())
+
+    def cmd_scard(self, key):
+        return len(self._get(key, set) or ())
+
+    # Sorted set commands (members mapped to their score)
+
+    def cmd_zadd(self, key, *args):
+        scores = self._get_or_create(key, dict)
+        before = len(scores)
+        for index in range(0, len(args), 2):
+            scores[args[index + 1]] = float(args[index])
+        return len(scores) - before
+
+    def cmd_zrem(self, key, *members):
+        scores = self._get(key, dict)
+        if scores is None:
+            return 0
+        removed = sum(scores.pop(member, None) is not None for member in members)
+        if not scores:
+            self._delete(key)
+        return removed
+
+    def cmd_zremrangebyscore(self, key, minimum, maximum):
+        scores = self._get(key, dict)
+        if scores is None:
+            return 0
+        stale = [member for member, score in scores.items() if float(minimum) <= score <= float(maximum)]
+        return self.cmd_zrem(key, *stale) if stale else 0
+
+    def cmd_zrange(self, key, start, stop):
+        members = sorted((self._get(key, dict) or {}).items(), key=lambda item: (item[1], item[0]))
+        start, stop = self._normalize_range(len(members), int(start), int(stop))
+        return [member for member, _ in members[start:stop]]
@@ -0,0 +1,228 @@
+import asyncio
+import base64
+import json
+import logging
+import random
+import string
+import time
+from collections import defaultdict
+from channels.layers import BaseChannelLayer
+from NotifyMe.layers.resp import LoopConnections, RedisConnection
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_bytes(value):
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode()}
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _decode_bytes(value):
+    if len(value) == 1 and "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def serialize(message):
+    return json.dumps(message, default=_encode_bytes, separators=(",", ":")).encode()
+
+
+def deserialize(data):
+    return json.loads(data, object_hook=_decode_bytes)
+
+
+class RedisChannelLayer(BaseChannelLayer):
+    """
+    Channel layer backed by any server speaking the Redis protocol.
+
+    Groups are Redis sorted sets scored by the time each channel was last added,
+    and every process reads its sockets' messages from one list named after its
+    process-specific channel prefix. A group_send therefore costs one pipelined
+    prune-and-read of the group plus one pipelined RPUSH per worker process
+    holding members of the group, however many sockets that worker holds.
+    Channels not re-added within `group_expiry` seconds (those of crashed
+    workers) are pruned from the group when it is next sent to.
+    Use `python manage.py runbroker` as a local stand-in for Redis.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(self, host="127.0.0.1", port=6379, prefix="asgi", expiry=60, group_expiry=86400,
+                 capacity=100, channel_capacity=None, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.host = host
+        self.port = int(port)
+        self.prefix = prefix
+        self.group_expiry = group_expiry
+        self.client_prefix = "".join(random.choice(string.ascii_letters) for _ in range(12))
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self._connections = LoopConnections(self.host, self.port)
+        self._process_keys = set()
+        self._receive_buffers = {}
+        self._receive_task = None
+
+    # Keys and connections
+
+    def _channel_key(self, channel):
+        return f"{self.prefix}:{self.non_local_name(channel)}"
+
+    def _group_key(self, group):
+        return f"{self.prefix}:group:{group}"
+
+    def _connection(self):
+        return self._connections.get()
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        """
+        Send a message onto a (general or specific) channel.
+        """
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        key = self._channel_key(channel)
+        await self._connection().pipeline([
+            ("RPUSH", key, serialize({"channels": [channel], "message": message})),
+            ("EXPIRE", key, self.expiry),
+        ])
+
+    async def receive(self, channel):
+        """
+        Receive the first message that arrives on the channel.
+        """
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        if "!" not in channel:
+            return await self._receive_general(channel)
+
+        self._process_keys.add(self._channel_key(channel))
+        self._ensure_receive_loop()
+        queue = self._receive_buffers.setdefault(channel, asyncio.Queue())
+        while True:
+            expires_at, message = await queue.get()
+            if queue.empty() and self._receive_buffers.get(channel) is queue:
+                del self._receive_buffers[channel]
+            if expires_at >= time.time():
+                return message
+
+    async def new_channel(self, prefix="specific"):
+        """
+        Returns a new channel name that can be used by something in our process as a specific channel.
+        """
+        channel = "%s.%s!%s" % (
+            prefix,
+            self.client_prefix,
+            "".join(random.choice(string.ascii_letters) for _ in range(12)),
+        )
+        self._process_keys.add(self._channel_key(channel))
+        return channel
+
+    async def _receive_general(self, channel):
+        connection = RedisConnection(self.host, self.port)
+        try:
+            while True:
+                reply = await connection.execute("BLPOP", self._channel_key(channel), 1)
+                if reply is not None:
+                    return deserialize(reply[1])["message"]
+        finally:
+            await connection.close()
+
+    # Process-wide receive loop
+
+    def _ensure_receive_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._receive_task is not None and self._receive_task.get_loop() is not loop:
+            # Buffered queues belong to the previous loop
+            self._receive_task.cancel()
+            self._receive_task = None
+            self._receive_buffers = {}
+        if self._receive_task is None or self._receive_task.done():
+            self._receive_task = loop.create_task(self._receive_loop())
+
+    async def _receive_loop(self):
+        """
+        Pop this process' list and hand each message to the local channels it names.
+        """
+        connection = RedisConnection(self.host, self.port)
+        try:
+            while True:
+                try:
+                    reply = await connection.execute("BLPOP", *sorted(self._process_keys), 1)
+                except (ConnectionError, OSError) as e:
+                    logger.error(f"Channel layer lost its connection to {self.host}:{self.port}. ERROR: {e}")
+                    await connection.close()
+                    await asyncio.sleep(1)
+                    continue
+                if reply is not None:
+                    self._deliver(deserialize(reply[1]))
+        finally:
+            await connection.close()
+
+    def _deliver(self, envelope):
+        expires_at = time.time() + self.expiry
+        for channel in envelope["channels"]:
+            queue = self._receive_buffers.setdefault(channel, asyncio.Queue())
+            if queue.qsize() >= self.get_capacity(channel):
+                logger.warning(f"Channel {channel} is over capacity, dropping message")
+                continue
+            queue.put_nowait((expires_at, envelope["message"]))
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        """
+        Adds the channel name to a group.
+        """
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        key = self._group_key(group)
+        await self._connection().pipeline([
+            ("ZADD", key, repr(time.time()), channel),
+            ("EXPIRE", key, self.group_expiry),
+        ])
+
+    async def group_discard(self, group, channel):
+        assert self.valid_group_name(group), "Invalid group name"
+        assert self.valid_channel_name(channel), "Invalid channel name"
+        await self._connection().execute("ZREM", self._group_key(group), channel)
+
+    async def group_send(self, group, message):
+        """
+        Send a message to every channel of a group with one pipelined push per process.
+        """
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Invalid group name"
+        connection = self._connection()
+        key = self._group_key(group)
+        _, channels = await connection.pipeline([
+            ("ZREMRANGEBYSCORE", key, "-inf", repr(time.time() - self.group_expiry)),
+            ("ZRANGE", key, 0, -1),
+        ])
+        if not channels:
+            return
+
+        channels_by_key = defaultdict(list)
+        for channel in channels:
+            channel = channel.decode()
+            channels_by_key[self._channel_key(channel)].append(channel)
+
+        commands = []
+        for key, key_channels in channels_by_key.items():
+            commands.append(("RPUSH", key, serialize({"channels": key_channels, "message": message})))
+            commands.append(("EXPIRE", key, self.expiry))
+        await connection.pipeline(commands)
+
+    # Flush extension
+
+    async def flush(self):
+        connection = self._connection()
+        keys = await connection.execute("KEYS", f"{self.prefix}:*")
+        if keys:
+            await connection.execute("DEL", *keys)
+        self._receive_buffers = {}
+
+    async def close(self):
+        if self._receive_task is not None:
+            self._receive_task.cancel()
+            self._receive_task = None
+        await self._connections.close()
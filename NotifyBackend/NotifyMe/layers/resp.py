@@ -0,0 +1,161 @@
+import asyncio
+
+
+class RedisError(Exception):
+    """
+    Error reply sent back by a Redis-compatible server.
+    """
+
+
+def encode_command(*args):
+    """
+    Encode one command as a RESP array of bulk strings.
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def encode_reply(value):
+    """
+    Encode a Python value as a RESP reply.
+    """
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RedisError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str) and value in ("OK", "PONG"):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+
+
+async def read_reply(reader):
+    """
+    Read one RESP value from a stream.
+
+    Error replies are returned as RedisError instances so a pipeline can keep reading.
+    """
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b"+":
+        return payload.decode()
+    if prefix == b"-":
+        return RedisError(payload.decode())
+    if prefix == b":":
+        return int(payload)
+    if prefix == b"$":
+        length = int(payload)
+        if length == -1:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        length = int(payload)
+        if length == -1:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unknown reply type {prefix!r}")
+
+
+class RedisConnection:
+    """
+    Minimal asyncio client for the Redis protocol.
+
+    Commands sent through `pipeline` are written in one go and their replies
+    read back in order, so N commands cost a single network round-trip.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        if self.writer is None or self.writer.is_closing():
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def execute(self, *args):
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands):
+        """
+        Send many commands in one write and return their replies.
+
+        Raises:
+            RedisError: If any of the commands failed.
+        """
+        async with self._lock:
+            await self.connect()
+            try:
+                self.writer.write(b"".join(encode_command(*command) for command in commands))
+                await self.writer.drain()
+                replies = [await read_reply(self.reader) for _ in commands]
+            except BaseException:
+                # Replies may still be unread (e.g. the caller was cancelled): the next
+                # pipeline would read them as its own, so start over on a new connection
+                self._reset()
+                raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def _reset(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, RuntimeError):
+                pass
+            self.writer = None
+
+
+class LoopConnections:
+    """
+    One RedisConnection per running event loop.
+
+    Streams are bound to the loop that opened them, and async_to_sync may run
+    callers on a fresh loop, so connections are never shared across loops.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        self.host = host
+        self.port = int(port)
+        self._connections = {}
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        for key, (connection_loop, _) in list(self._connections.items()):
+            if connection_loop.is_closed():
+                del self._connections[key]
+        if id(loop) not in self._connections:
+            self._connections[id(loop)] = (loop, RedisConnection(self.host, self.port))
+        return self._connections[id(loop)][1]
+
+    async def close(self):
+        _, connection = self._connections.pop(id(asyncio.get_running_loop()), (None, None))
+        if connection is not None:
+            await connection.close()
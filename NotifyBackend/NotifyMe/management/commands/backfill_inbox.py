@@ -0,0 +1,15 @@
+import json
+from django.core.management.base import BaseCommand
+from NotifyMe.constants import BatchSize
+from NotifyMe.services.service import NotificationService
+
+
+class Command(BaseCommand):
+    help = "Link existing notifications to their recipient's user and recount every user's unread counter"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=BatchSize.INBOX_BACKFILL.value)
+
+    def handle(self, *args, **options):
+        report = NotificationService().backfill_inbox(chunk_size=options["chunk_size"])
+        self.stdout.write(json.dumps(report))
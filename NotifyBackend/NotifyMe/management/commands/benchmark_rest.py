@@ -0,0 +1,46 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from NotifyMe.benchmarks.rest_api import SCENARIOS, compare_reports, run_error_benchmark, run_rest_benchmark
+from NotifyMe.benchmarks.utils import benchmark_database, build_report, in_memory_layers, write_report
+
+
+class Command(BaseCommand):
+    help = ("Benchmark every verb of UserAPI, SubscriptionAPI and SubscriptionPlanAPI on a throwaway "
+            "test database seeded with --users users and --plans plans. Use DB_ENGINE=sqlite to run locally.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--plans", type=int, default=4)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--api", action="append", choices=list(SCENARIOS), help="Only benchmark this API (repeatable)")
+        parser.add_argument("--errors", type=int, metavar="REQUESTS",
+                            help="Instead, time this many requests for missing users (the error path)")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--baseline", help="Fail if this run regressed against the JSON report at this path")
+        parser.add_argument("--max-regression", type=float, default=0.2,
+                            help="Allowed growth of p50 latency against the baseline, as a ratio")
+
+    def handle(self, *args, **options):
+        if options["errors"]:
+            parameters = {"requests": options["errors"], "users": options["users"]}
+            with benchmark_database(), in_memory_layers():
+                report = build_report("rest_api_errors", parameters, run_error_benchmark(**parameters))
+            if options["output"]:
+                write_report(report, options["output"])
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        parameters = {key: options[key] for key in ("users", "plans", "iterations")}
+        parameters["apis"] = options["api"]
+        with benchmark_database(), in_memory_layers():
+            report = build_report("rest_api", parameters, run_rest_benchmark(**parameters))
+        if options["output"]:
+            write_report(report, options["output"])
+        self.stdout.write(json.dumps(report, indent=2))
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                regressions = compare_reports(json.load(baseline_file), report, options["max_regression"])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n" + "\n".join(regressions))
+            self.stdout.write("No regressions against baseline")
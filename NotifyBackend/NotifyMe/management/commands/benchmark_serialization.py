@@ -0,0 +1,22 @@
+import json
+from django.core.management.base import BaseCommand
+from NotifyMe.benchmarks.serialization import run_serialization_benchmark
+from NotifyMe.benchmarks.utils import build_report, write_report
+
+
+class Command(BaseCommand):
+    help = "Compare CPU per broadcast of per-socket serialization against frames pre-encoded once per fan-out"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", type=int, default=50000)
+        parser.add_argument("--notifications", type=int, default=1)
+        parser.add_argument("--payload-size", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        parameters = {key: options[key] for key in ("sockets", "notifications", "payload_size", "repeat")}
+        report = build_report("serialization", parameters, run_serialization_benchmark(**parameters))
+        if options["output"]:
+            write_report(report, options["output"])
+        self.stdout.write(json.dumps(report, indent=2))
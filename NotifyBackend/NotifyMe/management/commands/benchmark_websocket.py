@@ -0,0 +1,30 @@
+import asyncio
+import json
+from django.core.management.base import BaseCommand
+from NotifyMe.benchmarks.utils import benchmark_database, build_report, in_memory_layers, write_report
+from NotifyMe.benchmarks.websocket_fanout import BROADCAST, TARGETS, run_fanout_benchmark
+
+
+class Command(BaseCommand):
+    help = ("Benchmark WebSocket fan-out: open N in-process NotificationConsumer clients, publish M "
+            "notifications and report p50/p99 delivery latency and messages/sec. Runs on a throwaway "
+            "test database and the in-memory channel layer.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100)
+        parser.add_argument("--notifications", type=int, default=1000)
+        parser.add_argument("--target", choices=TARGETS, default=BROADCAST)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--no-pre-encode", dest="pre_encode", action="store_false",
+                            help="Have every consumer serialize its frames, to compare with pre-encoding")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        parameters = {key: options[key] for key in ("clients", "notifications", "target", "batch_size", "pre_encode")}
+        with benchmark_database(), in_memory_layers():
+            from NotificationModule.asgi import application
+            results = asyncio.run(run_fanout_benchmark(application, **parameters))
+            report = build_report("websocket_fanout", parameters, results)
+        if options["output"]:
+            write_report(report, options["output"])
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,23 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from NotifyMe.constants import BatchSize
+from NotifyMe.services.service import UserService
+from NotifyMe.utils.importers import FORMATS, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import users and their subscriptions from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, default=None)
+        parser.add_argument("--chunk-size", type=int, default=BatchSize.USER_IMPORT.value)
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or guess_format(options["path"])
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                report = UserService().import_users(read_rows(stream, file_format), chunk_size=options["chunk_size"])
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        self.stdout.write(json.dumps(report, indent=2, default=str))
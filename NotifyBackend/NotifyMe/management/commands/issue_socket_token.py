@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from NotifyMe.services.service import UserService
+from NotifyMe.utils.exceptionManager import NotifyMeException
+from NotifyMe.utils.socket_auth import make_socket_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed token opening the notification WebSocket and inbox of one user"
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_id", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            user = UserService().get_user_by_id({"id": options["user_id"]})
+        except NotifyMeException as e:
+            raise CommandError(f"Unknown user {options['user_id']}: {e}")
+        self.stdout.write(make_socket_token(user.id))
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from NotifyMe.constants import BatchSize, Purge
+from NotifyMe.services.service import SoftDeletePurgeService
+
+
+class Command(BaseCommand):
+    help = "Hard-delete users, subscriptions and notifications soft-deleted more than --retention-days ago, in bounded chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single pass instead of looping")
+        parser.add_argument("--interval", type=float, default=Purge.INTERVAL_SECONDS.value)
+        parser.add_argument("--retention-days", type=int, default=Purge.RETENTION_DAYS.value)
+        parser.add_argument("--chunk-size", type=int, default=BatchSize.PURGE.value)
+        parser.add_argument("--max-chunks", type=int, default=Purge.MAX_CHUNKS_PER_RUN.value)
+        parser.add_argument("--chunk-pause", type=float, default=Purge.CHUNK_PAUSE_SECONDS.value)
+
+    def handle(self, *args, **options):
+        purge_service = SoftDeletePurgeService(retention_days=options["retention_days"], chunk_size=options["chunk_size"],
+                                               max_chunks=options["max_chunks"], chunk_pause=options["chunk_pause"])
+        while True:
+            purged = purge_service.purge()
+            self.stdout.write(", ".join(f"Purged {count} {model} rows" for model, count in purged.items()))
+            if options["once"]:
+                return
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,37 @@
+import os
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from NotifyMe.constants import BatchSize, SubscriptionExpiry
+from NotifyMe.services.service import SubscriptionExpiryService
+
+
+class Command(BaseCommand):
+    help = "Push subscription expiry reminders and expiry notices, scanning end_date in bounded chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single pass instead of looping")
+        parser.add_argument("--interval", type=float, default=SubscriptionExpiry.INTERVAL_SECONDS.value)
+        parser.add_argument("--window-days", type=int, default=SubscriptionExpiry.REMINDER_WINDOW_DAYS.value)
+        parser.add_argument("--chunk-size", type=int, default=BatchSize.SUBSCRIPTION_EXPIRY.value)
+        parser.add_argument("--max-chunks", type=int, default=SubscriptionExpiry.MAX_CHUNKS_PER_RUN.value)
+        parser.add_argument("--chunk-pause", type=float, default=SubscriptionExpiry.CHUNK_PAUSE_SECONDS.value)
+
+    def handle(self, *args, **options):
+        # With the in-memory layer every user looks offline from this process, so live
+        # delivery would only reach a private offline queue that is lost on exit
+        if os.getenv('CHANNEL_LAYER') != 'redis':
+            raise CommandError("run_expiry_scheduler needs CHANNEL_LAYER=redis to reach the sockets of the Daphne workers")
+        expiry_service = SubscriptionExpiryService(chunk_size=options["chunk_size"], max_chunks=options["max_chunks"],
+                                                   chunk_pause=options["chunk_pause"])
+        window = timedelta(days=options["window_days"])
+        while True:
+            reminders = expiry_service.send_reminders(window=window)
+            expired = expiry_service.send_expiry_notices()
+            self.stdout.write(f"Sent {reminders} reminders and {expired} expiry notices")
+            if options["once"]:
+                return
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,18 @@
+import asyncio
+from django.core.management.base import BaseCommand
+from NotifyMe.layers.broker import LocalBroker
+
+
+class Command(BaseCommand):
+    help = "Run a local Redis-compatible broker so several Daphne workers can share RedisChannelLayer groups"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=6379)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Local broker listening on {options['host']}:{options['port']}")
+        try:
+            asyncio.run(LocalBroker(options["host"], options["port"]).serve_forever())
+        except KeyboardInterrupt:
+            pass
@@ -1,5 +1,6 @@
 from django.db import models
 from .notificationType import NotificationType
+from .user import User
 from NotificationModule.constants import Length
 from .baseModel import BaseModel
 
@@ -8,6 +9,20 @@ class Notification(BaseModel):
   title = models.CharField(max_length=Length.MAX_TITLE_LENGTH.value)
   message = models.CharField(max_length=Length.MAX_TITLE_LENGTH.value)
   recipient = models.EmailField(null=True)
+  # Resolved from recipient on create; NULL for broadcasts and unknown recipients
+  user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE, related_name='notifications')
   notification_type = models.ForeignKey(NotificationType, null=False,on_delete=models.CASCADE)
+  # Set from the recipient's ack/read frames, see NotifyMe.utils.ack_buffer
+  delivered_at = models.DateTimeField(null=True, blank=True)
+  read_at = models.DateTimeField(null=True, blank=True)
+
+  class Meta:
+    # The default manager adds `deleted IS NULL` to every query
+    indexes = [
+      models.Index(fields=['user', 'deleted', 'created_at', 'id'], name='notification_user_created_idx'),
+      models.Index(fields=['recipient', 'deleted', 'created_at'], name='notification_recipient_idx'),
+      models.Index(fields=['deleted', 'created_at'], name='notification_live_created_idx'),
+    ]
+
   def __str__(self):
      return self.message
\ No newline at end of file
@@ -1,8 +1,14 @@
 from django.db import models
 from NotificationModule.constants import Length
+from NotifyMe.constants import NotificationPriority
 
 class NotificationType(models.Model):
   notification_type = models.CharField(max_length=Length.MAX_TITLE_LENGTH.value)
+  # Security alerts and expiry warnings are HIGH, bulk marketing LOW
+  priority = models.PositiveSmallIntegerField(
+    choices=[(priority.value, priority.name) for priority in NotificationPriority],
+    default=NotificationPriority.NORMAL.value
+  )
   
   class Meta:
     db_table='ms_notification_type'
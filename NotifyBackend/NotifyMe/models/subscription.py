@@ -10,3 +10,13 @@ class Subscription(BaseModel):
   subscription_plan = models.ForeignKey(SubscriptionPlan, on_delete=models.CASCADE, related_name='subscriptions')
   start_date = models.DateTimeField(default=timezone.now)
   end_date = models.DateTimeField(null=True)
+  # When the expiry reminder and the expiry notice were pushed, so each is sent once
+  reminder_sent_at = models.DateTimeField(null=True, blank=True)
+  expired_notified_at = models.DateTimeField(null=True, blank=True)
+
+  class Meta:
+    # The expiry scheduler scans live subscriptions in (end_date, id) order
+    indexes = [
+      models.Index(fields=['deleted', 'end_date', 'id'], name='subscription_end_date_idx'),
+      models.Index(fields=['user_id', 'deleted'], name='subscription_user_live_idx'),
+    ]
@@ -3,6 +3,8 @@ from NotificationModule.constants import Length
 
 class SubscriptionPlan(models.Model):
   subscription_plan = models.CharField(max_length=Length.MAX_TITLE_LENGTH.value, null=False)
+  # Falls back to PLAN_DURATION_DAYS by plan name when not set
+  duration_days = models.PositiveIntegerField(null=True, blank=True)
   
   class Meta:
     db_table='ms_subscription_plan'
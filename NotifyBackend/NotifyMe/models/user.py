@@ -7,4 +7,12 @@ class User(BaseModel):
   email_id = models.EmailField(unique=True)
   first_name = models.CharField(max_length=Length.MAX_TITLE_LENGTH.value)
   last_name = models.CharField(max_length=Length.MAX_TITLE_LENGTH.value)
-  subscription_plan = models.ForeignKey(SubscriptionPlan, null=False, on_delete=models.CASCADE)
\ No newline at end of file
+  subscription_plan = models.ForeignKey(SubscriptionPlan, null=False, on_delete=models.CASCADE)
+  # Kept up to date by NotificationService on create and read, so the inbox never COUNTs
+  unread_notifications = models.PositiveIntegerField(default=0)
+
+  class Meta:
+    # The default manager adds `deleted IS NULL` to every query, so it leads the list index
+    indexes = [
+      models.Index(fields=['deleted', 'created_at', 'id'], name='user_live_created_idx'),
+    ]
\ No newline at end of file
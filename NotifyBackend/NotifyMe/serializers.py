@@ -13,15 +13,40 @@ from NotifyMe.services.service import UserService
 from NotifyMe.utils.exceptionManager import NotifyMeException
 from NotifyMe.utils.error_codes import ErrorCodes, ErrorCodeMessages 
 from NotifyMe.utils.exceptionManager import NotifyMeException
+from NotifyMe.utils.reference_cache import subscription_plan_cache, notification_type_cache
 
 logger = logging.getLogger(__name__)
 
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField resolving ids from a ReferenceCache instead of querying the table.
+    """
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        return self.cache.model.objects.all()
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.cache.get(data)
+        except self.cache.model.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class UserSerializer(serializers.ModelSerializer):
-    subscription_plan = serializers.PrimaryKeyRelatedField(queryset=SubscriptionPlan.objects.all())
+    subscription_plan = CachedPrimaryKeyRelatedField(cache=subscription_plan_cache)
     class Meta:
         model = User
         fields = '__all__'
-        depth = 1
+        read_only_fields = ('unread_notifications',)
 
     def create(self, validated_data):
         user_service = UserService()
@@ -29,34 +54,47 @@ class UserSerializer(serializers.ModelSerializer):
             return user_service.create_user(validated_data)   
         except IntegrityError as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_147_INTEGRITY_ERROR_WHILE_CREATING_USER.value, e=e, status_code=ErrorCodes.HTTP_147_INTEGRITY_ERROR_WHILE_CREATING_USER.value)
-        except Exception as e:
-            logger.error(f"An Unexpected error while creating user. ERROR: {e}")
-            raise e
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['subscription_plan'] = instance.subscription_plan.subscription_plan
+        representation['subscription_plan'] = subscription_plan_cache.get(instance.subscription_plan_id).subscription_plan
         return representation
 
+class UserImportSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk user import without touching the database.
+
+    Email uniqueness is checked once per chunk by UserService.import_users instead of one query per row.
+    """
+    subscription_plan = CachedPrimaryKeyRelatedField(cache=subscription_plan_cache)
+
+    class Meta:
+        model = User
+        fields = ('email_id', 'first_name', 'last_name', 'subscription_plan')
+        extra_kwargs = {'email_id': {'validators': []}}
+
 class SubscriptionSerializer(serializers.ModelSerializer):
     user_id = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
-    subscription_plan = serializers.PrimaryKeyRelatedField(queryset=SubscriptionPlan.objects.all())
+    subscription_plan = CachedPrimaryKeyRelatedField(cache=subscription_plan_cache)
 
     class Meta:
         model = Subscription
         fields = '__all__'
+        # Set by SubscriptionExpiryService only, so clients can neither suppress nor re-trigger notices
+        read_only_fields = ('reminder_sent_at', 'expired_notified_at')
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['subscription_plan'] = instance.subscription_plan.subscription_plan
+        representation['subscription_plan'] = subscription_plan_cache.get(instance.subscription_plan_id).subscription_plan
         return representation
 
 class NotificationSerializer(serializers.ModelSerializer):
-    notification_type = serializers.PrimaryKeyRelatedField(queryset=NotificationType.objects.all())
+    notification_type = CachedPrimaryKeyRelatedField(cache=notification_type_cache)
 
     class Meta:
         model = Notification
         fields = '__all__'
+        read_only_fields = ('user', 'delivered_at', 'read_at')
         
 
 class SubscriptionPlanSerializer(serializers.ModelSerializer):
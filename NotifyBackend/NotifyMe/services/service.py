@@ -1,19 +1,33 @@
 import logging
+import time
+from collections import Counter, defaultdict
+from asgiref.sync import async_to_sync, sync_to_async
 from django.utils import timezone
 from datetime import timedelta
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from rest_framework import status
 from rest_framework.exceptions import ValidationError
-from NotifyMe.constants import Plans, PlansDuration
+from safedelete.config import HARD_DELETE
+from NotifyMe.constants import PLAN_DURATION_DAYS, ACK_DELIVERED, ACK_READ, BatchSize, ChannelGroups, NotificationPriority, PageSize, Purge, SubscriptionExpiry
+from NotifyMe.models.notification import Notification
+from NotifyMe.models.notificationType import NotificationType
 from NotifyMe.models.subscription import Subscription
 from NotifyMe.models.subscriptionPlan import SubscriptionPlan
 from NotifyMe.models.user import User
 from NotifyMe.utils.exceptionManager import NotifyMeException, NotifyMeException
 from django.core.exceptions import PermissionDenied
 from NotifyMe.utils.error_codes import ErrorCodeMessages, ErrorCodes
+from NotifyMe.utils.pagination import akeyset_page, encode_cursor, keyset_page
+from NotifyMe.utils.reference_cache import notification_type_cache, subscription_plan_cache
+from NotifyMe.utils.presence import get_presence_index
+from NotifyMe.utils.websocket_utils import get_notification_manager
 
 
 logger = logging.getLogger(__name__)
 
+
 class UserService:
     def get_all_users(self):
         """
@@ -35,9 +49,86 @@ class UserService:
                 status_code=ErrorCodes.HTTP_153_DATABASE_ERROR.value,
                 e=e
                 )
-        except Exception as e:
-            logger.error(f"An Unexpected error occured while fetching User from Database. ERROR: {e}")
-            raise e
+
+    async def aget_all_users(self):
+        """
+        Asynchronous get_all_users.
+        
+        Returns:
+            list: Every User object.
+        """
+        return [user async for user in User.objects.all()]
+
+    def get_users_page(self, cursor=None, limit=PageSize.DEFAULT.value):
+        """
+        Get one page of Users ordered by creation time.
+        
+        Args:
+           cursor (str): The next_cursor of the previous page, or None for the first page.
+           limit (int): The maximum number of users in the page.
+           
+        Returns:
+           tuple: The list of User objects and the cursor of the next page (None on the last page).
+           
+        Raises:
+           NotifyMeException: If the cursor is malformed.
+        """
+        try:
+            return keyset_page(User.objects.all(), cursor, limit)
+        except ValueError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_172_INVALID_PAGINATION_PARAMETERS.value,
+                                    status_code=ErrorCodes.HTTP_172_INVALID_PAGINATION_PARAMETERS.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+
+    async def aget_users_page(self, cursor=None, limit=PageSize.DEFAULT.value):
+        """
+        Asynchronous get_users_page, using the async ORM.
+        
+        Returns:
+           tuple: The list of User objects and the cursor of the next page (None on the last page).
+           
+        Raises:
+           NotifyMeException: If the cursor is malformed.
+        """
+        try:
+            return await akeyset_page(User.objects.all(), cursor, limit)
+        except ValueError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_172_INVALID_PAGINATION_PARAMETERS.value,
+                                    status_code=ErrorCodes.HTTP_172_INVALID_PAGINATION_PARAMETERS.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+
+    def iter_users(self, chunk_size=PageSize.STREAM_CHUNK.value):
+        """
+        Iterate over every User in chunks, so memory stays flat whatever the size of the table.
+        
+        Yields:
+           list: The next chunk of at most chunk_size User objects.
+        """
+        cursor = None
+        while True:
+            users, cursor = keyset_page(User.objects.all(), cursor, chunk_size)
+            if users:
+                yield users
+            if cursor is None:
+                return
+
+    async def aiter_users(self, chunk_size=PageSize.STREAM_CHUNK.value):
+        """
+        Asynchronous iter_users: each chunk is read with the async ORM when the previous
+        one has been consumed, so an ASGI stream never holds more than one chunk.
+        
+        Yields:
+           list: The next chunk of at most chunk_size User objects.
+        """
+        cursor = None
+        while True:
+            users, cursor = await akeyset_page(User.objects.all(), cursor, chunk_size)
+            if users:
+                yield users
+            if cursor is None:
+                return
             
     def get_user_by_id(self, data):
         
@@ -63,24 +154,69 @@ class UserService:
         except User.DoesNotExist as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_101_USER_NOT_FOUND.value,
                                     status_code=ErrorCodes.HTTP_101_USER_NOT_FOUND.value,
+                                    http_status=status.HTTP_404_NOT_FOUND,
                                     e=e)
         except KeyError as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_110_MISSING_ID_WHILE_REQUESTING_FOR_UPDATE.value,
                                     status_code=ErrorCodes.HTTP_110_MISSING_ID_WHILE_REQUESTING_FOR_UPDATE.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
                                     e=e)
         except ValueError as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_157_USER_ID_MISSING.value,
                                     status_code=ErrorCodes.HTTP_157_USER_ID_MISSING.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
                                     e=e)
         except PermissionDenied as e:
             raise NotifyMeException(
                 message=ErrorCodeMessages.HTTP_112_PERMISSION_DENIED_WHILE_DELETING_USER_DATA.value,
                 status_code=ErrorCodes.HTTP_112_PERMISSION_DENIED_WHILE_DELETING_USER_DATA.value,
+                http_status=status.HTTP_403_FORBIDDEN,
                 e=e
                 )
-        except Exception as e:
-            logger.error(f"An Unexpected error occurred while fetching user data. ERROR: {e}")
-            raise e
+
+    async def aget_user_by_id(self, data):
+        """
+        Asynchronous get_user_by_id for consumers, using the async ORM.
+        
+        Args:
+           data(dict): A dictionary containing the user ID
+           
+        Returns:
+            User: The User object with the given ID.
+            
+        Raises:
+            NotifyMeException: If the user ID is missing, malformed or unknown.
+        """
+        user_id = data.get('id')
+        try:
+            if user_id is None:
+                raise ValueError
+            return await User.objects.aget(id=user_id)
+        except User.DoesNotExist as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_101_USER_NOT_FOUND.value,
+                                    status_code=ErrorCodes.HTTP_101_USER_NOT_FOUND.value,
+                                    http_status=status.HTTP_404_NOT_FOUND,
+                                    e=e)
+        except ValueError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_157_USER_ID_MISSING.value,
+                                    status_code=ErrorCodes.HTTP_157_USER_ID_MISSING.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+
+    def get_duration_days(self, subscription_plan):
+        """
+        Resolve how many days a subscription plan lasts.
+        
+        Args:
+          subscription_plan (SubscriptionPlan): The subscription plan.
+          
+        Returns:
+            int: The plan's own duration_days, or the PLAN_DURATION_DAYS entry for its name.
+            
+        Raises:
+            KeyError: If the plan has no duration and its name is not a known plan.
+        """
+        return subscription_plan.duration_days or PLAN_DURATION_DAYS[subscription_plan.subscription_plan]
 
     def get_end_time(self, subscription_plan, start_date):
         """
@@ -94,32 +230,37 @@ class UserService:
             datetime: The calculated end date of the subscription according to PlanType.
             
         Raises:
-            ValueError: If the subscription plan is invalid.
-            KeyError: If the plan or duration is not found in the dictionaries.
+            NotifyMeException: If no duration is known for the subscription plan.
+        """
+        return self.get_end_times([subscription_plan], start_date)[0]
+
+    def get_end_times(self, subscription_plans, start_date):
+        """
+        Calculate the end-dates of a batch of subscriptions starting at the same time.
+        
+        The duration of each distinct plan is resolved once, whatever the size of the batch.
+        
+        Args:
+          subscription_plans (list): The SubscriptionPlan of each subscription.
+          start_date (datetime): The start date shared by the subscriptions.
+          
+        Returns:
+            list: The end date of each subscription, in the order of subscription_plans.
+            
+        Raises:
+            NotifyMeException: If no duration is known for one of the subscription plans.
         """
         try:
-            plan_type = subscription_plan.subscription_plan
-
-            if plan_type == Plans.BASIC_PLAN.value:
-                return start_date + timedelta(days=PlansDuration.BASIC.value)
-            elif plan_type == Plans.REGULAR_PLAN.value:
-                return start_date + timedelta(days=PlansDuration.REGULAR.value)
-            elif plan_type == Plans.STANDARD_PLAN.value:
-                return start_date + timedelta(days=PlansDuration.STANDARD.value)
-            elif plan_type == Plans.PREMIUM_PLAN.value:
-                return start_date + timedelta(days=PlansDuration.PREMIUM.value)
-            else:
-                raise ValidationError
+            durations = {}
+            for subscription_plan in subscription_plans:
+                if subscription_plan.pk not in durations:
+                    durations[subscription_plan.pk] = timedelta(days=self.get_duration_days(subscription_plan))
+            return [start_date + durations[subscription_plan.pk] for subscription_plan in subscription_plans]
         except KeyError as e:
-            raise NotifyMeException(message=ErrorCodeMessages.HTTP_154_DURATION_NOT_FOUND_ERROR_FOR_SUBSCRIPTION_PLAN_TYPE.value, status_code=ErrorCodes.HTTP_154_DURATION_NOT_FOUND_ERROR_FOR_SUBSCRIPTION_PLAN_TYPE.value,
-                                    e=e)
-        except ValidationError as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_158_INVALID_SUBSCRIPTION_PLAN_PROVIDED.value,
                                     status_code=ErrorCodes.HTTP_158_INVALID_SUBSCRIPTION_PLAN_PROVIDED.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
                                     e=e)
-        except Exception as e:
-            logger.error(f"An Unexpected error occurred while calculating end date. ERROR: {e}")
-            raise e
         
     def create_user(self, validated_data):
         """
@@ -161,18 +302,197 @@ class UserService:
         except SubscriptionPlan.DoesNotExist as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_105_INVALID_SUBSCRIPTION_ID_PROVIDED.value,
                                     status_code=ErrorCodes.HTTP_105_INVALID_SUBSCRIPTION_ID_PROVIDED.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
                                     e=e)
         except ValidationError as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_160_SUBSCRIPTION_PLAN_FIELD_IS_MISSING.value,
                                     status_code=ErrorCodes.HTTP_160_SUBSCRIPTION_PLAN_FIELD_IS_MISSING.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
                                     e=e)
         except IntegrityError as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_108_INVALID_USER_ID_PROVIDED.value,
                                     status_code=ErrorCodes.HTTP_108_INVALID_USER_ID_PROVIDED.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
                                     e=e)
-        except Exception as e:
-            logger.error(f"An Unexpected error occurred while creating user. ERROR: {e}")
-            raise e
+
+    async def acreate_user(self, validated_data):
+        """
+        Asynchronous create_user: create a user and their subscription with the async ORM.
+        
+        Args: 
+            validated_data (dict): A dictionary containing the validated user data.
+            
+        Returns:
+             User: A new created User object.
+             
+        Raises:
+             NotifyMeException: If the subscription_plan is missing or the user already exists.
+        """
+        subscription_plan = validated_data.pop('subscription_plan', None)
+        try:
+            if subscription_plan is None:
+                raise ValidationError
+            user = await User.objects.acreate(subscription_plan=subscription_plan, **validated_data)
+
+            start_date = timezone.now()
+            await Subscription.objects.acreate(
+                user_id=user,
+                subscription_plan=subscription_plan,
+                start_date=start_date,
+                end_date=self.get_end_time(subscription_plan, start_date)
+            )
+
+            logger.info(f"User created successfully with ID: {user.id}")
+            return user
+        except ValidationError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_160_SUBSCRIPTION_PLAN_FIELD_IS_MISSING.value,
+                                    status_code=ErrorCodes.HTTP_160_SUBSCRIPTION_PLAN_FIELD_IS_MISSING.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+        except IntegrityError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_108_INVALID_USER_ID_PROVIDED.value,
+                                    status_code=ErrorCodes.HTTP_108_INVALID_USER_ID_PROVIDED.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+
+    def import_users(self, rows, chunk_size=BatchSize.USER_IMPORT.value):
+        """
+        Create users and their subscriptions in bulk from parsed import rows.
+        
+        Rows are validated and written chunk by chunk: each chunk costs one query for
+        existing emails and one transaction holding a bulk_create for users and one for
+        subscriptions. Invalid rows are reported and skipped without aborting the import.
+        A chunk the database rejects (e.g. an email differing only in case on MySQL) is
+        retried row by row, so only the conflicting rows are lost.
+        
+        Args:
+           rows (iterable): (row_number, row, error) tuples as yielded by importers.read_rows.
+           chunk_size (int): The number of rows validated and written per transaction.
+           
+        Returns:
+            dict: created (int), error_count (int) and errors (list of {row, errors}),
+            the list being capped at BatchSize.MAX_REPORTED_ERRORS.
+        """
+        # Imported here as the serializers module depends on this one
+        from NotifyMe.serializers import UserImportSerializer
+
+        report = {"created": 0, "error_count": 0, "errors": []}
+        seen_emails = set()
+
+        def add_error(row_number, errors):
+            report["error_count"] += 1
+            if len(report["errors"]) < BatchSize.MAX_REPORTED_ERRORS.value:
+                report["errors"].append({"row": row_number, "errors": errors})
+
+        def import_chunk(chunk):
+            valid = []
+            for row_number, row in chunk:
+                serializer = UserImportSerializer(data=row)
+                if serializer.is_valid():
+                    valid.append((row_number, serializer.validated_data))
+                else:
+                    add_error(row_number, serializer.errors)
+
+            existing = self._existing_emails([data['email_id'] for _, data in valid])
+            new_rows = []
+            for row_number, data in valid:
+                if data['email_id'] in existing or data['email_id'] in seen_emails:
+                    add_error(row_number, {"email_id": [ErrorCodeMessages.HTTP_175_DUPLICATE_EMAIL_IN_IMPORT.value]})
+                else:
+                    seen_emails.add(data['email_id'])
+                    new_rows.append((row_number, data))
+            if not new_rows:
+                return
+
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([User(**data) for _, data in new_rows])
+                    # MySQL does not return primary keys from bulk_create
+                    user_ids = dict(User.objects.filter(email_id__in=[data['email_id'] for _, data in new_rows])
+                                    .values_list('email_id', 'id'))
+                    plans = [data['subscription_plan'] for _, data in new_rows]
+                    start_date = timezone.now()
+                    end_dates = self.get_end_times(plans, start_date)
+                    Subscription.objects.bulk_create([
+                        Subscription(user_id_id=user_ids[data['email_id']], subscription_plan=data['subscription_plan'],
+                                     start_date=start_date, end_date=end_date)
+                        for (_, data), end_date in zip(new_rows, end_dates)
+                    ])
+                report["created"] += len(new_rows)
+            except (IntegrityError, NotifyMeException) as e:
+                logger.warning(f"Import chunk of {len(new_rows)} users rolled back, retrying row by row. ERROR: {e}")
+                for row_number, data in new_rows:
+                    import_row(row_number, data)
+
+        def import_row(row_number, data):
+            try:
+                with transaction.atomic():
+                    user = User.objects.create(**data)
+                    start_date = timezone.now()
+                    Subscription.objects.create(user_id=user, subscription_plan=data['subscription_plan'], start_date=start_date,
+                                                end_date=self.get_end_time(data['subscription_plan'], start_date))
+                report["created"] += 1
+            except (IntegrityError, NotifyMeException) as e:
+                logger.error(f"Import of row {row_number} rolled back. ERROR: {e}")
+                seen_emails.discard(data['email_id'])
+                add_error(row_number, {"non_field_errors": [ErrorCodeMessages.HTTP_176_INTEGRITY_ERROR_WHILE_IMPORTING_USER.value]})
+
+        chunk = []
+        for row_number, row, error in rows:
+            if error is not None:
+                add_error(row_number, {"non_field_errors": [error]})
+                continue
+            chunk.append((row_number, row))
+            if len(chunk) >= chunk_size:
+                import_chunk(chunk)
+                chunk = []
+        if chunk:
+            import_chunk(chunk)
+
+        report["errors"].sort(key=lambda error: error["row"])
+        logger.info(f"User import finished: {report['created']} created, {report['error_count']} rejected")
+        return report
+
+    @staticmethod
+    def _existing_emails(emails):
+        """
+        The emails of `emails` already taken, by live or soft-deleted users.
+        """
+        return set(User.all_objects.filter(email_id__in=emails).values_list('email_id', flat=True))
+
+    def delete_users(self, user_ids, now=None, chunk_size=BatchSize.USER_DELETE.value):
+        """
+        Soft-delete many users and cascade to their subscriptions and notifications with set-based UPDATEs.
+        
+        Unlike user.delete(), which collects and saves every related row one at a time, each
+        chunk of ids costs one UPDATE per table, and the whole call runs in one transaction.
+        Cascaded rows are flagged deleted_by_cascade, as SOFT_DELETE_CASCADE does.
+        
+        Args:
+           user_ids (iterable): Ids of the users to delete.
+           now (datetime): Deletion time, now by default.
+           chunk_size (int): Ids per UPDATE.
+           
+        Returns:
+           dict: Users, subscriptions and notifications deleted, and the requested ids that were not live users.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        deleted_at = now or timezone.now()
+        report = {"deleted": 0, "subscriptions": 0, "notifications": 0, "not_found": []}
+        with transaction.atomic():
+            for start in range(0, len(user_ids), chunk_size):
+                chunk = user_ids[start:start + chunk_size]
+                live_ids = set(User.objects.filter(id__in=chunk).values_list('id', flat=True))
+                report["not_found"].extend(user_id for user_id in chunk if user_id not in live_ids)
+                if not live_ids:
+                    continue
+                report["subscriptions"] += Subscription.objects.filter(user_id__in=live_ids).update(
+                    deleted=deleted_at, deleted_by_cascade=True)
+                report["notifications"] += Notification.objects.filter(user_id__in=live_ids).update(
+                    deleted=deleted_at, deleted_by_cascade=True)
+                report["deleted"] += User.objects.filter(id__in=live_ids).update(deleted=deleted_at)
+        logger.info(f"Deleted {report['deleted']} users, {report['subscriptions']} subscriptions and {report['notifications']} notifications")
+        return report
         
 
 class SubscriptionService: 
@@ -192,15 +512,23 @@ class SubscriptionService:
         """
         try:
             subscriptions = Subscription.objects.all()
-            logger.info(f"Retrieved {subscriptions.count()} subscriptions")
+            logger.info("Retrieving all subscriptions")
             return subscriptions
         except Subscription.DoesNotExist as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_144_DATABASE_ERROR_WHILE_RETRIEVING_ALL_SUBSCRIPTIONS.value,       status_code=ErrorCodes.HTTP_144_DATABASE_ERROR_WHILE_RETRIEVING_ALL_SUBSCRIPTIONS.value,
                                     e=e)
-        except Exception as e:
-            logger.error(f"An Unexpected error occurred while retrieving all subscriptions: ERROR: {e}")
-            raise e
         
+    async def aget_all_subscriptions(self):
+        """
+        Asynchronous get_all_subscriptions.
+        
+        Returns:
+            list: Every Subscription object.
+        """
+        subscriptions = [subscription async for subscription in Subscription.objects.all()]
+        logger.info("Retrieving all subscriptions")
+        return subscriptions
+
     def get_subscription_by_id(self, data):
         """
         Retrieve Subscription by ID
@@ -227,29 +555,230 @@ class SubscriptionService:
             raise NotifyMeException(
                 message=ErrorCodeMessages.HTTP_110_MISSING_ID_WHILE_REQUESTING_FOR_UPDATE.value, 
                 status_code=ErrorCodes.HTTP_110_MISSING_ID_WHILE_REQUESTING_FOR_UPDATE.value,
+                http_status=status.HTTP_400_BAD_REQUEST,
                 e=e
             )
         except ValueError as e:
             raise NotifyMeException(
                 message=ErrorCodeMessages.HTTP_159_SUBSCRIPTION_ID_IS_MISSING.value,
                 status_code=ErrorCodes.HTTP_159_SUBSCRIPTION_ID_IS_MISSING.value,
+                http_status=status.HTTP_400_BAD_REQUEST,
                 e=e
             )
         except Subscription.DoesNotExist as e:
             raise NotifyMeException(
                 message=ErrorCodeMessages.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
                 status_code=ErrorCodes.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
+                http_status=status.HTTP_404_NOT_FOUND,
                 e=e
                 ) 
         except PermissionDenied as e:
             raise NotifyMeException(
                 message=ErrorCodeMessages.HTTP_156_PERMISSION_DENIED_WHILE_DELETING_SUBSCRIPTION_DATA.value,
                 status_code=ErrorCodes.HTTP_156_PERMISSION_DENIED_WHILE_DELETING_SUBSCRIPTION_DATA.value,
+                http_status=status.HTTP_403_FORBIDDEN,
                 e=e)
-        except Exception as e:
-            logger.error(f"An Unexpected error occurred while retrieving subscription with ID {subscription_id}. ERROR: {e}")
-            raise e
+
+    async def aget_subscription_by_id(self, data):
+        """
+        Asynchronous get_subscription_by_id.
         
+        Args:
+           data(dict): A dictionary containing Subscription ID.
+           
+        Returns:
+            Subscription: The Subscription object with the given ID.
+            
+        Raises:
+            NotifyMeException: If the Subscription ID is missing or unknown.
+        """
+        subscription_id = data.get('id')
+        try:
+            if subscription_id is None:
+                raise ValueError
+            subscription = await Subscription.objects.aget(id=subscription_id)
+            logger.info(f"Retrieved subscription with ID {subscription_id}")
+            return subscription
+        except ValueError as e:
+            raise NotifyMeException(
+                message=ErrorCodeMessages.HTTP_159_SUBSCRIPTION_ID_IS_MISSING.value,
+                status_code=ErrorCodes.HTTP_159_SUBSCRIPTION_ID_IS_MISSING.value,
+                http_status=status.HTTP_400_BAD_REQUEST,
+                e=e
+            )
+        except Subscription.DoesNotExist as e:
+            raise NotifyMeException(
+                message=ErrorCodeMessages.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
+                status_code=ErrorCodes.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
+                http_status=status.HTTP_404_NOT_FOUND,
+                e=e
+                )
+
+
+class SubscriptionExpiryService:
+    """
+    Pushes expiry reminders and expiry notices for subscriptions reaching their end_date.
+
+    Subscriptions are scanned in (end_date, id) order on the end_date index, one bounded
+    chunk at a time: each chunk is one indexed range query, one bulk insert of Notification
+    rows and one UPDATE marking the chunk as notified, committed together, so no long
+    transaction holds the table and a notice is never marked sent without being stored.
+    The rows reach the recipient's inbox even when no socket of theirs is connected.
+    """
+
+    def __init__(self, chunk_size=BatchSize.SUBSCRIPTION_EXPIRY.value,
+                 max_chunks=SubscriptionExpiry.MAX_CHUNKS_PER_RUN.value,
+                 chunk_pause=SubscriptionExpiry.CHUNK_PAUSE_SECONDS.value):
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunk_pause = chunk_pause
+
+    def send_reminders(self, now=None, window=timedelta(days=SubscriptionExpiry.REMINDER_WINDOW_DAYS.value)):
+        """
+        Remind the users whose subscription ends within `window` from now.
+        
+        Returns:
+            int: The number of reminders sent.
+        """
+        now = now or timezone.now()
+        pending = Subscription.objects.filter(end_date__gt=now, end_date__lte=now + window, reminder_sent_at__isnull=True)
+        return self._process(pending, 'reminder_sent_at', now, SubscriptionExpiry.REMINDER_NOTIFICATION.value,
+                             "Subscription expiring", "Your {plan} subscription expires on {end_date:%Y-%m-%d}")
+
+    def send_expiry_notices(self, now=None, window=timedelta(days=SubscriptionExpiry.EXPIRED_NOTICE_WINDOW_DAYS.value)):
+        """
+        Notify the users whose subscription ended within `window` before now.
+        
+        Subscriptions that ended earlier are never notified, so the first run does not
+        send a notice for every historical subscription.
+        
+        Returns:
+            int: The number of expiry notices sent.
+        """
+        now = now or timezone.now()
+        pending = Subscription.objects.filter(end_date__gt=now - window, end_date__lte=now, expired_notified_at__isnull=True)
+        return self._process(pending, 'expired_notified_at', now, SubscriptionExpiry.EXPIRED_NOTIFICATION.value,
+                             "Subscription expired", "Your {plan} subscription expired on {end_date:%Y-%m-%d}")
+
+    def run(self, now=None):
+        """
+        Send pending reminders and expiry notices once.
+        
+        Returns:
+            dict: The number of reminders and expiry notices sent.
+        """
+        now = now or timezone.now()
+        return {"reminders": self.send_reminders(now), "expired": self.send_expiry_notices(now)}
+
+    @staticmethod
+    def _notification_type(name):
+        """
+        The NotificationType row of a kind of notice, created HIGH priority on first use, so
+        clients get a notification type id as for every other notification.
+        """
+        try:
+            notification_type, _ = NotificationType.objects.get_or_create(notification_type=name,
+                                                                          defaults={'priority': NotificationPriority.HIGH.value})
+        except NotificationType.MultipleObjectsReturned:
+            # notification_type is not unique, so an admin may have added another row of the same name
+            notification_type = NotificationType.objects.filter(notification_type=name).order_by('id').first()
+        return notification_type
+
+    def _process(self, pending, marker_field, now, notification_type_name, title, template):
+        notification_service = NotificationService()
+        notification_type = None
+        queryset = (pending.select_related('user_id')
+                    .only('id', 'user_id__email_id', 'subscription_plan', 'end_date')
+                    .order_by('end_date', 'id'))
+        sent = 0
+        last = None
+        for chunk_number in range(self.max_chunks):
+            chunk_queryset = queryset
+            if last is not None:
+                chunk_queryset = chunk_queryset.filter(Q(end_date__gt=last.end_date) | Q(end_date=last.end_date, id__gt=last.id))
+            subscriptions = list(chunk_queryset[:self.chunk_size])
+            if not subscriptions:
+                break
+
+            notification_type = notification_type or self._notification_type(notification_type_name)
+            notifications = []
+            for subscription in subscriptions:
+                plan = subscription_plan_cache.get(subscription.subscription_plan_id).subscription_plan
+                notifications.append({"title": title,
+                                      "message": template.format(plan=plan, end_date=subscription.end_date),
+                                      "recipient": subscription.user_id.email_id,
+                                      "notification_type": notification_type})
+            with transaction.atomic():
+                notification_service.create_notifications(notifications)
+                Subscription.objects.filter(id__in=[subscription.id for subscription in subscriptions]).update(**{marker_field: now})
+
+            sent += len(subscriptions)
+            last = subscriptions[-1]
+            if len(subscriptions) < self.chunk_size:
+                break
+            if self.chunk_pause:
+                # Spread month-end spikes instead of flooding sockets and the layer at once
+                time.sleep(self.chunk_pause)
+        else:
+            logger.info(f"Stopped after {self.max_chunks} chunks, the rest of {marker_field} is left for the next run")
+
+        if sent:
+            logger.info(f"Sent {sent} {notification_type_name} notifications")
+        return sent
+
+
+class SoftDeletePurgeService:
+    """
+    Hard-deletes the Notification, Subscription and User rows soft-deleted more than
+    `retention_days` ago, so soft deletes do not grow the live tables forever.
+
+    Rows are removed in chunks of `chunk_size` ids taken from the `deleted` index, each
+    chunk in its own short transaction, with at most `max_chunks` chunks per model and run.
+    Deleting a user also deletes its subscriptions (CASCADE).
+    """
+
+    models = (Notification, Subscription, User)
+
+    def __init__(self, retention_days=Purge.RETENTION_DAYS.value, chunk_size=BatchSize.PURGE.value,
+                 max_chunks=Purge.MAX_CHUNKS_PER_RUN.value, chunk_pause=Purge.CHUNK_PAUSE_SECONDS.value):
+        self.retention_days = retention_days
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunk_pause = chunk_pause
+
+    def purge(self, now=None):
+        """
+        Hard-delete every model's rows soft-deleted before the retention cutoff.
+        
+        Returns:
+            dict: Model name mapped to the number of its rows purged.
+        """
+        cutoff = (now or timezone.now()) - timedelta(days=self.retention_days)
+        return {model.__name__: self._purge(model, cutoff) for model in self.models}
+
+    def _purge(self, model, cutoff):
+        expired = model.all_objects.filter(deleted__lt=cutoff).order_by('deleted', 'id').values_list('id', flat=True)
+        purged = 0
+        for chunk_number in range(self.max_chunks):
+            ids = list(expired[:self.chunk_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                model.all_objects.filter(id__in=ids).delete(force_policy=HARD_DELETE)
+
+            purged += len(ids)
+            if len(ids) < self.chunk_size:
+                break
+            if self.chunk_pause:
+                time.sleep(self.chunk_pause)
+        else:
+            logger.info(f"Stopped purging {model.__name__} after {self.max_chunks} chunks, the rest is left for the next run")
+
+        if purged:
+            logger.info(f"Purged {purged} soft-deleted {model.__name__} rows")
+        return purged
+
+
 class SubscriptionPlanService:
     def get_all_subscription_plans(self, request):
         """
@@ -259,25 +788,31 @@ class SubscriptionPlanService:
            request(HttpRequest): The request object.
            
         Returns:
-           QuerySet: A QuerySet of all SubscriptionPlan objects.
+           list: All SubscriptionPlan objects, served from subscription_plan_cache.
            
         Raises: 
             DatabaseError: If there is a database-related error retrieving the subscription plans.
         """
         try:
-            subscription_plans = SubscriptionPlan.objects.all()
-            logger.info(f"Retrieved {subscription_plans.count()} subscription plans")
+            subscription_plans = subscription_plan_cache.all()
+            logger.info(f"Retrieved {len(subscription_plans)} subscription plans")
             return subscription_plans
         except SubscriptionPlan.DoesNotExist as e:
             raise NotifyMeException(
                     message=ErrorCodeMessages.HTTP_145_DATABASE_ERROR_WHILE_RETRIEVING_ALL_SUBSCRIPTIONS_PLANS.value,
                     status_code=ErrorCodes.HTTP_145_DATABASE_ERROR_WHILE_RETRIEVING_ALL_SUBSCRIPTIONS_PLANS.value,
                     e=e)
-        except Exception as e:
-            logger.error(f"An Unexpected error occurred while retrieving all subscription plans. ERROR: {e}")
-            raise e
         
         
+    async def aget_all_subscription_plans(self):
+        """
+        Asynchronous get_all_subscription_plans.
+        
+        Returns:
+           list: All SubscriptionPlan objects, served from subscription_plan_cache.
+        """
+        return await subscription_plan_cache.aall()
+
     def get_subscription_plan_by_id(self, data):
         """
         Retrieve a subscription plan by its ID.
@@ -297,30 +832,294 @@ class SubscriptionPlanService:
             raise ValueError
         
         try:
-            subscription_plan = SubscriptionPlan.objects.get(id=plan_id)
+            subscription_plan = subscription_plan_cache.get(plan_id)
             logger.info(f"Retrieved subscription plan with ID {plan_id}")
             return subscription_plan
         except KeyError as e:
             raise NotifyMeException(
                 message=ErrorCodeMessages.HTTP_110_MISSING_ID_WHILE_REQUESTING_FOR_UPDATE.value,
                 status_code=ErrorCodes.HTTP_110_MISSING_ID_WHILE_REQUESTING_FOR_UPDATE.value,
+                http_status=status.HTTP_400_BAD_REQUEST,
                 e=e)
         except ValueError as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_161_SUBSCRIPTION_PLAN_ID_MISSING.value,
                                     status_code=ErrorCodes.HTTP_161_SUBSCRIPTION_PLAN_ID_MISSING.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
                                     e=e)
         except SubscriptionPlan.DoesNotExist as e:
             raise NotifyMeException(message=ErrorCodeMessages.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
                                     status_code=ErrorCodes.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
+                                    http_status=status.HTTP_404_NOT_FOUND,
                                     e=e)
         except PermissionDenied as e:
             raise NotifyMeException(
                 message=ErrorCodeMessages.HTTP_139_PERMISSION_DENIED_WHILE_DELETING_SUBSCRIPTION_PLAN_DATA.value,
                 status_code=ErrorCodes.HTTP_139_PERMISSION_DENIED_WHILE_DELETING_SUBSCRIPTION_PLAN_DATA.value,
+                http_status=status.HTTP_403_FORBIDDEN,
                 e=e)
-        except Exception as e:
-            logger.error(f"An Unexpected error occurred while retrieving subscription plan with ID {plan_id}: {e}")
-            raise e
+
+    async def aget_subscription_plan_by_id(self, data):
+        """
+        Asynchronous get_subscription_plan_by_id: a cache hit never leaves the event loop.
         
+        Args: 
+          data(dict): A dictionary containing the subscription plan ID.
+          
+        Returns:
+           SubscriptionPlan: A SubscriptionPlan object with the given ID.
+           
+        Raises:
+            NotifyMeException: If the subscription plan ID is missing or unknown.
+        """
+        plan_id = data.get('id')
+        try:
+            if plan_id is None:
+                raise ValueError
+            return await subscription_plan_cache.aget(plan_id)
+        except ValueError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_161_SUBSCRIPTION_PLAN_ID_MISSING.value,
+                                    status_code=ErrorCodes.HTTP_161_SUBSCRIPTION_PLAN_ID_MISSING.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+        except SubscriptionPlan.DoesNotExist as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
+                                    status_code=ErrorCodes.HTTP_131_SUBSCRIPTION_PLANS_NOT_FOUND.value,
+                                    http_status=status.HTTP_404_NOT_FOUND,
+                                    e=e)
+
+
+class PresenceService:
+    def get_connection_counts(self):
+        """
+        Count the live WebSocket connections of every subscription plan.
+
+        Returns:
+           dict: The total and, per plan, its id, name and live connection count.
+        """
+        subscription_plans = subscription_plan_cache.all()
+        counts = async_to_sync(get_presence_index().counts_by_plan)([plan.id for plan in subscription_plans])
+        plans = [
+            {"id": plan.id, "subscription_plan": plan.subscription_plan, "connections": counts.get(plan.id, 0)}
+            for plan in subscription_plans
+        ]
+        return {"total": sum(plan["connections"] for plan in plans), "plans": plans}
+
+
+class NotificationService:
+    def create_notifications(self, validated_data):
+        """
+        Persist many notifications with one bulk insert and fan them out to their recipients.
+        
+        Recipients are resolved to users with a single query, and the unread counter of
+        every recipient is raised in the same transaction as the insert.
+        
+        Args:
+            validated_data (list): A list of dictionaries containing validated notification data.
+            
+        Returns:
+            list: The created Notification objects.
+            
+        Raises:
+            NotifyMeException: If there is a database integrity error while inserting the notifications.
+        """
+        try:
+            # One timestamp for the whole batch, so its rows can be found again below
+            created_at = timezone.now()
+            recipients = {data['recipient'] for data in validated_data if data.get('recipient')}
+            user_ids = dict(User.objects.filter(email_id__in=recipients).values_list('email_id', 'id')) if recipients else {}
+            with transaction.atomic():
+                notifications = Notification.objects.bulk_create(
+                    [Notification(created_at=created_at, user_id=user_ids.get(data.get('recipient')), **data)
+                     for data in validated_data],
+                    batch_size=BatchSize.NOTIFICATIONS.value
+                )
+                if notifications and notifications[0].pk is None:
+                    self._assign_ids(notifications, created_at)
+                self.change_unread_counts(Counter(notification.user_id for notification in notifications
+                                                   if notification.user_id is not None))
+            logger.info(f"Created {len(notifications)} notifications")
+        except IntegrityError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_170_INTEGRITY_ERROR_WHILE_CREATING_NOTIFICATIONS.value,
+                                    status_code=ErrorCodes.HTTP_170_INTEGRITY_ERROR_WHILE_CREATING_NOTIFICATIONS.value,
+                                    e=e)
+
+        self.fan_out(notifications)
+        return notifications
+
+    @staticmethod
+    def change_unread_counts(counts, sign=1):
+        """
+        Add (or, with sign=-1, subtract) per-user amounts to the unread counters, with one
+        UPDATE per distinct amount rather than one per user. Counters never go below zero.
+        
+        Args:
+            counts (Counter): User id mapped to the number of notifications.
+            sign (int): 1 to increment, -1 to decrement.
+        """
+        users_by_amount = defaultdict(list)
+        for user_id, amount in counts.items():
+            users_by_amount[amount].append(user_id)
+        for amount, user_ids in users_by_amount.items():
+            unread = F('unread_notifications') + amount if sign > 0 else Greatest(F('unread_notifications') - amount, 0)
+            User.all_objects.filter(id__in=user_ids).update(unread_notifications=unread)
+
+    def _assign_ids(self, notifications, created_at):
+        """
+        Fill in the primary keys of bulk-created notifications on databases (MySQL) that
+        do not return them, so clients can acknowledge them by id.
+        """
+        ids = list(Notification.objects.filter(created_at=created_at).order_by('id').values_list('id', flat=True))
+        if len(ids) != len(notifications):
+            logger.warning(f"Could not resolve the ids of {len(notifications)} bulk-created notifications, they will not be acknowledgeable")
+            return
+        for notification, notification_id in zip(notifications, ids):
+            notification.pk = notification_id
+    
+    def fan_out(self, notifications):
+        """
+        Push notifications to the WebSocket clients of their recipients in one pass.
+        
+        Notifications without a recipient are broadcast, those whose recipient is not a
+        user are not delivered, and the batches are dispatched with one flush.
+        
+        Args:
+            notifications (list): Notification objects to deliver.
+        """
+        deliveries = []
+        for notification in notifications:
+            if notification.recipient and notification.user_id is None:
+                continue
+            delivery = {"message": notification.message,
+                        "notification_type": notification.notification_type_id,
+                        "notification_id": notification.id,
+                        "priority": notification_type_cache.get(notification.notification_type_id).priority}
+            if notification.recipient:
+                delivery["user_id"] = notification.user_id
+            else:
+                delivery["group_name"] = ChannelGroups.BROADCAST.value
+            deliveries.append(delivery)
+        get_notification_manager().publish_many(deliveries)
+
+    def record_acks(self, acks, now=None):
+        """
+        Persist buffered delivery acknowledgements and read receipts with one UPDATE per kind.
+        
+        Only notifications addressed to the acknowledging user are updated, so a client cannot
+        mark other users' notifications. Broadcast notifications have no user and are skipped.
+        The unread counters drop by the number of notifications newly marked read, in the
+        same transaction.
+        
+        Args:
+            acks (dict): (kind, user id) mapped to a set of notification ids,
+                where kind is ACK_DELIVERED or ACK_READ.
+            now (datetime): The time recorded, defaults to now.
+            
+        Returns:
+            int: The number of notifications updated.
+        """
+        now = now or timezone.now()
+        updated = 0
+        with transaction.atomic():
+            for kind, fields in ((ACK_DELIVERED, {'delivered_at': now}),
+                                 (ACK_READ, {'read_at': now, 'delivered_at': Coalesce(F('delivered_at'), Value(now))})):
+                condition = Q()
+                for (ack_kind, user_id), notification_ids in acks.items():
+                    if ack_kind == kind and notification_ids:
+                        condition |= Q(user_id=user_id, id__in=notification_ids)
+                if not condition:
+                    continue
+                unset_field = 'delivered_at' if kind == ACK_DELIVERED else 'read_at'
+                notifications = Notification.objects.filter(condition, **{f'{unset_field}__isnull': True})
+                if kind == ACK_DELIVERED:
+                    updated += notifications.update(**fields)
+                    continue
+                # Lock the rows being read, so a concurrent ack cannot decrement the counter for them again
+                read = list(notifications.select_for_update().values_list('id', 'user_id'))
+                if not read:
+                    continue
+                updated += Notification.objects.filter(id__in=[notification_id for notification_id, _ in read]).update(**fields)
+                self.change_unread_counts(Counter(user_id for _, user_id in read), sign=-1)
+        return updated
 
-       
\ No newline at end of file
+    async def arecord_acks(self, acks, now=None):
+        """
+        record_acks for the WebSocket side, run in a worker thread.
+        """
+        return await sync_to_async(self.record_acks)(acks, now)
+
+    def backfill_inbox(self, chunk_size=BatchSize.INBOX_BACKFILL.value):
+        """
+        Link the notifications created before Notification.user existed to the user of their
+        recipient, then recount the unread counter of every user from its notifications.
+        
+        Both passes walk ids in chunks of `chunk_size`, one UPDATE per chunk, so they can run
+        on a live table. Notifications created meanwhile are linked and counted on creation;
+        rerunning the command also repairs counters that drifted.
+        
+        Returns:
+            dict: The number of notifications linked and of users recounted.
+        """
+        report = {"linked": 0, "users": 0}
+        user_of_recipient = User.objects.filter(email_id=OuterRef('recipient')).values('id')[:1]
+        unlinked = Notification.objects.filter(user__isnull=True, recipient__isnull=False).order_by('id').values_list('id', flat=True)
+        last_id = 0
+        while True:
+            ids = list(unlinked.filter(id__gt=last_id)[:chunk_size])
+            if not ids:
+                break
+            report["linked"] += (Notification.objects.filter(Exists(user_of_recipient), id__in=ids)
+                                 .update(user_id=Subquery(user_of_recipient)))
+            last_id = ids[-1]
+
+        unread = (Notification.objects.filter(user_id=OuterRef('pk'), read_at__isnull=True).order_by()
+                  .values('user_id').annotate(count=Count('id')).values('count'))
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        last_id = 0
+        while True:
+            ids = list(users.filter(id__gt=last_id)[:chunk_size])
+            if not ids:
+                break
+            report["users"] += User.objects.filter(id__in=ids).update(unread_notifications=Coalesce(Subquery(unread), 0))
+            last_id = ids[-1]
+        logger.info(f"Inbox backfill linked {report['linked']} notifications and recounted {report['users']} users")
+        return report
+
+    def get_inbox(self, user, limit, since=None):
+        """
+        The inbox of one user: the unread count and either the newest notifications or
+        those created after a cursor, read from the (user, deleted, created_at, id) index.
+        
+        Args:
+            user (User): The owner of the inbox.
+            limit (int): Maximum number of notifications returned.
+            since (str): Cursor of a previous response. When given, the notifications created
+                after it are returned oldest first; otherwise the newest ones, newest first.
+            
+        Returns:
+            dict: "unread", "notifications", "cursor" (the newest notification seen, to pass
+            as since next time) and "has_more" (more notifications than limit were found).
+            
+        Raises:
+            NotifyMeException: If the cursor is malformed.
+        """
+        notifications = Notification.objects.filter(user_id=user.id)
+        if since:
+            try:
+                rows, next_cursor = keyset_page(notifications, since, limit)
+            except ValueError as e:
+                raise NotifyMeException(message=ErrorCodeMessages.HTTP_172_INVALID_PAGINATION_PARAMETERS.value,
+                                        status_code=ErrorCodes.HTTP_172_INVALID_PAGINATION_PARAMETERS.value,
+                                        http_status=status.HTTP_400_BAD_REQUEST,
+                                        e=e)
+            newest, has_more = (rows[-1] if rows else None), next_cursor is not None
+        else:
+            rows = list(notifications.order_by('-created_at', '-id')[:limit + 1])
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            newest = rows[0] if rows else None
+        return {
+            "unread": user.unread_notifications,
+            "notifications": rows,
+            "cursor": encode_cursor(newest) if newest else since,
+            "has_more": has_more,
+        }
@@ -0,0 +1,29 @@
+from collections import Counter
+from django.db.models.signals import post_delete, post_save
+from safedelete.signals import post_softdelete, post_undelete
+from NotifyMe.models.notification import Notification
+from NotifyMe.models.notificationType import NotificationType
+from NotifyMe.models.subscriptionPlan import SubscriptionPlan
+from NotifyMe.services.service import NotificationService
+from NotifyMe.utils.reference_cache import notification_type_cache, subscription_plan_cache
+
+# Reference caches reload after any change to their table
+post_save.connect(subscription_plan_cache.invalidate, sender=SubscriptionPlan, dispatch_uid="subscription_plan_cache_save")
+post_delete.connect(subscription_plan_cache.invalidate, sender=SubscriptionPlan, dispatch_uid="subscription_plan_cache_delete")
+post_save.connect(notification_type_cache.invalidate, sender=NotificationType, dispatch_uid="notification_type_cache_save")
+post_delete.connect(notification_type_cache.invalidate, sender=NotificationType, dispatch_uid="notification_type_cache_delete")
+
+
+def update_unread_count(sender, instance, **kwargs):
+    """
+    Keep User.unread_notifications in step when an unread notification is soft-deleted or restored.
+
+    Purging only hard-deletes rows that are already soft-deleted, so it needs no adjustment.
+    """
+    if instance.user_id is not None and instance.read_at is None:
+        sign = 1 if kwargs["signal"] is post_undelete else -1
+        NotificationService.change_unread_counts(Counter({instance.user_id: 1}), sign=sign)
+
+
+post_softdelete.connect(update_unread_count, sender=Notification, dispatch_uid="notification_unread_softdelete")
+post_undelete.connect(update_unread_count, sender=Notification, dispatch_uid="notification_unread_undelete")
@@ -1,3 +1,1036 @@
-from django.test import TestCase
+import asyncio
+import atexit
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core import signing
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from NotifyMe.benchmarks.utils import in_memory_layers
+from NotifyMe.benchmarks.websocket_fanout import BROADCAST, USER, run_fanout_benchmark
+from NotifyMe.consumers import NotificationConsumer
+from NotifyMe.constants import ACK_READ, NotificationPriority, SubscriptionExpiry
+from NotifyMe.layers.broker import LocalBroker
+from NotifyMe.layers.redis_layer import RedisChannelLayer
+from NotifyMe.models.notification import Notification
+from NotifyMe.models.notificationType import NotificationType
+from NotifyMe.models.subscription import Subscription
+from NotifyMe.models.subscriptionPlan import SubscriptionPlan
+from NotifyMe.models.user import User
+from NotifyMe.services.service import (NotificationService, SoftDeletePurgeService, SubscriptionExpiryService, SubscriptionPlanService,
+                                       SubscriptionService, UserService)
+from NotifyMe.utils.ack_buffer import AckBuffer, get_ack_buffer
+from NotifyMe.utils.backpressure import SendBuffer, metrics
+from NotifyMe.utils.error_codes import ErrorCodeMessages, ErrorCodes
+from NotifyMe.utils.exceptionManager import NotifyMeException
+from NotifyMe.utils.importers import CSV, read_rows
+from NotifyMe.utils.log_utils import SuccessSampleFilter, TruncateFilter, install_queue_logging
+from NotifyMe.utils.offline_queue import InMemoryOfflineQueue, RedisOfflineQueue, get_offline_queue
+from NotifyMe.utils.presence import InMemoryPresenceIndex, RedisPresenceIndex
+from NotifyMe.utils.socket_auth import make_socket_token, read_socket_token
+from NotifyMe.utils.websocket_utils import NotificationManager, user_group_name
+from NotifyMe.utils.wire import JSON_SUBPROTOCOL, msgpack, negotiate
+from NotifyMe.views.views import UserAPI
 
-# Create your tests here.
+
+class RedisChannelLayerTests(SimpleTestCase):
+    """
+    Two layer instances against one LocalBroker behave like two Daphne workers.
+    """
+
+    async def start_workers(self):
+        self.broker = await LocalBroker(port=0).start()
+        self.worker_a = RedisChannelLayer(port=self.broker.port)
+        self.worker_b = RedisChannelLayer(port=self.broker.port)
+
+    async def stop_workers(self):
+        await self.worker_a.close()
+        await self.worker_b.close()
+        await self.broker.stop()
+
+    async def test_group_send_reaches_channels_of_other_workers(self):
+        await self.start_workers()
+        try:
+            channel_a = await self.worker_a.new_channel()
+            channel_b = await self.worker_b.new_channel()
+            await self.worker_a.group_add("user_1", channel_a)
+            await self.worker_b.group_add("user_1", channel_b)
+
+            await self.worker_b.group_send("user_1", {"type": "send_notification", "message": "hello"})
+
+            message_a = await asyncio.wait_for(self.worker_a.receive(channel_a), 2)
+            message_b = await asyncio.wait_for(self.worker_b.receive(channel_b), 2)
+            self.assertEqual(message_a["message"], "hello")
+            self.assertEqual(message_b["message"], "hello")
+        finally:
+            await self.stop_workers()
+
+    async def test_group_discard_stops_delivery(self):
+        await self.start_workers()
+        try:
+            channel = await self.worker_a.new_channel()
+            await self.worker_a.group_add("plan_1", channel)
+            await self.worker_a.group_discard("plan_1", channel)
+            await self.worker_b.group_send("plan_1", {"type": "send_notification", "message": "hello"})
+            await self.worker_b.send(channel, {"type": "send_notification", "message": "direct", "raw": b"\x00\x01"})
+
+            message = await asyncio.wait_for(self.worker_a.receive(channel), 2)
+            self.assertEqual(message["message"], "direct")
+            self.assertEqual(message["raw"], b"\x00\x01")
+        finally:
+            await self.stop_workers()
+
+    async def test_group_send_prunes_channels_not_refreshed(self):
+        await self.start_workers()
+        try:
+            self.worker_b.group_expiry = 1
+            live = await self.worker_b.new_channel()
+            await self.worker_a.group_add("plan_2", "specific.gone!crashed")
+            self.broker.data[b"asgi:group:plan_2"][b"specific.gone!crashed"] -= 5
+            await self.worker_b.group_add("plan_2", live)
+            await self.worker_b.group_send("plan_2", {"type": "send_notification", "message": "hello"})
+
+            self.assertEqual(self.broker.cmd_zrange(b"asgi:group:plan_2", 0, -1), [live.encode()])
+            self.assertEqual((await asyncio.wait_for(self.worker_b.receive(live), 2))["message"], "hello")
+        finally:
+            await self.stop_workers()
+
+    async def test_cancelled_pipeline_does_not_leak_replies(self):
+        await self.start_workers()
+        try:
+            connection = self.worker_a._connection()
+            blocked = asyncio.ensure_future(connection.execute("BLPOP", "nothing", 1))
+            await asyncio.sleep(0.05)
+            blocked.cancel()
+            # The BLPOP reply must not be read as the reply to PING
+            self.assertEqual(await asyncio.wait_for(connection.execute("PING"), 0.5), "PONG")
+        finally:
+            await self.stop_workers()
+
+
+class ListQueryCountTests(TestCase):
+    """
+    Listing endpoints must issue the same number of queries for 2 rows as for 20.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.plans = [SubscriptionPlan.objects.create(subscription_plan=name) for name in ("BASIC", "PREMIUM")]
+
+    def create_users(self, count):
+        start = User.objects.count()
+        for index in range(start, start + count):
+            plan = self.plans[index % len(self.plans)]
+            user = User.objects.create(email_id=f"user{index}@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+            Subscription.objects.create(user_id=user, subscription_plan=plan)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.data["status"], 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        self.create_users(2)
+        # The first request loads the reference caches
+        self.count_queries(url)
+        small = self.count_queries(url)
+        self.create_users(18)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_user_list_query_count_is_constant(self):
+        self.assert_constant_queries("/api/user")
+
+    def test_subscription_list_query_count_is_constant(self):
+        self.assert_constant_queries("/api/subscription")
+
+
+class PlanDurationTests(TestCase):
+    """
+    End dates come from the plan's duration_days, else from PLAN_DURATION_DAYS by plan name.
+    """
+
+    def test_table_lookup_override_and_unknown_plan(self):
+        start = timezone.now()
+        basic = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        premium = SubscriptionPlan.objects.create(subscription_plan="PREMIUM")
+        trial = SubscriptionPlan.objects.create(subscription_plan="BASIC", duration_days=7)
+        unknown = SubscriptionPlan.objects.create(subscription_plan="LIFETIME")
+        service = UserService()
+
+        self.assertEqual(service.get_duration_days(basic), 30)
+        self.assertEqual(service.get_duration_days(trial), 7)
+        self.assertEqual(service.get_end_times([basic, premium, trial, basic], start),
+                         [start + timedelta(days=days) for days in (30, 365, 7, 30)])
+        with self.assertRaises(NotifyMeException) as raised:
+            service.get_end_time(unknown, start)
+        self.assertEqual(raised.exception.status_code, ErrorCodes.HTTP_158_INVALID_SUBSCRIPTION_PLAN_PROVIDED.value)
+
+
+class UserImportTests(TestCase):
+    """
+    Bad rows of an import file are reported one by one; the rest of the file is saved.
+    """
+
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        User.objects.create(email_id="taken@example.com", first_name="First", last_name="Last", subscription_plan=self.plan)
+
+    def csv_lines(self, *emails):
+        return ["email_id,first_name,last_name,subscription_plan\n"] + [f"{email},First,Last,{self.plan.id}\n" for email in emails]
+
+    def test_csv_errors_are_reported_per_row(self):
+        lines = self.csv_lines("new1@example.com", "taken@example.com", "not-an-email")
+        # A field over the csv module's size limit makes the reader raise on that row only
+        lines.insert(2, f'"{"x" * 200000}",First,Last,{self.plan.id}\n')
+        report = UserService().import_users(read_rows(lines + self.csv_lines("new2@example.com")[1:], CSV))
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 3, 4])
+        self.assertIn("Invalid CSV", report["errors"][0]["errors"]["non_field_errors"][0])
+        self.assertEqual(Subscription.objects.count(), 2)
+
+    def test_rejected_chunk_is_retried_row_by_row(self):
+        # As on MySQL, where a case-insensitive duplicate passes the email check and fails the insert
+        with mock.patch.object(UserService, "_existing_emails", return_value=set()):
+            report = UserService().import_users(read_rows(self.csv_lines("a@example.com", "taken@example.com", "b@example.com"), CSV))
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(report["errors"], [{"row": 2, "errors": {"non_field_errors": [ErrorCodeMessages.HTTP_176_INTEGRITY_ERROR_WHILE_IMPORTING_USER.value]}}])
+        self.assertTrue(User.objects.filter(email_id="b@example.com").exists())
+
+    def test_endpoint_and_command_import_ndjson(self):
+        lines = [json.dumps({"email_id": f"api{index}@example.com", "first_name": "First", "last_name": "Last",
+                             "subscription_plan": self.plan.id}) for index in range(2)] + ["{broken"]
+        upload = SimpleUploadedFile("users.ndjson", "\n".join(lines).encode())
+        response = APIClient().post("/api/user/import", {"file": upload}, format="multipart")
+        self.assertEqual(response.data["data"]["created"], 2)
+        self.assertEqual(response.data["data"]["errors"][0]["row"], 3)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as source:
+            source.writelines(self.csv_lines("cli@example.com"))
+        self.addCleanup(os.remove, source.name)
+        output = io.StringIO()
+        call_command("import_users", source.name, stdout=output)
+        self.assertEqual(json.loads(output.getvalue())["created"], 1)
+
+
+class AsyncServiceTests(TestCase):
+    """
+    The async service methods used by consumers return the same rows as their sync counterparts.
+    """
+
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+
+    async def test_user_service(self):
+        service = UserService()
+        first = await service.acreate_user({"email_id": "async1@example.com", "first_name": "First", "last_name": "Last",
+                                            "subscription_plan": self.plan})
+        second = await service.acreate_user({"email_id": "async2@example.com", "first_name": "First", "last_name": "Last",
+                                             "subscription_plan": self.plan})
+        self.assertEqual(await Subscription.objects.filter(user_id=first).acount(), 1)
+        self.assertEqual((await service.aget_user_by_id({"id": first.id})).email_id, "async1@example.com")
+        self.assertEqual([user.id for user in await service.aget_all_users()], [first.id, second.id])
+
+        page, cursor = await service.aget_users_page(limit=1)
+        self.assertEqual([user.id for user in page], [first.id])
+        page, cursor = await service.aget_users_page(cursor, limit=1)
+        self.assertEqual(([user.id for user in page], cursor), ([second.id], None))
+        with self.assertRaises(NotifyMeException):
+            await service.aget_users_page("not-a-cursor")
+        with self.assertRaises(NotifyMeException):
+            await service.aget_user_by_id({"id": 999999})
+
+    async def test_subscription_service(self):
+        user = await User.objects.acreate(email_id="async-sub@example.com", first_name="First", last_name="Last", subscription_plan=self.plan)
+        subscription = await Subscription.objects.acreate(user_id=user, subscription_plan=self.plan)
+        service = SubscriptionService()
+        self.assertEqual([row.id for row in await service.aget_all_subscriptions()], [subscription.id])
+        self.assertEqual((await service.aget_subscription_by_id({"id": subscription.id})).user_id_id, user.id)
+        with self.assertRaises(NotifyMeException):
+            await service.aget_subscription_by_id({})
+
+    async def test_subscription_plan_service(self):
+        service = SubscriptionPlanService()
+        self.assertEqual([plan.id for plan in await service.aget_all_subscription_plans()], [self.plan.id])
+        self.assertEqual((await service.aget_subscription_plan_by_id({"id": self.plan.id})).subscription_plan, "BASIC")
+        with self.assertRaises(NotifyMeException):
+            await service.aget_subscription_plan_by_id({})
+
+    async def test_notification_service(self):
+        user = await User.objects.acreate(email_id="async-ack@example.com", first_name="First", last_name="Last", subscription_plan=self.plan)
+        notification_type = await NotificationType.objects.acreate(notification_type="INFO")
+        notification = await Notification.objects.acreate(title="Hi", message="m", user=user, recipient=user.email_id,
+                                                          notification_type=notification_type)
+        service = NotificationService()
+        self.assertEqual(await service.arecord_acks({(ACK_READ, user.id): {notification.id}}), 1)
+        self.assertEqual(await service.arecord_acks({(ACK_READ, user.id): {notification.id}}), 0)
+        await notification.arefresh_from_db()
+        self.assertIsNotNone(notification.read_at)
+        self.assertEqual(notification.delivered_at, notification.read_at)
+
+
+class UserStreamTests(TransactionTestCase):
+    """
+    ?stream=ndjson reads users chunk by chunk while the response is being sent.
+    """
+
+    async def test_stream_spans_several_chunks(self):
+        plan = await SubscriptionPlan.objects.acreate(subscription_plan="BASIC")
+        for index in range(5):
+            await User.objects.acreate(email_id=f"stream{index}@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+
+        with mock.patch.object(UserAPI, "stream_chunk_size", 2):
+            response = await AsyncClient().get("/api/user", {"stream": "ndjson"})
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        emails = [json.loads(line)["email_id"] for chunk in chunks for line in chunk.decode().splitlines()]
+        self.assertEqual(emails, [f"stream{index}@example.com" for index in range(5)])
+
+
+class WebSocketFanoutBenchmarkTests(TransactionTestCase):
+    """
+    A small run of the fan-out benchmark, so a broken delivery path fails the suite.
+    """
+
+    async def run_benchmark(self, target):
+        from NotificationModule.asgi import application
+        with in_memory_layers():
+            return await run_fanout_benchmark(application, clients=5, notifications=20, target=target, timeout=5)
+
+    async def test_broadcast_reaches_every_client(self):
+        results = await self.run_benchmark(BROADCAST)
+        self.assertEqual(results["deliveries"], 5 * 20)
+        self.assertGreater(results["latency"]["p99_ms"], 0)
+
+    async def test_user_target_reaches_one_client_per_notification(self):
+        results = await self.run_benchmark(USER)
+        self.assertEqual(results["deliveries"], 20)
+
+
+class AcknowledgementTests(TransactionTestCase):
+    """
+    ack/read frames sent by a client end up on the recipient's notifications.
+    """
+
+    def setUp(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        self.notification_type = NotificationType.objects.create(notification_type="INFO")
+        self.user = User.objects.create(email_id="reader@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        self.other = User.objects.create(email_id="other@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+
+    def create_notifications(self):
+        return NotificationService().create_notifications([
+            {"title": "Hi", "message": "mine", "recipient": self.user.email_id, "notification_type": self.notification_type},
+            {"title": "Hi", "message": "theirs", "recipient": self.other.email_id, "notification_type": self.notification_type},
+        ])
+
+    async def test_ack_and_read_frames_are_recorded(self):
+        from NotificationModule.asgi import application
+        with in_memory_layers():
+            communicator = WebsocketCommunicator(application, f"/ws/notification/?token={make_socket_token(self.user.id)}")
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            mine, theirs = await database_sync_to_async(self.create_notifications)()
+            frame = json.loads(await communicator.receive_from(timeout=2))
+            self.assertEqual(frame["id"], mine.id)
+
+            # Acking another user's notification must not touch it
+            await communicator.send_to(text_data=json.dumps({"type": "ack", "ids": [mine.id, theirs.id]}))
+            await communicator.send_to(text_data=json.dumps({"type": "read", "ids": [mine.id]}))
+            await communicator.send_to(text_data="not json")
+            await communicator.receive_nothing(timeout=0.2)
+            await get_ack_buffer().flush()
+            await communicator.disconnect()
+
+        mine = await Notification.objects.aget(id=mine.id)
+        theirs = await Notification.objects.aget(id=theirs.id)
+        self.assertIsNotNone(mine.delivered_at)
+        self.assertIsNotNone(mine.read_at)
+        self.assertIsNone(theirs.delivered_at)
+        self.assertEqual((await User.objects.aget(id=self.user.id)).unread_notifications, 0)
+        self.assertEqual((await User.objects.aget(id=self.other.id)).unread_notifications, 1)
+
+
+    async def test_failed_ack_writes_are_retried_then_dropped(self):
+        written = []
+
+        class FlakyService:
+            failures = 1
+
+            async def arecord_acks(self, acks):
+                if self.failures:
+                    self.failures -= 1
+                    raise DatabaseError("connection lost")
+                written.append(dict(acks))
+                return sum(map(len, acks.values()))
+
+        service = FlakyService()
+        buffer = AckBuffer(service, flush_interval=0, max_flush_attempts=2)
+        await buffer.add(ACK_READ, 1, [1, 2])
+        with self.assertLogs("NotifyMe.utils.ack_buffer", level="WARNING"):
+            self.assertEqual(await buffer.flush(), 0)
+        await buffer.add(ACK_READ, 1, [3])
+        self.assertEqual(await buffer.flush(), 3)
+        self.assertEqual(written, [{(ACK_READ, 1): {1, 2, 3}}])
+
+        service.failures = 2
+        await buffer.add(ACK_READ, 1, [4])
+        with self.assertLogs("NotifyMe.utils.ack_buffer", level="WARNING") as logs:
+            await buffer.flush()
+            await buffer.flush()
+        self.assertEqual(logs.records[-1].levelno, logging.ERROR)
+        self.assertEqual(await buffer.flush(), 0)
+        self.assertEqual(len(written), 1)
+
+
+class SocketAuthTests(TransactionTestCase):
+    """
+    A WebSocket is only opened for the user named by a valid signed token.
+    """
+
+    async def test_only_signed_tokens_open_a_socket(self):
+        from NotificationModule.asgi import application
+        plan = await SubscriptionPlan.objects.acreate(subscription_plan="BASIC")
+        user = await User.objects.acreate(email_id="socket@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        token = make_socket_token(user.id)
+        with in_memory_layers():
+            for query in (f"user_id={user.id}", f"token={token[:-2]}xx", f"token={token}"):
+                communicator = WebsocketCommunicator(application, f"/ws/notification/?{query}")
+                connected, _ = await communicator.connect()
+                self.assertEqual(connected, query == f"token={token}", query)
+                await communicator.disconnect()
+        with self.assertRaises(signing.SignatureExpired):
+            read_socket_token(token, max_age=-1)
+
+    async def test_issued_token_opens_the_socket_and_the_inbox(self):
+        from NotificationModule.asgi import application
+        plan = await SubscriptionPlan.objects.acreate(subscription_plan="BASIC")
+        notification_type = await NotificationType.objects.acreate(notification_type="INFO")
+        user = await User.objects.acreate(email_id="issued@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        output = io.StringIO()
+        await database_sync_to_async(call_command)("issue_socket_token", str(user.id), stdout=output)
+        token = output.getvalue().strip()
+
+        with in_memory_layers():
+            communicator = WebsocketCommunicator(application, f"/ws/notification/?token={token}")
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await database_sync_to_async(NotificationService().create_notifications)(
+                [{"title": "Hi", "message": "welcome", "recipient": user.email_id, "notification_type": notification_type}])
+            frame = json.loads(await communicator.receive_from(timeout=2))
+            await communicator.disconnect()
+        self.assertEqual(frame["message"], "welcome")
+
+        client = AsyncClient()
+        response = json.loads((await client.get("/api/notification/inbox", {"token": token})).content)
+        self.assertEqual(response["data"]["unread"], 1)
+        for params in ({"user_id": user.id}, {"token": token[:-2] + "xx"}):
+            response = json.loads((await client.get("/api/notification/inbox", params)).content)
+            self.assertEqual(response["status"], 401, params)
+        with self.assertRaises(CommandError):
+            await database_sync_to_async(call_command)("issue_socket_token", "999999")
+
+
+class WireFormatTests(TransactionTestCase):
+    """
+    The subprotocol requested in the handshake decides how notification frames are encoded.
+    """
+
+    def setUp(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        self.user = User.objects.create(email_id="wire@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+
+    async def connect(self, subprotocols):
+        from NotificationModule.asgi import application
+        communicator = WebsocketCommunicator(application, f"/ws/notification/?token={make_socket_token(self.user.id)}", subprotocols=subprotocols)
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator, subprotocol
+
+    async def publish(self, count):
+        manager = NotificationManager()
+        for i in range(count):
+            await manager.apublish(user_group_name(self.user.id), f"message {i}", 3, notification_id=i)
+        await manager.aflush()
+
+    async def test_json_subprotocol_sends_batched_frames(self):
+        with in_memory_layers():
+            communicator, subprotocol = await self.connect(["unknown", "notifyme.json"])
+            self.assertEqual(subprotocol, "notifyme.json")
+            await self.publish(3)
+            frame = json.loads(await communicator.receive_from(timeout=2))
+            await communicator.disconnect()
+        self.assertEqual(frame["batch"], [{"id": i, "type": 3, "payload": f"message {i}"} for i in range(3)])
+
+    async def test_msgpack_subprotocol_sends_binary_frames(self):
+        if msgpack is None:
+            self.skipTest("msgpack is not installed")
+        with in_memory_layers():
+            communicator, subprotocol = await self.connect(["notifyme.msgpack", "notifyme.json"])
+            self.assertEqual(subprotocol, "notifyme.msgpack")
+            await self.publish(2)
+            output = await communicator.receive_output(timeout=2)
+            await communicator.disconnect()
+        self.assertEqual(msgpack.unpackb(output["bytes"]), [[0, 3, "message 0"], [1, 3, "message 1"]])
+
+    async def test_no_subprotocol_keeps_one_text_frame_per_notification(self):
+        with in_memory_layers():
+            communicator, subprotocol = await self.connect(None)
+            self.assertIsNone(subprotocol)
+            await self.publish(2)
+            frames = [json.loads(await communicator.receive_from(timeout=2)) for _ in range(2)]
+            await communicator.disconnect()
+        self.assertEqual(frames[1], {"id": 1, "message": "message 1", "notification_type": 3})
+
+
+class SendBufferTests(SimpleTestCase):
+    """
+    A client that stops reading loses low-priority frames first and is eventually disconnected.
+    """
+
+    async def make_buffer(self):
+        self.sent = []
+        self.disconnected = False
+        self.gate = asyncio.Event()
+
+        async def send(frame):
+            await self.gate.wait()
+            self.sent.append(frame)
+
+        async def on_slow_client():
+            self.disconnected = True
+
+        metrics.reset()
+        buffer = SendBuffer(send, on_slow_client, high_water=2, max_frames=4, slow_client_timeout=60)
+        buffer.start()
+        # The writer takes the first frame and blocks on the stalled client
+        await buffer.push("first")
+        await asyncio.sleep(0)
+        return buffer
+
+    async def test_low_priority_frames_are_shed_above_high_water(self):
+        buffer = await self.make_buffer()
+        for frame in ("a", "b"):
+            await buffer.push(frame)
+        self.assertFalse(await buffer.push("low", priority=0))
+        self.assertTrue(await buffer.push("c"))
+        self.gate.set()
+        await asyncio.sleep(0.01)
+        await buffer.stop()
+        self.assertEqual(self.sent, ["first", "a", "b", "c"])
+        self.assertEqual(metrics.snapshot()["dropped"], {"low_priority": 1})
+
+    async def test_full_buffer_evicts_for_high_priority_then_disconnects(self):
+        buffer = await self.make_buffer()
+        for frame in ("a", "b", "c", "d"):
+            await buffer.push(frame)
+        self.assertFalse(await buffer.push("normal"))
+        for frame in ("h1", "h2", "h3", "h4"):
+            self.assertTrue(await buffer.push(frame, priority=2))
+        self.assertFalse(await buffer.push("h5", priority=2))
+        await buffer.stop()
+        self.assertTrue(self.disconnected)
+        self.assertEqual(metrics.snapshot(), {
+            "dropped": {"buffer_full": 1, "evicted": 4, "slow_client": 5},
+            "slow_clients_disconnected": 1,
+        })
+
+    async def test_unacked_window_holds_frames_when_send_never_blocks(self):
+        sent = []
+
+        async def send(frame):
+            # Like Daphne: the frame goes to the transport buffer at once
+            sent.append(frame)
+
+        async def on_slow_client():
+            pass
+
+        metrics.reset()
+        buffer = SendBuffer(send, on_slow_client, high_water=2, max_frames=4, slow_client_timeout=60, max_unacked=2)
+        buffer.start()
+        buffer.acknowledge([])
+        for notification_id in range(1, 5):
+            await buffer.push(f"n{notification_id}", ids=[notification_id])
+        await asyncio.sleep(0.01)
+        self.assertEqual(sent, ["n1", "n2"])
+        self.assertFalse(await buffer.push("low", priority=0, ids=[6]))
+
+        buffer.acknowledge([1, 2])
+        await asyncio.sleep(0.01)
+        await buffer.stop()
+        self.assertEqual(sent, ["n1", "n2", "n3", "n4"])
+        self.assertEqual(metrics.snapshot()["dropped"], {"low_priority": 1})
+
+
+class PriorityDispatchTests(SimpleTestCase):
+    """
+    A high-priority notification queued during a large low-priority campaign overtakes its remaining batches.
+    """
+
+    async def test_high_priority_overtakes_low_priority_campaign(self):
+        sent = []
+
+        class RecordingLayer:
+            async def group_send(self, group, event):
+                sent.append((group, event["priority"], [n["message"] for n in event["notifications"]]))
+                if len(sent) == 1:
+                    manager._enqueue(user_group_name(7), "security alert", None, priority=2)
+
+        manager = NotificationManager(channel_layer=RecordingLayer(), max_batch_size=2, offline_queue=None, pre_encode=False)
+        for i in range(6):
+            manager._enqueue("Our_clients", f"campaign {i}", None, priority=0)
+        self.assertEqual(await manager.aflush(), 7)
+        self.assertEqual(sent, [
+            ("Our_clients", 0, ["campaign 0", "campaign 1"]),
+            (user_group_name(7), 2, ["security alert"]),
+            ("Our_clients", 0, ["campaign 2", "campaign 3"]),
+            ("Our_clients", 0, ["campaign 4", "campaign 5"]),
+        ])
+
+
+class HighPriorityBatchTests(SimpleTestCase):
+    """
+    A batch of HIGH notifications is sent with a single flush, not one flush each, while a
+    single send_to_user is delivered before it returns.
+    """
+
+    def test_high_priority_notifications_wait_for_the_flush(self):
+        sent = []
+
+        class RecordingLayer:
+            async def group_send(self, group, event):
+                sent.append((group, len(event["notifications"])))
+
+        manager = NotificationManager(channel_layer=RecordingLayer(), offline_queue=None, pre_encode=False)
+        manager.publish_many({"user_id": 7, "message": f"expiry {i}", "priority": NotificationPriority.HIGH.value}
+                             for i in range(3))
+        self.assertEqual(sent, [(user_group_name(7), 3)])
+
+        manager.send_to_user(7, "one more", None)
+        manager.broadcast("for everyone", None)
+        self.assertEqual(sent[1:], [(user_group_name(7), 1), ("Our_clients", 1)])
+
+
+class PreEncodeTests(SimpleTestCase):
+    """
+    Frames are pre-encoded for groups shared by many sockets, not for a single user's group.
+    """
+
+    async def test_only_shared_groups_are_pre_encoded(self):
+        events = {}
+
+        class RecordingLayer:
+            async def group_send(self, group, event):
+                events[group] = event
+
+        manager = NotificationManager(channel_layer=RecordingLayer(), offline_queue=None)
+        manager._enqueue(user_group_name(7), "for one user", None, user_id=7)
+        manager._enqueue("Our_clients", "for everyone", None)
+        await manager.aflush()
+        self.assertNotIn("frames", events[user_group_name(7)])
+        self.assertEqual(events[user_group_name(7)]["notifications"][0]["message"], "for one user")
+        self.assertIn("frames", events["Our_clients"])
+        self.assertNotIn("notifications", events["Our_clients"])
+
+
+class OfflineQueueTests(SimpleTestCase):
+    """
+    Notifications queued for an offline user are replayed oldest first, within the queue's limits.
+    """
+
+    async def check_queue(self, queue):
+        await queue.push(1, [{"id": 1}, {"id": 2}])
+        await queue.push(1, [{"id": 3}, {"id": 4}])
+        await queue.push(2, [{"id": 5}])
+        # max_messages=3 keeps the newest three
+        self.assertEqual(await queue.drain(1), [{"id": 2}, {"id": 3}, {"id": 4}])
+        self.assertEqual(await queue.drain(1), [])
+        self.assertEqual(await queue.drain(2), [{"id": 5}])
+
+    async def test_in_memory_queue(self):
+        queue = InMemoryOfflineQueue(max_messages=3, ttl=60, max_users=2)
+        await self.check_queue(queue)
+
+        await queue.push(1, [{"id": 1}])
+        with mock.patch("NotifyMe.utils.offline_queue.time.time", return_value=time.time() + 61):
+            self.assertEqual(await queue.drain(1), [])
+        for user_id in (1, 2, 3):
+            await queue.push(user_id, [{"id": user_id}])
+        # The least recently written user is evicted beyond max_users
+        self.assertEqual(await queue.drain(1), [])
+        self.assertEqual(await queue.drain(3), [{"id": 3}])
+
+    async def test_redis_queue(self):
+        broker = await LocalBroker(port=0).start()
+        queue = RedisOfflineQueue(port=broker.port, max_messages=3, ttl=60)
+        try:
+            await self.check_queue(queue)
+            await queue.push(1, [{"id": 1}])
+            with mock.patch("NotifyMe.utils.offline_queue.time.time", return_value=time.time() + 61):
+                self.assertEqual(await queue.drain(1), [])
+        finally:
+            await queue._connections.close()
+            await broker.stop()
+
+    async def test_live_frames_wait_for_the_replay(self):
+        sent = []
+
+        async def write(frame):
+            sent.append(json.loads(frame))
+
+        consumer = NotificationConsumer()
+        consumer.held_frames = []
+        consumer.codec = negotiate([JSON_SUBPROTOCOL])
+        consumer.user = mock.Mock(id=1)
+        consumer.send_buffer = SendBuffer(write, None)
+        consumer.send_buffer.start()
+        consumer.offline_queue = InMemoryOfflineQueue()
+        await consumer.offline_queue.push(1, [{"id": 1, "message": "missed", "notification_type": None}])
+        drain = consumer.offline_queue.drain
+
+        async def drain_while_live_frame_arrives(user_id):
+            missed = await drain(user_id)
+            await consumer.send_notification({"id": 2, "message": "live", "notification_type": None})
+            return missed
+
+        consumer.offline_queue.drain = drain_while_live_frame_arrives
+        await consumer.replay_missed_notifications()
+        await consumer.send_notification({"id": 3, "message": "later", "notification_type": None})
+        await asyncio.sleep(0.01)
+        await consumer.send_buffer.stop()
+        self.assertEqual(sent, [{"batch": [{"id": 1, "type": None, "payload": "missed"}]},
+                                {"id": 2, "type": None, "payload": "live"},
+                                {"id": 3, "type": None, "payload": "later"}])
+
+    async def test_failed_replay_releases_held_frames(self):
+        sent = []
+
+        async def write(frame):
+            sent.append(json.loads(frame))
+
+        consumer = NotificationConsumer()
+        consumer.held_frames = []
+        consumer.codec = negotiate([JSON_SUBPROTOCOL])
+        consumer.user = mock.Mock(id=1)
+        consumer.send_buffer = SendBuffer(write, None)
+        consumer.send_buffer.start()
+        consumer.offline_queue = mock.Mock()
+
+        async def drain_fails_after_a_live_frame(user_id):
+            await consumer.send_notification({"id": 2, "message": "live", "notification_type": None})
+            raise ConnectionError("broker went away")
+
+        consumer.offline_queue.drain = drain_fails_after_a_live_frame
+        with self.assertLogs("NotifyMe.consumers", level="WARNING"):
+            await consumer.replay_missed_notifications()
+        self.assertIsNone(consumer.held_frames)
+        await consumer.send_notification({"id": 3, "message": "later", "notification_type": None})
+        await asyncio.sleep(0.01)
+        await consumer.send_buffer.stop()
+        self.assertEqual(sent, [{"id": 2, "type": None, "payload": "live"},
+                                {"id": 3, "type": None, "payload": "later"}])
+
+
+class PresenceTests(SimpleTestCase):
+    """
+    The presence index tracks live channels, and the publish path skips users without any.
+    """
+
+    async def test_redis_index_tracks_live_channels_per_user_and_plan(self):
+        broker = await LocalBroker(port=0).start()
+        index = RedisPresenceIndex(port=broker.port)
+        try:
+            await index.add(1, 10, "channel-a")
+            await index.add(1, 10, "channel-b")
+            await index.add(2, 11, "channel-c")
+            await index.remove(1, 10, "channel-a")
+            self.assertEqual(await index.channels(1), ["channel-b"])
+            self.assertEqual(await index.online([1, 2, 3]), {1, 2})
+            self.assertEqual(await index.counts_by_plan([10, 11, 12]), {10: 1, 11: 1, 12: 0})
+        finally:
+            await broker.stop()
+
+    async def test_offline_users_go_to_the_offline_queue_without_a_group_send(self):
+        sent = []
+
+        class RecordingLayer:
+            async def group_send(self, group, event):
+                sent.append(group)
+
+        offline_queue = InMemoryOfflineQueue()
+        presence = InMemoryPresenceIndex()
+        await presence.add(1, 10, "channel-a")
+        # A channel whose heartbeats stopped no longer counts
+        await presence.add(3, 10, "channel-stale")
+        presence._channels["channel-stale"] = (3, 10, 0)
+        manager = NotificationManager(channel_layer=RecordingLayer(), offline_queue=offline_queue, presence=presence, pre_encode=False)
+        for user_id in (1, 2, 3):
+            manager._enqueue(user_group_name(user_id), f"hello {user_id}", None, user_id=user_id)
+        await manager.aflush()
+
+        self.assertEqual(sent, [user_group_name(1)])
+        self.assertEqual([n["message"] for n in await offline_queue.drain(2)], ["hello 2"])
+        self.assertEqual([n["message"] for n in await offline_queue.drain(3)], ["hello 3"])
+        self.assertEqual(await presence.counts_by_plan([10]), {10: 1})
+
+
+class QueueLoggingTests(SimpleTestCase):
+    """
+    Records reach the handlers through the listener thread, truncated and with success logs sampled.
+    """
+
+    def test_queue_logging_truncates_and_samples(self):
+        records = []
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                records.append(record.getMessage())
+
+        handler = ListHandler()
+        handler.addFilter(TruncateFilter(max_length=10))
+        handler.addFilter(SuccessSampleFilter(rate=0))
+        test_logger = logging.getLogger("NotifyMe.tests.queue_logging")
+        test_logger.propagate = False
+        test_logger.addHandler(handler)
+        listener = install_queue_logging(test_logger.name)
+        try:
+            test_logger.warning("x" * 25)
+            test_logger.info("sampled out", extra={"success": True})
+            test_logger.info("kept")
+        finally:
+            listener.stop()
+            atexit.unregister(listener.stop)
+            test_logger.handlers.clear()
+        self.assertEqual(records, ["x" * 10 + "... [15 characters truncated]", "kept"])
+
+
+class ExceptionHandlerTests(TestCase):
+    """
+    Errors raised by views are logged once and rendered by the central exception handler.
+    """
+
+    def test_missing_user_is_reported_once_as_not_found(self):
+        with self.assertLogs(level="WARNING") as logs:
+            response = APIClient().delete("/api/user", {"id": 12345}, format="json")
+        self.assertEqual(response.data, {"message": "User Not Found", "status": 404})
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("UserAPI", logs.output[0])
+
+    def test_server_errors_are_logged_with_their_cause(self):
+        cause = DatabaseError("connection lost")
+        with mock.patch.object(UserService, "get_users_page", side_effect=NotifyMeException(
+                message="Database error", status_code=153, e=cause)):
+            with self.assertLogs(level="WARNING") as logs:
+                response = APIClient().get("/api/user")
+        self.assertEqual(response.data["status"], 500)
+        self.assertEqual(logs.records[0].levelno, logging.ERROR)
+        self.assertIs(logs.records[0].exc_info[1], cause)
+
+
+class SubscriptionExpiryTests(TestCase):
+    """
+    Reminders and expiry notices go out once, only for subscriptions inside their window.
+    """
+
+    def test_reminders_and_notices_are_sent_once(self):
+        now = timezone.now()
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        subscriptions = {}
+        for name, days in (("soon", 2), ("later", 10), ("ended", -1), ("history", -400)):
+            user = User.objects.create(email_id=f"{name}@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+            subscriptions[name] = Subscription.objects.create(user_id=user, subscription_plan=plan, end_date=now + timedelta(days=days))
+
+        with in_memory_layers():
+            service = SubscriptionExpiryService(chunk_pause=0)
+            self.assertEqual(service.run(now), {"reminders": 1, "expired": 1})
+            self.assertEqual(service.run(now), {"reminders": 0, "expired": 0})
+            # Both users are offline, so their notices wait in the offline queue
+            queue = get_offline_queue()
+            reminder, = async_to_sync(queue.drain)(subscriptions["soon"].user_id_id)
+            notice, = async_to_sync(queue.drain)(subscriptions["ended"].user_id_id)
+
+        # The notices are stored too, so they show up in the inbox after the queue is gone
+        stored = Notification.objects.get(user=subscriptions["soon"].user_id)
+        self.assertEqual((stored.id, stored.message), (reminder["id"], reminder["message"]))
+        self.assertEqual(User.objects.get(id=subscriptions["ended"].user_id_id).unread_notifications, 1)
+        self.assertEqual(Notification.objects.count(), 2)
+        reminder_type = NotificationType.objects.get(notification_type=SubscriptionExpiry.REMINDER_NOTIFICATION.value)
+        self.assertEqual(reminder["notification_type"], reminder_type.id)
+        self.assertEqual(reminder_type.priority, NotificationPriority.HIGH.value)
+        self.assertEqual(notice["notification_type"],
+                         NotificationType.objects.get(notification_type=SubscriptionExpiry.EXPIRED_NOTIFICATION.value).id)
+        marked = {name: Subscription.objects.get(id=subscription.id) for name, subscription in subscriptions.items()}
+        self.assertEqual(marked["soon"].reminder_sent_at, now)
+        self.assertEqual(marked["ended"].expired_notified_at, now)
+        self.assertIsNone(marked["later"].reminder_sent_at)
+        self.assertIsNone(marked["history"].expired_notified_at)
+
+    def test_notice_markers_are_not_client_writable(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        user = User.objects.create(email_id="marker@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        subscription = Subscription.objects.create(user_id=user, subscription_plan=plan, end_date=timezone.now())
+        sent_at = timezone.now() - timedelta(days=1)
+        Subscription.objects.filter(id=subscription.id).update(reminder_sent_at=sent_at)
+
+        response = APIClient().patch("/api/subscription", {"id": subscription.id, "reminder_sent_at": None,
+                                                           "expired_notified_at": timezone.now().isoformat()}, format="json")
+        self.assertEqual(response.data["status"], 200)
+        subscription.refresh_from_db()
+        self.assertEqual((subscription.reminder_sent_at, subscription.expired_notified_at), (sent_at, None))
+
+    def test_scheduler_refuses_the_in_memory_channel_layer(self):
+        with mock.patch.dict(os.environ, {"CHANNEL_LAYER": ""}):
+            with self.assertRaisesMessage(CommandError, "CHANNEL_LAYER=redis"):
+                call_command("run_expiry_scheduler", "--once")
+
+
+class SoftDeletePurgeTests(TestCase):
+    """
+    Only rows soft-deleted before the retention cutoff are hard-deleted.
+    """
+
+    def test_purge_removes_old_soft_deleted_rows_in_chunks(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        users = [User.objects.create(email_id=f"purge-{i}@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+                 for i in range(5)]
+        for user in users[:4]:
+            user.delete()
+        # Three users were soft-deleted long ago, one just now, one is live
+        User.deleted_objects.filter(id__in=[user.id for user in users[:3]]).update(deleted=timezone.now() - timedelta(days=40))
+
+        purged = SoftDeletePurgeService(retention_days=30, chunk_size=2, chunk_pause=0).purge()
+        self.assertEqual(purged["User"], 3)
+        self.assertEqual(list(User.all_objects.order_by("id").values_list("id", flat=True)), [users[3].id, users[4].id])
+        self.assertEqual(list(User.objects.values_list("id", flat=True)), [users[4].id])
+
+
+class BulkUserDeleteTests(TestCase):
+    """
+    Deleting many users cascades to their subscriptions and notifications with one UPDATE per table.
+    """
+
+    def test_bulk_delete_cascades_with_set_based_updates(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        users = [User.objects.create(email_id=f"bulk-{i}@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+                 for i in range(4)]
+        for user in users:
+            Subscription.objects.create(user_id=user, subscription_plan=plan)
+        ids = [user.id for user in users[:3]] + [999999]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().delete("/api/user", {"ids": ids}, format="json")
+        self.assertEqual(response.data["data"], {"deleted": 3, "subscriptions": 3, "notifications": 0, "not_found": [999999]})
+        self.assertEqual(sum(query["sql"].startswith("UPDATE") for query in queries), 3)
+        self.assertEqual(list(User.objects.values_list("id", flat=True)), [users[3].id])
+        self.assertEqual(Subscription.deleted_objects.filter(deleted_by_cascade=True).count(), 3)
+
+
+class NotificationAPITests(TestCase):
+    """
+    The notification endpoint accepts one notification, a list or {"notifications": [...]} and rejects anything else.
+    """
+
+    def test_valid_and_invalid_bodies(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        notification_type = NotificationType.objects.create(notification_type="INFO")
+        user = User.objects.create(email_id="api@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        notification = {"title": "Hi", "message": "one", "recipient": user.email_id, "notification_type": notification_type.id}
+        client = APIClient()
+
+        with in_memory_layers():
+            for body, count in ((notification, 1), ([notification, {**notification, "recipient": None}], 2),
+                                ({"notifications": [notification] * 3}, 3)):
+                response = client.post("/api/notification", body, format="json")
+                self.assertEqual(response.data["status"], 201, body)
+                self.assertEqual(response.data["data"], {"count": count})
+            for body in (5, "x", [], {"notifications": 5}, [{"title": "Hi"}]):
+                response = client.post("/api/notification", body, format="json")
+                self.assertEqual(response.data["status"], 400, body)
+
+        self.assertEqual(Notification.objects.count(), 6)
+        self.assertEqual(Notification.objects.filter(user=user).count(), 5)
+        user.refresh_from_db()
+        self.assertEqual(user.unread_notifications, 5)
+
+
+class NotificationInboxTests(TestCase):
+    """
+    The inbox reads the cached unread counter and pages by cursor over the user's notifications.
+    """
+
+    def test_inbox_recent_and_since_cursor(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        notification_type = NotificationType.objects.create(notification_type="INFO")
+        user = User.objects.create(email_id="inbox@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        service = NotificationService()
+        service.create_notifications([{"title": "Hi", "message": f"m{i}", "recipient": user.email_id, "notification_type": notification_type}
+                                      for i in range(3)])
+        service.create_notifications([{"title": "Hi", "message": "all", "notification_type": notification_type}])
+
+        client = APIClient()
+        response = client.get("/api/notification/inbox", {"token": make_socket_token(user.id), "limit": 2})
+        inbox = response.data["data"]
+        self.assertEqual(inbox["unread"], 3)
+        self.assertTrue(inbox["has_more"])
+        self.assertEqual(len(inbox["notifications"]), 2)
+
+        newest = Notification.objects.filter(user=user).order_by("-id").first()
+        service.record_acks({("read", user.id): {newest.id}})
+        service.create_notifications([{"title": "Hi", "message": "new", "recipient": user.email_id, "notification_type": notification_type}])
+        with self.assertNumQueries(2):
+            response = client.get("/api/notification/inbox", {"token": make_socket_token(user.id), "since": inbox["cursor"]})
+        inbox = response.data["data"]
+        self.assertEqual(inbox["unread"], 3)
+        self.assertEqual([notification["message"] for notification in inbox["notifications"]], ["new"])
+        self.assertFalse(inbox["has_more"])
+
+        response = client.get("/api/notification/inbox", {"token": make_socket_token(user.id), "since": "not-a-cursor"})
+        self.assertEqual(response.data["status"], 400)
+
+    def test_backfill_and_soft_delete_keep_unread_counts(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        notification_type = NotificationType.objects.create(notification_type="INFO")
+        user = User.objects.create(email_id="legacy@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        # Rows written before Notification.user existed
+        legacy = [Notification.objects.create(title="Hi", message=f"m{i}", recipient=user.email_id, notification_type=notification_type,
+                                              read_at=timezone.now() if i == 0 else None) for i in range(3)]
+        Notification.objects.create(title="Hi", message="stranger", recipient="nobody@example.com", notification_type=notification_type)
+
+        output = io.StringIO()
+        call_command("backfill_inbox", "--chunk-size", "2", stdout=output)
+        self.assertEqual(json.loads(output.getvalue()), {"linked": 3, "users": 1})
+        user.refresh_from_db()
+        self.assertEqual(user.unread_notifications, 2)
+        self.assertEqual(Notification.objects.filter(user=user).count(), 3)
+
+        legacy[1].refresh_from_db()
+        legacy[1].delete()
+        user.refresh_from_db()
+        self.assertEqual(user.unread_notifications, 1)
+        Notification.all_objects.get(id=legacy[1].id).undelete()
+        user.refresh_from_db()
+        self.assertEqual(user.unread_notifications, 2)
+
+    def test_unread_counter_is_not_client_writable(self):
+        plan = SubscriptionPlan.objects.create(subscription_plan="BASIC")
+        user = User.objects.create(email_id="counter@example.com", first_name="First", last_name="Last", subscription_plan=plan)
+        User.objects.filter(id=user.id).update(unread_notifications=2)
+
+        response = APIClient().patch("/api/user", {"id": user.id, "first_name": "Renamed", "unread_notifications": 0}, format="json")
+        self.assertEqual(response.data["status"], 200)
+        user.refresh_from_db()
+        self.assertEqual((user.first_name, user.unread_notifications), ("Renamed", 2))
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from collections import defaultdict
+from NotifyMe.constants import AckBuffering
+from NotifyMe.services.service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+class AckBuffer:
+    """
+    Collects ack/read frames from every socket of the process and writes them in batches.
+
+    Acks are flushed `flush_interval` seconds after the first pending one, or at once when
+    `max_pending` ids are waiting, so a burst of client frames costs a couple of UPDATEs
+    instead of one write per frame.
+
+    Delivery and read receipts are best-effort: acks whose write fails are put back and
+    retried with the next flushes, up to `max_flush_attempts` writes in a row, then
+    dropped. Acks still pending when the process dies are lost too. Either only leaves
+    those notifications looking undelivered or unread.
+    """
+
+    def __init__(self, notification_service=None, max_pending=AckBuffering.MAX_PENDING.value,
+                 flush_interval=AckBuffering.FLUSH_INTERVAL_SECONDS.value,
+                 max_flush_attempts=AckBuffering.MAX_FLUSH_ATTEMPTS.value):
+        self.notification_service = notification_service or NotificationService()
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.max_flush_attempts = max_flush_attempts
+        self._pending = defaultdict(set)
+        self._pending_count = 0
+        self._failed_flushes = 0
+        self._timer = None
+
+    async def add(self, kind, user_id, notification_ids):
+        """
+        Buffer acknowledgements of one user.
+
+        Args:
+            kind (str): ACK_DELIVERED or ACK_READ.
+            user_id (int): Id of the acknowledging user.
+            notification_ids (iterable): Ids of the acknowledged notifications.
+        """
+        self._merge(kind, user_id, notification_ids)
+        if self._pending_count >= self.max_pending:
+            await self.flush()
+        else:
+            self._schedule_flush()
+
+    def _merge(self, kind, user_id, notification_ids):
+        pending = self._pending[(kind, user_id)]
+        before = len(pending)
+        pending.update(notification_ids)
+        self._pending_count += len(pending) - before
+
+    def _schedule_flush(self):
+        if self._timer is None or self._timer.done() or self._timer.get_loop() is not asyncio.get_running_loop():
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Write every pending acknowledgement.
+
+        Returns:
+            int: The number of notifications updated.
+        """
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, defaultdict(set)
+        self._pending_count = 0
+        try:
+            updated = await self.notification_service.arecord_acks(pending)
+        except Exception as e:
+            count = sum(map(len, pending.values()))
+            self._failed_flushes += 1
+            if self._failed_flushes >= self.max_flush_attempts:
+                self._failed_flushes = 0
+                logger.error(f"Could not record {count} notification acks, dropping them. ERROR: {e}")
+                return 0
+            logger.warning(f"Could not record {count} notification acks, retrying. ERROR: {e}")
+            for (kind, user_id), notification_ids in pending.items():
+                self._merge(kind, user_id, notification_ids)
+            self._schedule_flush()
+            return 0
+        self._failed_flushes = 0
+        logger.debug(f"Recorded acks for {updated} notifications")
+        return updated
+
+
+_ack_buffer = None
+
+
+def get_ack_buffer():
+    """
+    Process-wide AckBuffer shared by every NotificationConsumer.
+    """
+    global _ack_buffer
+    if _ack_buffer is None:
+        _ack_buffer = AckBuffer()
+    return _ack_buffer
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from NotifyMe.constants import Backpressure, NotificationPriority
+
+logger = logging.getLogger(__name__)
+
+# Reasons a frame is not delivered, as counted by BackpressureMetrics
+DROP_LOW_PRIORITY = "low_priority"
+DROP_BUFFER_FULL = "buffer_full"
+DROP_EVICTED = "evicted"
+DROP_SLOW_CLIENT = "slow_client"
+
+
+class BackpressureMetrics:
+    """
+    Process-wide counters of frames dropped per reason and of slow clients disconnected.
+    """
+
+    def __init__(self):
+        self.dropped = Counter()
+        self.disconnected = 0
+
+    def record_drop(self, reason, frames=1):
+        self.dropped[reason] += frames
+
+    def record_disconnect(self):
+        self.disconnected += 1
+
+    def snapshot(self):
+        return {"dropped": dict(self.dropped), "slow_clients_disconnected": self.disconnected}
+
+    def reset(self):
+        self.dropped = Counter()
+        self.disconnected = 0
+
+
+metrics = BackpressureMetrics()
+
+
+class SendBuffer:
+    """
+    Bounded outgoing queue of one WebSocket connection, drained by a single writer task.
+
+    Consumer handlers push frames and return at once, so a slow client never stalls the
+    channel layer. Once `high_water` frames are waiting, low-priority frames are dropped;
+    at `max_frames`, normal frames are dropped and high-priority frames evict the oldest
+    lower-priority frame. A client whose buffer stays full for `slow_client_timeout`
+    seconds, or that cannot take a high-priority frame, is disconnected.
+
+    Daphne never blocks `send`: it hands the frame to the transport's unbounded write
+    buffer. How far behind a client is therefore comes from its acks: once a client has
+    acked anything, the writer stops after `max_unacked` written notifications that are
+    still unacked, and frames wait here, where the limits above apply. Clients that never
+    ack get no backpressure; their frames pile up in the transport instead.
+    """
+
+    def __init__(self, send, on_slow_client, high_water=Backpressure.HIGH_WATER_FRAMES.value,
+                 max_frames=Backpressure.MAX_BUFFERED_FRAMES.value,
+                 slow_client_timeout=Backpressure.SLOW_CLIENT_TIMEOUT_SECONDS.value,
+                 max_unacked=Backpressure.MAX_UNACKED_NOTIFICATIONS.value):
+        self.send = send
+        self.on_slow_client = on_slow_client
+        self.high_water = high_water
+        self.max_frames = max_frames
+        self.slow_client_timeout = slow_client_timeout
+        self.max_unacked = max_unacked
+        self._frames = deque()
+        self._ready = asyncio.Event()
+        self._full_since = None
+        self._writer = None
+        # Ids written but not acked, tracked from the first ack the client sends
+        self._unacked = None
+        self._window_open = asyncio.Event()
+        self.closed = False
+
+    def __len__(self):
+        return len(self._frames)
+
+    def start(self):
+        self._writer = asyncio.get_running_loop().create_task(self._write_frames())
+
+    async def stop(self):
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+        self._frames.clear()
+
+    async def push(self, frame, priority=NotificationPriority.NORMAL.value, ids=()):
+        """
+        Queue a frame, applying the high-water marks.
+
+        Args:
+            frame: The encoded frame.
+            priority (int): NotificationPriority of the frame.
+            ids (iterable): Ids of the notifications the frame carries, which the client acks.
+
+        Returns:
+            bool: Whether the frame was queued.
+        """
+        if self.closed:
+            return False
+        waiting = len(self._frames)
+        if waiting >= self.max_frames:
+            return await self._push_when_full(frame, priority, ids)
+        if waiting >= self.high_water and priority <= NotificationPriority.LOW.value:
+            metrics.record_drop(DROP_LOW_PRIORITY)
+            return False
+        self._append(frame, priority, ids)
+        return True
+
+    def acknowledge(self, ids):
+        """
+        Record notifications acked by the client, which lets the writer go on.
+        """
+        if self._unacked is None:
+            self._unacked = set()
+        self._unacked.difference_update(ids)
+        if len(self._unacked) < self.max_unacked:
+            self._window_open.set()
+
+    async def _push_when_full(self, frame, priority, ids):
+        now = time.monotonic()
+        if self._full_since is None:
+            self._full_since = now
+        elif now - self._full_since > self.slow_client_timeout:
+            await self._disconnect_slow_client()
+            return False
+
+        if priority < NotificationPriority.HIGH.value:
+            metrics.record_drop(DROP_BUFFER_FULL)
+            return False
+        for index, (queued_priority, _, _) in enumerate(self._frames):
+            if queued_priority < NotificationPriority.HIGH.value:
+                del self._frames[index]
+                metrics.record_drop(DROP_EVICTED)
+                self._append(frame, priority, ids)
+                return True
+        # Nothing left to give up for a high-priority frame
+        await self._disconnect_slow_client()
+        return False
+
+    def _append(self, frame, priority, ids):
+        self._frames.append((priority, frame, ids))
+        self._ready.set()
+
+    async def _disconnect_slow_client(self):
+        self.closed = True
+        metrics.record_drop(DROP_SLOW_CLIENT, len(self._frames) + 1)
+        metrics.record_disconnect()
+        self._frames.clear()
+        await self.on_slow_client()
+
+    async def _write_frames(self):
+        while True:
+            while self._unacked is not None and len(self._unacked) >= self.max_unacked:
+                self._window_open.clear()
+                await self._window_open.wait()
+            while not self._frames:
+                self._ready.clear()
+                await self._ready.wait()
+            _, frame, ids = self._frames.popleft()
+            if len(self._frames) < self.max_frames:
+                self._full_since = None
+            try:
+                await self.send(frame)
+            except Exception as e:
+                logger.warning(f"Stopped writing to a closed connection. ERROR: {e}")
+                self.closed = True
+                return
+            if self._unacked is not None:
+                self._unacked.update(notification_id for notification_id in ids if notification_id is not None)
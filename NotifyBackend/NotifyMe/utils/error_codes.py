@@ -65,6 +65,14 @@ class ErrorCodes(Enum):
   HTTP_163_SUBSCRIPTION_DATA_NOT_GIVEN = 163
   HTTP_164_USER_PATCH = 164
   HTTP_165_SUBSCRIPTION_PATCH = 165
+  HTTP_169_NOTIFICATION_DATA_NOT_GIVEN = 169
+  HTTP_170_INTEGRITY_ERROR_WHILE_CREATING_NOTIFICATIONS = 170
+  HTTP_172_INVALID_PAGINATION_PARAMETERS = 172
+  HTTP_174_IMPORT_FILE_NOT_GIVEN = 174
+  HTTP_175_DUPLICATE_EMAIL_IN_IMPORT = 175
+  HTTP_176_INTEGRITY_ERROR_WHILE_IMPORTING_USER = 176
+  HTTP_178_INVALID_USER_IDS = 178
+  HTTP_181_INVALID_USER_TOKEN = 181
 
 class ErrorCodeMessages(Enum):
   
@@ -127,6 +135,14 @@ class ErrorCodeMessages(Enum):
   HTTP_166_USER_DELETE = "No data has been sent. Provide value to field. FIELD: id"
   HTTP_167_SUBSCRIPTION_DATA_DELETE = "No data has been sent. Provide value to field. FIELD: id"
   HTTP_168_SUBSCRIPTION_PLAN_DATA_NOT_GIVEN = "No data given. You have to provide value to field. FIELDS: subscription_plan"
+  HTTP_169_NOTIFICATION_DATA_NOT_GIVEN = "No valid data has been sent. Provide a list of notifications with fields. FIELDS: < title, message, notification_type >, Optional: < recipient >"
+  HTTP_170_INTEGRITY_ERROR_WHILE_CREATING_NOTIFICATIONS = "Integrity error while creating notifications"
+  HTTP_172_INVALID_PAGINATION_PARAMETERS = "Invalid pagination parameters. Use the next_cursor of the previous page and a positive limit"
+  HTTP_174_IMPORT_FILE_NOT_GIVEN = "No file has been sent. Upload a CSV or NDJSON file in field: file. Optional field: file_format < csv, ndjson >"
+  HTTP_175_DUPLICATE_EMAIL_IN_IMPORT = "A user with this email_id already exists or appears earlier in the file"
+  HTTP_176_INTEGRITY_ERROR_WHILE_IMPORTING_USER = "Integrity error while importing this user, the row was not saved"
+  HTTP_178_INVALID_USER_IDS = "Invalid data. Provide a list of user ids. FIELD: ids"
+  HTTP_181_INVALID_USER_TOKEN = "Missing, invalid or expired token. Provide the signed token issued for the user. FIELD: token"
   
 class SuccessCodes(Enum):
   HTTP_100_USER_FETCHED_SUCCESSFULLY = 100
@@ -140,6 +156,11 @@ class SuccessCodes(Enum):
   HTTP_130_SUBSCRIPTION_PLAN_FETCHED_SUCCESSFULLY = 130 #
   HTTP_137_SUBSCRIPTION_PLAN_DELETED_SUCCESSFULLY = 137 #
   HTTP_133_SUBSCRIPTION_PLAN_CREATED_SUCCESSFULLY = 133
+  HTTP_171_NOTIFICATIONS_CREATED_SUCCESSFULLY = 171
+  HTTP_173_USERS_IMPORTED = 173
+  HTTP_177_PRESENCE_FETCHED_SUCCESSFULLY = 177
+  HTTP_179_USERS_DELETED_SUCCESSFULLY = 179
+  HTTP_180_INBOX_FETCHED_SUCCESSFULLY = 180
   
   
 class SuccessCodeMessages(Enum):
@@ -154,4 +175,9 @@ class SuccessCodeMessages(Enum):
   HTTP_130_SUBSCRIPTION_PLAN_FETCHED_SUCCESSFULLY = "Subscription_plan fetched successfully"
   HTTP_133_SUBSCRIPTION_PLAN_CREATED_SUCCESSFULLY = "Subscription_plan created successfully"
   HTTP_137_SUBSCRIPTION_PLAN_DELETED_SUCCESSFULLY = "Subscription_plan deleted successfully"
+  HTTP_171_NOTIFICATIONS_CREATED_SUCCESSFULLY = "Notifications created successfully"
+  HTTP_173_USERS_IMPORTED = "Users imported. Rows listed in errors were skipped"
+  HTTP_177_PRESENCE_FETCHED_SUCCESSFULLY = "Live connection counts fetched successfully"
+  HTTP_179_USERS_DELETED_SUCCESSFULLY = "Users deleted successfully. Ids listed in not_found were not live users"
+  HTTP_180_INBOX_FETCHED_SUCCESSFULLY = "Inbox fetched successfully"
   
\ No newline at end of file
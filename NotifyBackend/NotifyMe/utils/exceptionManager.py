@@ -3,27 +3,37 @@
 import logging
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.views import exception_handler
 
 logger = logging.getLogger(__name__)
 
 
 class NotifyMeException(Exception):  # CUSTOM EXCEPTION
-    def __init__(self, message, status_code, e):
+    """
+    Error raised by services and views, rendered by notifyme_exception_handler.
+
+    Nothing is logged or formatted when it is raised: services re-raise it freely and
+    it is logged once, at the view boundary.
+
+    Args:
+        message (str): One of ErrorCodeMessages.
+        status_code (int): The matching ErrorCodes value.
+        e: The underlying exception or validation errors, if any.
+        http_status (int): Status reported in the response body, 500 by default.
+    """
+
+    def __init__(self, message, status_code, e=None, http_status=status.HTTP_500_INTERNAL_SERVER_ERROR):
+        super().__init__(message)
         self.message = message
-        self.e = e
         self.status_code = status_code
-        super().__init__(self.message)
-
-        self.return_message = {
-            "message": self.message,
-            "e": self.e,
-            "status": self.status_code
-        }
-        
-        logger.error(self.return_message)
+        self.e = e
+        self.http_status = http_status
 
     def __str__(self):
-        return self.return_message
+        return f"{self.status_code}: {self.message}"
+
+    def as_dict(self):
+        return {"message": self.message, "status": self.http_status}
 
     @staticmethod
     def handle_api_exception(message, status_code, e=None):
@@ -51,7 +61,7 @@ class NotifyMeException(Exception):  # CUSTOM EXCEPTION
         return Response(response_data)
 
     @staticmethod
-    def handle_success(message, status_code, data=None):
+    def handle_success(message, status_code, data=None, extra=None):
         """
         For sending success message...
         """
@@ -62,7 +72,37 @@ class NotifyMeException(Exception):  # CUSTOM EXCEPTION
         
         if data:
             response_data["data"] = data
+        if extra:
+            response_data.update(extra)
             
-        logger.info(response_data)
+        # Log a summary, the payload can be a whole page of users
+        summary = f"{len(data)} items" if isinstance(data, (list, tuple, dict)) else data
+        logger.info(f"MESSAGE: {message}, STATUS: {status_code}, DATA: {summary}", extra={"success": True})
         return Response(response_data)
 
+
+def notifyme_exception_handler(exc, context):
+    """
+    DRF EXCEPTION_HANDLER: the single place where errors raised by views are logged and rendered.
+
+    NotifyMeException is answered like handle_exception, and logged at WARNING when it is the
+    client's fault (4xx) or at ERROR with the traceback of its cause otherwise (database
+    errors and the like). DRF and Django HTTP errors go to DRF's default handler, and
+    anything else is answered with a 500 after logging its traceback.
+    """
+    view = context.get("view")
+    view_name = type(view).__name__ if view is not None else "unknown view"
+    if isinstance(exc, NotifyMeException):
+        # Lazy %-formatting: nothing is built when the level is disabled
+        if exc.http_status >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            logger.error("%s failed. CODE: %s, MESSAGE: %s, ERROR: %s", view_name, exc.status_code, exc.message, exc.e,
+                         exc_info=exc.e if isinstance(exc.e, BaseException) else exc)
+        else:
+            logger.warning("%s failed. CODE: %s, MESSAGE: %s, ERROR: %s", view_name, exc.status_code, exc.message, exc.e)
+        return Response(exc.as_dict())
+
+    response = exception_handler(exc, context)
+    if response is not None:
+        return response
+    logger.error("Unexpected error in %s", view_name, exc_info=exc)
+    return Response(f"UNEXPECTED_ERROR_IN_{view_name}. ERROR: {exc}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,63 @@
+import csv
+import json
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+
+
+def guess_format(filename):
+    """
+    Import format from a file name: .csv is CSV, anything else NDJSON.
+    """
+    return CSV if filename and filename.lower().endswith(".csv") else NDJSON
+
+
+def read_rows(stream, file_format):
+    """
+    Stream the rows of a CSV (with a header line) or NDJSON file.
+
+    Args:
+        stream (iterable): Lines of the file, as bytes or text.
+        file_format (str): CSV or NDJSON.
+
+    Yields:
+        tuple: (row_number, row, error) where row is a dict, or None with an
+        error message when the line could not be parsed.
+    """
+    lines = (line.decode("utf-8-sig") if isinstance(line, bytes) else line for line in stream)
+    if file_format == CSV:
+        yield from read_csv_rows(lines)
+        return
+
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, row, None
+
+
+def read_csv_rows(lines):
+    """
+    read_rows for CSV: a malformed record (e.g. a NUL byte) is reported as an error
+    on its row and the reader goes on with the next one.
+    """
+    reader = csv.DictReader(lines)
+    row_number = 0
+    while True:
+        row_number += 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield row_number, None, f"Invalid CSV: {e}"
+            continue
+        yield row_number, row, None
@@ -0,0 +1,65 @@
+import atexit
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+
+class TruncateFilter(logging.Filter):
+    """
+    Cut messages longer than `max_length` characters, so one large payload cannot flood the log files.
+    """
+
+    def __init__(self, max_length=2000):
+        super().__init__()
+        self.max_length = int(max_length)
+
+    def filter(self, record):
+        message = record.getMessage()
+        if len(message) > self.max_length:
+            record.msg = f"{message[:self.max_length]}... [{len(message) - self.max_length} characters truncated]"
+            record.args = ()
+        return True
+
+
+class SuccessSampleFilter(logging.Filter):
+    """
+    Keep a `rate` fraction (0 to 1) of the records logged with `extra={"success": True}`, and every other record.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if not getattr(record, "success", False) or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def install_queue_logging(logger_name=""):
+    """
+    Put the handlers of a configured logger behind a queue drained by a listener thread.
+
+    The logging call only enqueues the record; filters and file writes run on the listener
+    thread, and each handler still only receives the levels it is configured for.
+
+    Args:
+        logger_name (str): Logger whose handlers are moved, the root logger by default.
+
+    Returns:
+        QueueListener: The started listener, stopped at exit, or None if there was nothing to move.
+    """
+    target = logging.getLogger(logger_name)
+    handlers = list(target.handlers)
+    if not handlers or any(isinstance(handler, QueueHandler) for handler in handlers):
+        return None
+
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        target.removeHandler(handler)
+    target.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,99 @@
+import logging
+import time
+from collections import OrderedDict, deque
+from django.conf import settings
+from django.utils.module_loading import import_string
+from NotifyMe.layers.redis_layer import serialize, deserialize
+from NotifyMe.layers.resp import LoopConnections
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryOfflineQueue:
+    """
+    Per-user store of notifications published while the user had no open socket.
+
+    Each user keeps at most `max_messages` notifications (oldest dropped first),
+    each notification lives `ttl` seconds, and once more than `max_users` users
+    have pending notifications the least recently written user is evicted.
+    Whether a user has an open socket is answered by the presence index.
+    State is local to the process, so use RedisOfflineQueue with several workers.
+    """
+
+    def __init__(self, max_messages=100, ttl=86400, max_users=10000):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.max_users = max_users
+        self._pending = OrderedDict()
+
+    async def push(self, user_id, notifications):
+        expires_at = time.time() + self.ttl
+        pending = self._pending.pop(user_id, None) or deque(maxlen=self.max_messages)
+        pending.extend((expires_at, notification) for notification in notifications)
+        self._pending[user_id] = pending
+        while len(self._pending) > self.max_users:
+            evicted_user_id, _ = self._pending.popitem(last=False)
+            logger.warning(f"Offline queue full, evicted pending notifications of user {evicted_user_id}")
+
+    async def drain(self, user_id):
+        """
+        Remove and return the user's pending notifications, oldest first.
+        """
+        now = time.time()
+        pending = self._pending.pop(user_id, ())
+        return [notification for expires_at, notification in pending if expires_at >= now]
+
+
+class RedisOfflineQueue:
+    """
+    Offline queue kept in a Redis-compatible server and shared by every worker.
+
+    Each user's notifications are one list trimmed to `max_messages` whose key
+    expires `ttl` seconds after the last write; Redis' own eviction takes the
+    place of `max_users`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, prefix="notifyme", max_messages=100, ttl=86400, **kwargs):
+        self.prefix = prefix
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._connections = LoopConnections(host, port)
+
+    def _pending_key(self, user_id):
+        return f"{self.prefix}:offline:{user_id}"
+
+    async def push(self, user_id, notifications):
+        key = self._pending_key(user_id)
+        expires_at = time.time() + self.ttl
+        await self._connections.get().pipeline([
+            ("RPUSH", key, *(serialize([expires_at, notification]) for notification in notifications)),
+            ("LTRIM", key, -self.max_messages, -1),
+            ("EXPIRE", key, self.ttl),
+        ])
+
+    async def drain(self, user_id):
+        """
+        Remove and return the user's pending notifications, oldest first.
+        """
+        key = self._pending_key(user_id)
+        items, _ = await self._connections.get().pipeline([
+            ("LRANGE", key, 0, -1),
+            ("DEL", key),
+        ])
+        now = time.time()
+        return [notification for expires_at, notification in map(deserialize, items) if expires_at >= now]
+
+
+_offline_queue = None
+
+
+def get_offline_queue():
+    """
+    Process-wide offline queue built from the OFFLINE_QUEUE setting.
+    """
+    global _offline_queue
+    if _offline_queue is None:
+        config = getattr(settings, "OFFLINE_QUEUE", {})
+        backend = import_string(config.get("BACKEND", "NotifyMe.utils.offline_queue.InMemoryOfflineQueue"))
+        _offline_queue = backend(**config.get("CONFIG", {}))
+    return _offline_queue
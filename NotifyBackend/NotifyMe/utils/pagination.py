@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+
+
+def encode_cursor(instance):
+    """
+    Opaque cursor pointing just after `instance` in (created_at, id) order.
+    """
+    raw = json.dumps([instance.created_at.isoformat(), instance.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: The (created_at, id) pair of the last row of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_page(queryset, cursor, limit):
+    """
+    Fetch one page of `queryset` after `cursor` using (created_at, id) keyset pagination.
+
+    Unlike OFFSET, the cost of a page does not grow with how deep it is.
+
+    Returns:
+        tuple: The list of rows and the cursor of the next page (None on the last page).
+    """
+    rows = list(_after_cursor(queryset, cursor)[:limit + 1])
+    return _split_page(rows, limit)
+
+
+async def akeyset_page(queryset, cursor, limit):
+    """
+    Asynchronous keyset_page, for callers running on the event loop.
+    """
+    rows = [row async for row in _after_cursor(queryset, cursor)[:limit + 1]]
+    return _split_page(rows, limit)
+
+
+def _after_cursor(queryset, cursor):
+    queryset = queryset.order_by('created_at', 'id')
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=row_id))
+    return queryset
+
+
+def _split_page(rows, limit):
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
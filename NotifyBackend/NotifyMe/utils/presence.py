@@ -0,0 +1,170 @@
+import logging
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.utils.module_loading import import_string
+from NotifyMe.constants import Presence
+from NotifyMe.layers.resp import LoopConnections
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryPresenceIndex:
+    """
+    Index of the live WebSocket channels of every user and subscription plan.
+
+    Each channel is registered on connect and refreshed by heartbeats; a channel
+    that has not sent one for `ttl` seconds (its worker died without a disconnect)
+    no longer counts. State is local to the process, so use RedisPresenceIndex
+    with several workers.
+    """
+
+    def __init__(self, ttl=Presence.TTL_SECONDS.value):
+        self.ttl = ttl
+        self._channels = {}
+        self._by_user = defaultdict(set)
+        self._by_plan = defaultdict(set)
+
+    async def add(self, user_id, plan_id, channel_name):
+        self._channels[channel_name] = (user_id, plan_id, time.monotonic() + self.ttl)
+        self._by_user[user_id].add(channel_name)
+        self._by_plan[plan_id].add(channel_name)
+
+    async def heartbeat(self, user_id, plan_id, channel_name):
+        await self.add(user_id, plan_id, channel_name)
+
+    async def remove(self, user_id, plan_id, channel_name):
+        self._channels.pop(channel_name, None)
+        self._discard(self._by_user, user_id, channel_name)
+        self._discard(self._by_plan, plan_id, channel_name)
+
+    @staticmethod
+    def _discard(index, key, channel_name):
+        channels = index.get(key)
+        if channels is not None:
+            channels.discard(channel_name)
+            if not channels:
+                del index[key]
+
+    def _live(self, channel_names):
+        now = time.monotonic()
+        return [name for name in channel_names if name in self._channels and self._channels[name][2] > now]
+
+    async def channels(self, user_id):
+        """
+        Live channel names of one user.
+        """
+        return self._live(self._by_user.get(user_id, ()))
+
+    async def online(self, user_ids):
+        """
+        The users of `user_ids` with at least one live channel.
+        """
+        return {user_id for user_id in user_ids if self._live(self._by_user.get(user_id, ()))}
+
+    async def counts_by_plan(self, plan_ids):
+        """
+        Number of live channels per subscription plan.
+        """
+        return {plan_id: len(self._live(self._by_plan.get(plan_id, ()))) for plan_id in plan_ids}
+
+
+class RedisPresenceIndex:
+    """
+    Presence index kept in a Redis-compatible server and shared by every worker.
+
+    Every channel has a liveness key expiring `ttl` seconds after its last heartbeat,
+    and belongs to one set per user and one per plan. Set members whose liveness key
+    expired are ignored when reading and removed lazily.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, prefix="notifyme", ttl=Presence.TTL_SECONDS.value, **kwargs):
+        self.prefix = prefix
+        self.ttl = ttl
+        self._connections = LoopConnections(host, port)
+
+    def _live_key(self, channel_name):
+        return f"{self.prefix}:presence:live:{channel_name}"
+
+    def _user_key(self, user_id):
+        return f"{self.prefix}:presence:user:{user_id}"
+
+    def _plan_key(self, plan_id):
+        return f"{self.prefix}:presence:plan:{plan_id}"
+
+    async def add(self, user_id, plan_id, channel_name):
+        user_key, plan_key = self._user_key(user_id), self._plan_key(plan_id)
+        await self._connections.get().pipeline([
+            ("SET", self._live_key(channel_name), user_id, "EX", self.ttl),
+            ("SADD", user_key, channel_name),
+            ("EXPIRE", user_key, self.ttl),
+            ("SADD", plan_key, channel_name),
+            ("EXPIRE", plan_key, self.ttl),
+        ])
+
+    async def heartbeat(self, user_id, plan_id, channel_name):
+        await self.add(user_id, plan_id, channel_name)
+
+    async def remove(self, user_id, plan_id, channel_name):
+        await self._connections.get().pipeline([
+            ("DEL", self._live_key(channel_name)),
+            ("SREM", self._user_key(user_id), channel_name),
+            ("SREM", self._plan_key(plan_id), channel_name),
+        ])
+
+    async def _live_members(self, keys):
+        """
+        Live channel names of each set in `keys`, in two round-trips for any number of sets.
+        """
+        connection = self._connections.get()
+        members = [[name.decode() for name in names] for names in await connection.pipeline([("SMEMBERS", key) for key in keys])]
+        names = [name for names in members for name in names]
+        if not names:
+            return members
+        alive = dict(zip(names, await connection.execute("MGET", *map(self._live_key, names))))
+        stale = [("SREM", key, *(name for name in names if alive[name] is None))
+                 for key, names in zip(keys, members) if any(alive[name] is None for name in names)]
+        if stale:
+            await connection.pipeline(stale)
+        return [[name for name in names if alive[name] is not None] for names in members]
+
+    async def channels(self, user_id):
+        """
+        Live channel names of one user.
+        """
+        return (await self._live_members([self._user_key(user_id)]))[0]
+
+    async def online(self, user_ids):
+        """
+        The users of `user_ids` with at least one live channel.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        members = await self._live_members([self._user_key(user_id) for user_id in user_ids])
+        return {user_id for user_id, names in zip(user_ids, members) if names}
+
+    async def counts_by_plan(self, plan_ids):
+        """
+        Number of live channels per subscription plan.
+        """
+        plan_ids = list(plan_ids)
+        if not plan_ids:
+            return {}
+        members = await self._live_members([self._plan_key(plan_id) for plan_id in plan_ids])
+        return {plan_id: len(names) for plan_id, names in zip(plan_ids, members)}
+
+
+_presence_index = None
+
+
+def get_presence_index():
+    """
+    Process-wide presence index built from the PRESENCE setting.
+    """
+    global _presence_index
+    if _presence_index is None:
+        config = getattr(settings, "PRESENCE", {})
+        backend = import_string(config.get("BACKEND", "NotifyMe.utils.presence.InMemoryPresenceIndex"))
+        _presence_index = backend(**config.get("CONFIG", {}))
+    return _presence_index
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from NotifyMe.models.notificationType import NotificationType
+from NotifyMe.models.subscriptionPlan import SubscriptionPlan
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceCache:
+    """
+    Process-local copy of a small, rarely changing reference table.
+
+    The whole table is loaded in one query and kept until its version changes.
+    Saving or deleting a row bumps the version through NotifyMe.signals; rows
+    changed by another process are picked up after `max_age` seconds, or at
+    once when a lookup misses.
+    """
+
+    def __init__(self, model, max_age=60):
+        self.model = model
+        self.max_age = max_age
+        self.version = 0
+        self._rows = None
+        self._loaded_version = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # DRF deep-copies serializer fields and their kwargs; the cache is shared process state
+        return self
+
+    def invalidate(self, **kwargs):
+        self.version += 1
+
+    def _is_stale(self, force=False):
+        return (force or self._rows is None or self._loaded_version != self.version
+                or time.monotonic() - self._loaded_at > self.max_age)
+
+    def _store(self, rows, version):
+        with self._lock:
+            self._rows, self._loaded_version, self._loaded_at = rows, version, time.monotonic()
+        logger.debug(f"Loaded {len(rows)} {self.model.__name__} rows into the reference cache")
+        return rows
+
+    def _load(self, force=False):
+        if not self._is_stale(force):
+            return self._rows
+        version = self.version
+        return self._store({row.pk: row for row in self.model.objects.all()}, version)
+
+    async def _aload(self, force=False):
+        if not self._is_stale(force):
+            return self._rows
+        version = self.version
+        return self._store({row.pk: row async for row in self.model.objects.all()}, version)
+
+    def _lookup(self, rows, pk):
+        row = rows.get(pk)
+        if row is None:
+            raise self.model.DoesNotExist(f"{self.model.__name__} matching pk={pk} does not exist.")
+        return row
+
+    def all(self):
+        """
+        Returns:
+            list: Every row of the table, ordered by primary key.
+        """
+        return sorted(self._load().values(), key=lambda row: row.pk)
+
+    async def aall(self):
+        return sorted((await self._aload()).values(), key=lambda row: row.pk)
+
+    def get(self, pk):
+        """
+        Returns:
+            Model: The row with the given primary key.
+
+        Raises:
+            DoesNotExist: If no row has this primary key.
+            ValueError: If the primary key is not an integer.
+        """
+        pk = int(pk)
+        rows = self._load()
+        if pk not in rows:
+            rows = self._load(force=True)
+        return self._lookup(rows, pk)
+
+    async def aget(self, pk):
+        """
+        Asynchronous get: a cache hit never leaves the event loop.
+        """
+        pk = int(pk)
+        rows = await self._aload()
+        if pk not in rows:
+            rows = await self._aload(force=True)
+        return self._lookup(rows, pk)
+
+
+subscription_plan_cache = ReferenceCache(SubscriptionPlan)
+notification_type_cache = ReferenceCache(NotificationType)
@@ -0,0 +1,31 @@
+from django.core import signing
+from NotifyMe.constants import SocketAuth
+
+
+def make_socket_token(user_id):
+    """
+    Signed token a client passes as `?token=` to open its notification WebSocket and
+    to read its notification inbox.
+
+    The REST API authenticates no one, so no endpoint issues these tokens: issue them
+    from code that has already authenticated the user (the login backend), or out of
+    band with `python manage.py issue_socket_token <user_id>`. Anyone holding the token
+    can read that user's notifications until it expires.
+
+    Args:
+        user_id (int): Id of the authenticated User.
+
+    Returns:
+        str: The token, signed with SECRET_KEY and timestamped.
+    """
+    return signing.dumps(int(user_id), salt=SocketAuth.TOKEN_SALT.value)
+
+
+def read_socket_token(token, max_age=SocketAuth.TOKEN_MAX_AGE_SECONDS.value):
+    """
+    The user id carried by a token made by make_socket_token.
+
+    Raises:
+        signing.BadSignature: If the token is forged, malformed or older than `max_age` seconds.
+    """
+    return int(signing.loads(token, salt=SocketAuth.TOKEN_SALT.value, max_age=max_age))
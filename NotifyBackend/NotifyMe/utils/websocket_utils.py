@@ -1,7 +1,265 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from NotifyMe.constants import ChannelGroups, BatchSize, NotificationPriority
+from NotifyMe.utils.offline_queue import get_offline_queue
+from NotifyMe.utils.presence import get_presence_index
+from NotifyMe.utils.wire import encode_for_all_codecs
+
+logger = logging.getLogger(__name__)
+
+
+def user_group_name(user_id):
+    """
+    Name of the channel group holding every socket of one user.
+    """
+    return ChannelGroups.USER.value.format(user_id)
+
+
+def plan_group_name(plan_id):
+    """
+    Name of the channel group holding every socket subscribed to one SubscriptionPlan.
+    """
+    return ChannelGroups.PLAN.value.format(plan_id)
+
+
+class GroupStats:
+    """
+    Throughput counters of one channel group.
+    """
+
+    def __init__(self):
+        self.messages = 0
+        self.batches = 0
+        self.first_sent_at = None
+        self.last_sent_at = None
+
+    def record(self, message_count):
+        now = time.monotonic()
+        if self.first_sent_at is None:
+            self.first_sent_at = now
+        self.last_sent_at = now
+        self.messages += message_count
+        self.batches += 1
+
+    def as_dict(self):
+        elapsed = time.monotonic() - self.first_sent_at if self.first_sent_at is not None else 0
+        return {
+            "messages": self.messages,
+            "batches": self.batches,
+            "messages_per_sec": self.messages / elapsed if elapsed > 0 else 0.0,
+        }
 
 
 class NotificationManager:
-  pass
+    """
+    Server-side API for pushing notifications to connected WebSocket clients.
+
+    Notifications are queued per target group and dispatched in batches: one
+    flush sends a single `send_notification_batch` event per group, and all
+    groups are sent concurrently on one event loop instead of paying an
+    async_to_sync round-trip for every message.
+
+    `send_to_user`, `send_to_plan` and `broadcast` deliver their notification
+    before returning. `publish_many` queues a whole batch and delivers it with
+    one flush at the end. `publish`/`apublish` only queue: nothing is sent until
+    the caller runs flush()/aflush() or `max_batch_size` notifications are
+    pending, and there is no background flush.
+
+    Every NotificationConsumer joins its user group, its plan group and the
+    broadcast group, so a notification only reaches the sockets it targets.
+    Notifications sent to a user with no live socket in the presence index go
+    straight to the offline queue, without a group send, and are replayed when
+    the user reconnects.
+
+    With `pre_encode` every batch sent to a plan or broadcast group is serialized
+    once per wire format before the group send, and consumers forward those frames
+    as they are, instead of each socket of the group serializing the same
+    notifications again. User groups hold one or a few sockets, so there encoding
+    every format would cost more than it saves; their sockets encode the batch in
+    their own format.
+    """
+
+    def __init__(self, channel_layer=None, max_batch_size=BatchSize.NOTIFICATIONS.value, offline_queue=None, pre_encode=True,
+                 presence=None):
+        self.channel_layer = channel_layer or get_channel_layer()
+        self.max_batch_size = max_batch_size
+        self.offline_queue = offline_queue
+        self.presence = presence
+        self.pre_encode = pre_encode
+        # Separate queue per NotificationPriority: priority -> group name -> notifications
+        self._pending = defaultdict(lambda: defaultdict(list))
+        self._user_targets = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._stats = defaultdict(GroupStats)
+
+    def publish(self, group_name, message, notification_type=None, notification_id=None, priority=None):
+        """
+        Queue one notification for a channel group.
+
+        The queue is flushed automatically once `max_batch_size` notifications are pending;
+        callers flush() at the end of their batch, whatever its priority, so a batch of HIGH
+        notifications still costs one flush. Nothing else flushes it. `notification_id` is the Notification row the
+        message comes from, which clients send back in ack/read frames. `priority` is a
+        NotificationPriority value, NORMAL by default: higher priorities are sent first,
+        overtake the remaining batches of a lower class being dispatched, and are what a
+        slow client keeps longest.
+        """
+        if self._enqueue(group_name, message, notification_type, notification_id=notification_id, priority=priority):
+            self.flush()
+
+    async def apublish(self, group_name, message, notification_type=None, notification_id=None, priority=None):
+        """
+        Queue one notification for a channel group from asynchronous code.
+        """
+        if self._enqueue(group_name, message, notification_type, notification_id=notification_id, priority=priority):
+            await self.aflush()
+
+    def _enqueue(self, group_name, message, notification_type, user_id=None, notification_id=None, priority=None):
+        if priority is None:
+            priority = NotificationPriority.NORMAL.value
+        with self._lock:
+            if user_id is not None:
+                self._user_targets[group_name] = user_id
+            self._pending[priority][group_name].append({
+                "id": notification_id,
+                "message": message,
+                "notification_type": notification_type,
+                "priority": priority,
+            })
+            self._pending_count += 1
+            return self._pending_count >= self.max_batch_size
+
+    def publish_many(self, notifications):
+        """
+        Send many notifications with one flush at the end.
+
+        Args:
+            notifications (iterable): Dicts with `message`, either `group_name` or the
+                `user_id` of a single user, and optional `notification_type`,
+                `notification_id` and `priority`.
+        """
+        for notification in notifications:
+            user_id = notification.get("user_id")
+            group_name = user_group_name(user_id) if user_id is not None else notification["group_name"]
+            if self._enqueue(group_name, notification["message"], notification.get("notification_type"), user_id=user_id,
+                             notification_id=notification.get("notification_id"), priority=notification.get("priority")):
+                self.flush()
+        self.flush()
+
+    def send_to_user(self, user_id, message, notification_type=None, notification_id=None, priority=None):
+        self._enqueue(user_group_name(user_id), message, notification_type, user_id=user_id,
+                      notification_id=notification_id, priority=priority)
+        self.flush()
+
+    def send_to_plan(self, plan_id, message, notification_type=None, notification_id=None, priority=None):
+        self._enqueue(plan_group_name(plan_id), message, notification_type, notification_id=notification_id, priority=priority)
+        self.flush()
+
+    def broadcast(self, message, notification_type=None, notification_id=None, priority=None):
+        self._enqueue(ChannelGroups.BROADCAST.value, message, notification_type, notification_id=notification_id, priority=priority)
+        self.flush()
+
+    def flush(self):
+        """
+        Dispatch every pending notification from synchronous code.
+        """
+        async_to_sync(self.aflush)()
+
+    async def aflush(self):
+        """
+        Dispatch every pending notification from asynchronous code.
+
+        Priority classes are sent highest first, each class' groups concurrently.
+
+        Returns:
+            int: The number of notifications dispatched.
+        """
+        return await self._dispatch_pending()
+
+    def _take_pending(self, above=None):
+        """
+        Remove the pending queues, highest priority first, optionally only those above `above`.
+        """
+        with self._lock:
+            priorities = sorted((priority for priority in self._pending if above is None or priority > above), reverse=True)
+            taken = [(priority, self._pending.pop(priority)) for priority in priorities]
+            user_targets = dict(self._user_targets)
+            self._pending_count -= sum(len(notifications) for _, groups in taken for notifications in groups.values())
+            if not self._pending:
+                self._user_targets = {}
+        return taken, user_targets
+
+    async def _dispatch_pending(self, above=None):
+        taken, user_targets = self._take_pending(above)
+        offline = await self._offline_users(taken, user_targets)
+        dispatched = 0
+        for priority, groups in taken:
+            dispatched += sum(await asyncio.gather(*(
+                self._dispatch(group_name, notifications, priority, user_targets.get(group_name), offline)
+                for group_name, notifications in groups.items()
+            )))
+        return dispatched
+
+    async def _offline_users(self, taken, user_targets):
+        """
+        The targeted users without a live socket, resolved with one presence lookup per flush.
+        """
+        if self.offline_queue is None or self.presence is None:
+            return set()
+        user_ids = {user_targets[group_name] for _, groups in taken for group_name in groups if group_name in user_targets}
+        if not user_ids:
+            return set()
+        return user_ids - await self.presence.online(user_ids)
+
+    async def _dispatch(self, group_name, notifications, priority, user_id=None, offline=()):
+        if user_id in offline:
+            await self.offline_queue.push(user_id, notifications)
+            logger.debug(f"User {user_id} is offline, queued {len(notifications)} notifications")
+            return len(notifications)
+
+        overtaken = 0
+        for start in range(0, len(notifications), self.max_batch_size):
+            if priority < NotificationPriority.HIGH.value:
+                # Let notifications of a higher class queued meanwhile overtake a large campaign
+                overtaken += await self._dispatch_pending(above=priority)
+            batch = notifications[start:start + self.max_batch_size]
+            event = {"type": "send_notification_batch", "priority": priority, "ids": [notification["id"] for notification in batch]}
+            if self.pre_encode and user_id is None:
+                event["frames"] = encode_for_all_codecs(batch)
+            else:
+                event["notifications"] = batch
+            await self.channel_layer.group_send(group_name, event)
+            self._stats[group_name].record(len(batch))
+        logger.debug(f"Dispatched {len(notifications)} notifications to group {group_name}")
+        return len(notifications) + overtaken
+
+    def stats(self):
+        """
+        Throughput counters per channel group.
+
+        Returns:
+            dict: Group name mapped to its messages, batches and messages_per_sec.
+        """
+        return {group_name: group_stats.as_dict() for group_name, group_stats in list(self._stats.items())}
+
+    def reset_stats(self):
+        self._stats = defaultdict(GroupStats)
+
+
+_notification_manager = None
+
 
+def get_notification_manager():
+    """
+    Process-wide NotificationManager bound to the default channel layer.
+    """
+    global _notification_manager
+    if _notification_manager is None:
+        _notification_manager = NotificationManager(offline_queue=get_offline_queue(), presence=get_presence_index())
+    return _notification_manager
@@ -0,0 +1,152 @@
+import json
+from NotifyMe.constants import BatchSize
+
+try:
+    import msgpack
+except ImportError:  # The binary subprotocol is only offered when msgpack is installed
+    msgpack = None
+
+# WebSocket subprotocols a client can request in Sec-WebSocket-Protocol, in our order of preference
+JSON_SUBPROTOCOL = "notifyme.json"
+MSGPACK_SUBPROTOCOL = "notifyme.msgpack"
+
+
+def batch_frames(codec, notifications):
+    """
+    Frames carrying a NotificationManager batch: batch frames of up to NOTIFICATIONS_PER_FRAME.
+    """
+    return [codec.encode_batch(chunk) for chunk in frame_chunks(notifications)]
+
+
+def frame_chunks(items):
+    """
+    Split a batch the way batch_frames does, so the items of each frame can be told apart.
+    """
+    size = BatchSize.NOTIFICATIONS_PER_FRAME.value
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class LegacyJSONCodec:
+    """
+    Frames sent to clients that request no subprotocol, unchanged for existing clients:
+    one text frame per notification, {"id", "message", "notification_type"}, and replayed
+    notifications as {"messages": [...]}.
+    """
+
+    subprotocol = None
+    key = "legacy"
+    frame_field = "text_data"
+
+    def encode_one(self, notification):
+        return json.dumps({
+            "id": notification.get("id"),
+            "message": notification["message"],
+            "notification_type": notification.get("notification_type"),
+        })
+
+    def encode_batch(self, notifications):
+        return json.dumps({"messages": notifications})
+
+    def encode_frames(self, notifications):
+        """
+        Frames carrying a NotificationManager batch: one per notification for legacy clients.
+        """
+        return [self.encode_one(notification) for notification in notifications]
+
+    def frame_ids(self, ids):
+        """
+        Notification ids carried by each frame of encode_frames, in the same order.
+        """
+        return [[notification_id] for notification_id in ids]
+
+    def decode(self, text_data=None, bytes_data=None):
+        return json.loads(text_data or bytes_data)
+
+
+class JSONCodec(LegacyJSONCodec):
+    """
+    notifyme.json: a notification is {"id", "type", "payload"} and a batch frame is
+    {"batch": [notification, ...]}.
+    """
+
+    subprotocol = key = JSON_SUBPROTOCOL
+
+    @staticmethod
+    def as_frame(notification):
+        return {"id": notification.get("id"), "type": notification.get("notification_type"), "payload": notification["message"]}
+
+    def encode_one(self, notification):
+        return json.dumps(self.as_frame(notification), separators=(",", ":"))
+
+    def encode_batch(self, notifications):
+        return json.dumps({"batch": [self.as_frame(notification) for notification in notifications]}, separators=(",", ":"))
+
+    def encode_frames(self, notifications):
+        return batch_frames(self, notifications)
+
+    def frame_ids(self, ids):
+        return frame_chunks(ids)
+
+
+class MsgpackCodec:
+    """
+    notifyme.msgpack: binary frames. A notification is the array [id, type, payload] and a
+    batch frame is an array of those arrays, so its first item is itself an array.
+    Client frames (acks) are msgpack maps, the same shape as their JSON form.
+    """
+
+    subprotocol = key = MSGPACK_SUBPROTOCOL
+    frame_field = "bytes_data"
+
+    @staticmethod
+    def as_frame(notification):
+        return [notification.get("id"), notification.get("notification_type"), notification["message"]]
+
+    def encode_one(self, notification):
+        return msgpack.packb(self.as_frame(notification))
+
+    def encode_batch(self, notifications):
+        return msgpack.packb([self.as_frame(notification) for notification in notifications])
+
+    def encode_frames(self, notifications):
+        return batch_frames(self, notifications)
+
+    def frame_ids(self, ids):
+        return frame_chunks(ids)
+
+    def decode(self, text_data=None, bytes_data=None):
+        if bytes_data is None:
+            return json.loads(text_data)
+        return msgpack.unpackb(bytes_data)
+
+
+CODECS = {codec.subprotocol: codec for codec in (JSONCodec(), LegacyJSONCodec())}
+if msgpack is not None:
+    CODECS[MSGPACK_SUBPROTOCOL] = MsgpackCodec()
+
+
+def encode_for_all_codecs(notifications):
+    """
+    Encode a batch once in every wire format, so every socket of a group send forwards
+    ready-made frames instead of serializing the same notifications again.
+
+    Returns:
+        dict: Codec key mapped to the list of frames of that codec.
+    """
+    return {codec.key: codec.encode_frames(notifications) for codec in CODECS.values()}
+
+
+def negotiate(requested):
+    """
+    Pick the codec for a connection from the subprotocols the client requested.
+
+    Args:
+        requested (list): Subprotocols from the handshake, in the client's order of preference.
+
+    Returns:
+        The codec of the first requested subprotocol we support, or the legacy JSON codec.
+    """
+    for subprotocol in requested or ():
+        if subprotocol in CODECS:
+            return CODECS[subprotocol]
+    return CODECS[None]
@@ -1,18 +1,25 @@
+import json
 import logging
+from asgiref.sync import sync_to_async
+from django.core import signing
 from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
 from rest_framework.response import Response
-from ..serializers import UserSerializer, SubscriptionSerializer, SubscriptionPlanSerializer
+from ..serializers import UserSerializer, SubscriptionSerializer, SubscriptionPlanSerializer, NotificationSerializer
 from NotifyMe.models.user import User
 from NotifyMe.models.subscription import Subscription
 from NotifyMe.models.subscriptionPlan import SubscriptionPlan
 from rest_framework import status 
 from rest_framework.views import APIView
-from NotifyMe.services.service import UserService, SubscriptionService, SubscriptionPlanService
+from NotifyMe.services.service import UserService, SubscriptionService, SubscriptionPlanService, NotificationService, PresenceService
 from NotifyMe.utils.exceptionManager import NotifyMeException, NotifyMeException, NotifyMeException
 from NotifyMe.utils.error_codes import ErrorCodes, ErrorCodeMessages
 from NotifyMe.utils.error_codes import SuccessCodes, SuccessCodeMessages
+from NotifyMe.constants import PageSize
+from NotifyMe.utils.importers import FORMATS, guess_format, read_rows
+from NotifyMe.utils.socket_auth import read_socket_token
 from rest_framework import status
 logger = logging.getLogger(__name__)
 
@@ -24,284 +31,303 @@ from rest_framework.response import Response
 from rest_framework import status
 
      
+
+# Errors raised here are logged and rendered by notifyme_exception_handler (REST_FRAMEWORK['EXCEPTION_HANDLER'])
+
 class UserAPI(APIView):
+    # Users read from the database per chunk of an NDJSON stream
+    stream_chunk_size = PageSize.STREAM_CHUNK.value
 
     def get(self, request):
         user_service = UserService()
+        logger.info("Fetching user data")
+        # ?stream=ndjson streams every user, one JSON object per line
+        if request.query_params.get('stream') == 'ndjson':
+            return StreamingHttpResponse(self.stream_users(user_service), content_type='application/x-ndjson')
+
         try:
-            logger.info("Fetching user data")
-            objects = user_service.get_all_users()
-            serializer = UserSerializer(objects, many=True)
-            return NotifyMeException.handle_success(
-                message=SuccessCodeMessages.HTTP_100_USER_FETCHED_SUCCESSFULLY.value,
-                data=serializer.data,
-                status_code=status.HTTP_200_OK
-            )
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(
-                message=e.message,
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-        except Exception as e:
-            logger.error(f"An Unexpected error occured while fetching users. ERROR: {e}")
-            return Response(f"A Unexpected error occured while fetching users from database. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            limit = int(request.query_params.get('limit', PageSize.DEFAULT.value))
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_172_INVALID_PAGINATION_PARAMETERS.value, status_code=status.HTTP_400_BAD_REQUEST)
+        objects, next_cursor = user_service.get_users_page(request.query_params.get('cursor'), min(limit, PageSize.MAX.value))
+        serializer = UserSerializer(objects, many=True)
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_100_USER_FETCHED_SUCCESSFULLY.value,
+            data=serializer.data,
+            status_code=status.HTTP_200_OK,
+            extra={"next_cursor": next_cursor}
+        )
         
+    async def stream_users(self, user_service):
+        # An async generator: under ASGI a sync one would be drained into a list before the first byte is sent
+        async for users in user_service.aiter_users(self.stream_chunk_size):
+            # The plan cache may need a (sync) reload while serializing
+            lines = await sync_to_async(self.serialize_lines)(users)
+            yield "".join(lines)
+
+    @staticmethod
+    def serialize_lines(users):
+        return [json.dumps(user) + "\n" for user in UserSerializer(users, many=True).data]
+
     def post(self, request):
+        logger.info("Creating a new user")
+        data = request.data.copy()
+        serializer = UserSerializer(data=data)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_162_USER_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
         try:
-            logger.info("Creating a new user")
-            data = request.data.copy()
-            serializer = UserSerializer(data=data)
-            if serializer.is_valid():
-                serializer.save()
-                logger.info("User created successfully")
-                return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_104_USER_CREATED_SUCCESSFULLY.value, status_code=status.HTTP_201_CREATED)
-            else:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_162_USER_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            serializer.save()
         except IntegrityError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_106_USER_ALREADY_EXISTS.value, status_code=status.HTTP_409_CONFLICT, e=e) 
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_106_USER_ALREADY_EXISTS.value,
+                                    status_code=ErrorCodes.HTTP_106_USER_ALREADY_EXISTS.value,
+                                    http_status=status.HTTP_409_CONFLICT,
+                                    e=e)
         except ValidationError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_103_VALIDATION_ERROR_WHILE_CREATING_USER.value, status_code=status.HTTP_400_BAD_REQUEST, e=e) 
-        except Exception as e:
-            logger.error(f"An Unexpected error occured while posting new user in the database. ERROR: {e}")
-            return Response(f"AN UNEXPECTED ERROR OCCURED WHILE POSTING NEW USER IN THE DATABASE. ERROR:{e}", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_103_VALIDATION_ERROR_WHILE_CREATING_USER.value,
+                                    status_code=ErrorCodes.HTTP_103_VALIDATION_ERROR_WHILE_CREATING_USER.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+        logger.info("User created successfully")
+        return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_104_USER_CREATED_SUCCESSFULLY.value, status_code=status.HTTP_201_CREATED)
     
     def put(self, request):
         user_service = UserService()
-        try:
-            logger.info("Updating a user")
-            data = request.data
-            if not data:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_162_USER_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
-            user = user_service.get_user_by_id(data)
-            serializer = UserSerializer(user, data=data)
-            if serializer.is_valid():
-                serializer.save()
-                return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_107_USER_UPDATED_SUCCESSFULLY.value, status_code=status.HTTP_200_OK)
-            else:
-                raise ValidationError(serializer.errors)
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except ValidationError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_140_VALIDATION_ERROR_WHILE_UPDATING_USER.value,  status_code=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            logger.error(f"An unexpected error occured while updating user. ERROR: {e}")
-            return Response(f"UNEXPECTED_ERROR_OCCURED_WHILE_UPDATING_USER. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        logger.info("Updating a user")
+        data = request.data
+        if not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_162_USER_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
+        user = user_service.get_user_by_id(data)
+        serializer = UserSerializer(user, data=data)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_140_VALIDATION_ERROR_WHILE_UPDATING_USER.value, status_code=status.HTTP_400_BAD_REQUEST, e=serializer.errors)
+        serializer.save()
+        return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_107_USER_UPDATED_SUCCESSFULLY.value, status_code=status.HTTP_200_OK)
     
     def patch(self, request):
         user_service = UserService()
-        try:
-            logger.info("Patching a user")
-            data = request.data
-            if not data:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_164_USER_PATCH.value, status_code=status.HTTP_400_BAD_REQUEST)
-            user = user_service.get_user_by_id(data)
-            serializer = UserSerializer(user, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_107_USER_UPDATED_SUCCESSFULLY.value, status_code=status.HTTP_200_OK)
-            else:
-                raise ValidationError(serializer.errors)        
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)   
-        except ValidationError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_140_VALIDATION_ERROR_WHILE_UPDATING_USER.value,  status_code=status.HTTP_400_BAD_REQUEST, e=e)
-        except Exception as e:
-            logger.error(f"Un-expected error occured while updating user. ERROR: {e}")
-            return Response(f"UNEXPECTED_ERROR_OCCURED_WHILE_UPDATING_USER. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+        logger.info("Patching a user")
+        data = request.data
+        if not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_164_USER_PATCH.value, status_code=status.HTTP_400_BAD_REQUEST)
+        user = user_service.get_user_by_id(data)
+        serializer = UserSerializer(user, data=data, partial=True)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_140_VALIDATION_ERROR_WHILE_UPDATING_USER.value, status_code=status.HTTP_400_BAD_REQUEST, e=serializer.errors)
+        serializer.save()
+        return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_107_USER_UPDATED_SUCCESSFULLY.value, status_code=status.HTTP_200_OK)
     
     def delete(self, request):
         user_service = UserService()
+        data = request.data
+        if not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_166_USER_DELETE.value, status_code=status.HTTP_400_BAD_REQUEST)
+        # {"ids": [...]} deletes many users at once
+        if 'ids' in data:
+            return self.delete_many(user_service, data['ids'])
+        logger.info("Deleting a user")
+        user = user_service.get_user_by_id(data)
+        user.delete()
+        return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_113_USER_DELETED_SUCCESSFULLY.value, status_code=status.HTTP_204_NO_CONTENT)      
+
+    def delete_many(self, user_service, user_ids):
         try:
-            logger.info("Deleting a user")
-            data = request.data
-            if not data:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_166_USER_DELETE.value, status_code=status.HTTP_400_BAD_REQUEST)
-            user = user_service.get_user_by_id(data)
-            user.delete()
-            return NotifyMeException.handle_success(message=SuccessCodeMessages.HTTP_113_USER_DELETED_SUCCESSFULLY.value, status_code=status.HTTP_204_NO_CONTENT)      
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            logger.error(f"Unexpected error occured while deleting user. ERROR: {e}")
-            return Response(f"UNEXPECTED_ERROR_OCCURED_WHILE_DELETING_USER. ERROR: {e}",status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+            if not isinstance(user_ids, list) or not user_ids:
+                raise ValueError(user_ids)
+            user_ids = [int(user_id) for user_id in user_ids]
+        except (TypeError, ValueError):
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_178_INVALID_USER_IDS.value, status_code=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Deleting {len(user_ids)} users")
+        report = user_service.delete_users(user_ids)
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_179_USERS_DELETED_SUCCESSFULLY.value,
+            data=report,
+            status_code=status.HTTP_200_OK)
+ 
  
+class UserImportAPI(APIView):
+    def post(self, request):
+        user_service = UserService()
+        upload = request.FILES.get('file')
+        if upload is None:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_174_IMPORT_FILE_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('file_format') or guess_format(upload.name)
+        if file_format not in FORMATS:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_174_IMPORT_FILE_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Importing users from {upload.name} ({file_format})")
+        report = user_service.import_users(read_rows(upload, file_format))
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_173_USERS_IMPORTED.value,
+            data=report,
+            status_code=status.HTTP_201_CREATED)
+
+
 #----------SUBSCRIPTION-API----------------      
     
 class SubscriptionAPI(APIView):
     def get(self, request):
         subscription_service = SubscriptionService()
-        try:
-            logger.info("Fetching Subscriptions data")
-            objects = subscription_service.get_all_subscriptions()
-            serializer = SubscriptionSerializer(objects, many=True)
-            return NotifyMeException.handle_success(
-                message=SuccessCodeMessages.HTTP_116_SUBSCRIPTION_DATA_FETCHED_SUCCESSFULLY.value, data=serializer.data, status_code=status.HTTP_200_OK)
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            logger.error(f"An unexpected error occured while fetching Subscription. ERROR: {e}")
-            return Response(f"UNEXPECTED_ERROR_WHILE_FETCHING_SUBSCRIPTION_DATA. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+        logger.info("Fetching Subscriptions data")
+        objects = subscription_service.get_all_subscriptions()
+        serializer = SubscriptionSerializer(objects, many=True)
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_116_SUBSCRIPTION_DATA_FETCHED_SUCCESSFULLY.value, data=serializer.data, status_code=status.HTTP_200_OK)
 
     def post(self, request):
+        logger.info("Creating new Subscription")
+        data = request.data
+        serializer = SubscriptionSerializer(data=data)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_163_SUBSCRIPTION_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)  
         try:
-            logger.info("Creating new Subscription")
-            data = request.data
-            serializer = SubscriptionSerializer(data=data)
-            if serializer.is_valid():
-                serializer.save()
-                return NotifyMeException.handle_success(
-                    message=SuccessCodeMessages.HTTP_119_SUBSCRIPTION_DATA_CREATED_SUCCESSFULLY.value, status_code=status.HTTP_201_CREATED)
-            else:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_163_SUBSCRIPTION_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)  
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except ValidationError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_140_VALIDATION_ERROR_WHILE_UPDATING_USER.value,  status_code=status.HTTP_400_BAD_REQUEST, e=e)
+            serializer.save()
         except IntegrityError as e:
-            return NotifyMeException.handle_api_exception(
-                message=ErrorCodeMessages.HTTP_120_SUBSCRIPTION_DATA_ALREADY_EXISTS.value, status_code=status.HTTP_409_CONFLICT, e=e)
-        except Exception as e:
-            logger.error(f"Unexpected error while creating Subscription data. ERROR: {e}")
-            return Response(f" AN UNEXPECTED_ERROR_WHILE_CREATING_SUBSCRIPTION_DATA. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_120_SUBSCRIPTION_DATA_ALREADY_EXISTS.value,
+                                    status_code=ErrorCodes.HTTP_120_SUBSCRIPTION_DATA_ALREADY_EXISTS.value,
+                                    http_status=status.HTTP_409_CONFLICT,
+                                    e=e)
+        except ValidationError as e:
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_140_VALIDATION_ERROR_WHILE_UPDATING_USER.value,
+                                    status_code=ErrorCodes.HTTP_140_VALIDATION_ERROR_WHILE_UPDATING_USER.value,
+                                    http_status=status.HTTP_400_BAD_REQUEST,
+                                    e=e)
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_119_SUBSCRIPTION_DATA_CREATED_SUCCESSFULLY.value, status_code=status.HTTP_201_CREATED)
 
     def put(self, request):
         subscription_service = SubscriptionService()
-        try:
-            data = request.data
-            if not data:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_163_SUBSCRIPTION_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST) 
-            subscription = subscription_service.get_subscription_by_id(data)
-            serializer = SubscriptionSerializer(subscription, data=data)
-            if serializer.is_valid():
-                serializer.save()
-                return NotifyMeException.handle_success(
-                    message=SuccessCodeMessages.HTTP_123_SUBSCRIPTION_DATA_UPDATED_SUCCESSFULLY.value,
-                    status_code=status.HTTP_200_OK)
-            else:
-                raise ValidationError(serializer.errors)
-        except ValidationError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_121_VALIDATION_ERROR_WHILE_CREATING_SUBSCRIPTION_DATA.value,  status_code=status.HTTP_400_BAD_REQUEST)
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message,
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            logger.error(f"Unexpected Error occured while updating Subscription data. ERROR: {e}")
-            return Response(f"UNEXPECTED_ERROR_WHILE_UPDATING_SUBSCRIPTION_DATA. ERROR: {e}",  status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        data = request.data
+        if not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_163_SUBSCRIPTION_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST) 
+        subscription = subscription_service.get_subscription_by_id(data)
+        serializer = SubscriptionSerializer(subscription, data=data)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_121_VALIDATION_ERROR_WHILE_CREATING_SUBSCRIPTION_DATA.value, status_code=status.HTTP_400_BAD_REQUEST, e=serializer.errors)
+        serializer.save()
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_123_SUBSCRIPTION_DATA_UPDATED_SUCCESSFULLY.value,
+            status_code=status.HTTP_200_OK)
 
     def patch(self, request):
         subscription_service = SubscriptionService()
-        try:
-            data = request.data
-            if not data:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_165_SUBSCRIPTION_DATA_PATCH.value, status_code=status.HTTP_400_BAD_REQUEST) 
-            subscription = subscription_service.get_subscription_by_id(data)
-            serializer = SubscriptionSerializer(subscription, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return NotifyMeException.handle_success(
-                    message=SuccessCodeMessages.HTTP_123_SUBSCRIPTION_DATA_UPDATED_SUCCESSFULLY.value,
-                    status_code=status.HTTP_200_OK)
-            else:
-                raise ValidationError
-        except ValidationError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_121_VALIDATION_ERROR_WHILE_CREATING_SUBSCRIPTION_DATA.value,  status_code=status.HTTP_400_BAD_REQUEST)
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message,
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            logger.error(f"Unexpected error occured while updating Subscription data. ERROR: {e}")
-            return Response(f"UNEXPECTED_ERROR_WHILE_UPDATING_SUBSCRIPTION_DATA. ERROR: {e}",
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+        data = request.data
+        if not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_165_SUBSCRIPTION_DATA_PATCH.value, status_code=status.HTTP_400_BAD_REQUEST) 
+        subscription = subscription_service.get_subscription_by_id(data)
+        serializer = SubscriptionSerializer(subscription, data=data, partial=True)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_121_VALIDATION_ERROR_WHILE_CREATING_SUBSCRIPTION_DATA.value, status_code=status.HTTP_400_BAD_REQUEST, e=serializer.errors)
+        serializer.save()
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_123_SUBSCRIPTION_DATA_UPDATED_SUCCESSFULLY.value,
+            status_code=status.HTTP_200_OK)
 
     def delete(self, request):
         subscription_service = SubscriptionService()
-        try:
-            data = request.data
-            data = request.data
-            if not data:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_167_SUBSCRIPTION_DATA_DELETE.value, status_code=status.HTTP_400_BAD_REQUEST) 
-            subscription = subscription_service.get_subscription_by_id(data)
-            subscription.delete()
-            return NotifyMeException.handle_success(
-                message=SuccessCodeMessages.HTTP_128_SUBSCRIPTION_DELETED_SUCCESSFULLY.value,
-                status_code=status.HTTP_204_NO_CONTENT)
-        except ValidationError as e:
-            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_121_VALIDATION_ERROR_WHILE_CREATING_SUBSCRIPTION_DATA.value,  status_code=status.HTTP_400_BAD_REQUEST) 
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message,
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            logger.error(f"Unexpected error occured")
-            return Response(f"UNEXPECTED_ERROR_WHILE_DELETING_SUBSCRIPTION_DATA. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        data = request.data
+        if not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_167_SUBSCRIPTION_DATA_DELETE.value, status_code=status.HTTP_400_BAD_REQUEST) 
+        subscription = subscription_service.get_subscription_by_id(data)
+        subscription.delete()
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_128_SUBSCRIPTION_DELETED_SUCCESSFULLY.value,
+            status_code=status.HTTP_204_NO_CONTENT)
 
-             
 
 class SubscriptionPlanAPI(APIView):
     def get(self, request):
         subscription_plan_service = SubscriptionPlanService()
-        try:
-            logger.info("Fetching Subscription-Plan data")
-            objects = subscription_plan_service.get_all_subscription_plans(request)
-            serializer = SubscriptionPlanSerializer(objects, many=True)
-            return NotifyMeException.handle_success(
-                message=SuccessCodeMessages.HTTP_130_SUBSCRIPTION_PLAN_FETCHED_SUCCESSFULLY.value,
-                data=serializer.data,
-                status_code=status.HTTP_200_OK)
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message,
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            logger.info(f"Unexpected error occured while fetching fetching Subscription Plans. Error: {e}")
-            return Response(f"UNEXPECTED_ERROR_WHILE_FETCHING_SUBSCRIPTION_PLANS. ERROR:{e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+        logger.info("Fetching Subscription-Plan data")
+        objects = subscription_plan_service.get_all_subscription_plans(request)
+        serializer = SubscriptionPlanSerializer(objects, many=True)
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_130_SUBSCRIPTION_PLAN_FETCHED_SUCCESSFULLY.value,
+            data=serializer.data,
+            status_code=status.HTTP_200_OK)
 
     def post(self, request):
+        logger.info("Creating new Subscription-Plan")
+        data = request.data
+        serializer = SubscriptionPlanSerializer(data=data)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_168_SUBSCRIPTION_PLAN_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)  
         try:
-            logger.info("Creating new Subscription-Plan")
-            data = request.data
-            serializer = SubscriptionPlanSerializer(data=data)
-            if serializer.is_valid():
-                serializer.save()
-                return NotifyMeException.handle_success(
-                    message=SuccessCodeMessages.HTTP_133_SUBSCRIPTION_PLAN_CREATED_SUCCESSFULLY.value,
-                    status_code=status.HTTP_201_CREATED)
-            else:
-                return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_168_SUBSCRIPTION_PLAN_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)  
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message,
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            serializer.save()
         except IntegrityError as e:
-            return NotifyMeException.handle_api_exception(
-                message=ErrorCodeMessages.HTTP_136_INTEGRITY_ERROR_WHILE_CREATING_SUBSCRIPTION_PLAN.value, status_code=status.HTTP_409_CONFLICT, e=e)     
-        except Exception as e:
-            logger.error(f"Unexpected error occured while creating New Subscription-Plan. ERROR: {e}")
-            return Response(f"UNEXPECTED_ERROR_WHILE_CREATING_SUBSCRIPTION_PLAN. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+            raise NotifyMeException(message=ErrorCodeMessages.HTTP_136_INTEGRITY_ERROR_WHILE_CREATING_SUBSCRIPTION_PLAN.value,
+                                    status_code=ErrorCodes.HTTP_136_INTEGRITY_ERROR_WHILE_CREATING_SUBSCRIPTION_PLAN.value,
+                                    http_status=status.HTTP_409_CONFLICT,
+                                    e=e)
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_133_SUBSCRIPTION_PLAN_CREATED_SUCCESSFULLY.value,
+            status_code=status.HTTP_201_CREATED)
 
     def delete(self, request):
         subscription_plan_service = SubscriptionPlanService()
+        data = request.data
+        if not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_168_SUBSCRIPTION_PLAN_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
+        subscriptionPlan = subscription_plan_service.get_subscription_plan_by_id(data)
+        subscriptionPlan.delete()
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_137_SUBSCRIPTION_PLAN_DELETED_SUCCESSFULLY.value, status_code=status.HTTP_204_NO_CONTENT)
+
+
+#----------NOTIFICATION-API----------------
+
+class NotificationAPI(APIView):
+    def post(self, request):
+        notification_service = NotificationService()
+        data = request.data
+        # Accept a single notification, a list of them or {"notifications": [...]}
+        if isinstance(data, dict):
+            data = data.get("notifications", [data])
+        if not isinstance(data, list) or not data:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_169_NOTIFICATION_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Creating {len(data)} notifications")
+        serializer = NotificationSerializer(data=data, many=True)
+        if not serializer.is_valid():
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_169_NOTIFICATION_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST, e=serializer.errors)
+        notifications = notification_service.create_notifications(serializer.validated_data)
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_171_NOTIFICATIONS_CREATED_SUCCESSFULLY.value,
+            data={"count": len(notifications)},
+            status_code=status.HTTP_201_CREATED)
+
+
+class NotificationInboxAPI(APIView):
+    def get(self, request):
+        notification_service = NotificationService()
+        # The same signed token as the WebSocket, so one user cannot read another's inbox
+        try:
+            user_id = read_socket_token(request.query_params.get('token', ''))
+        except signing.BadSignature:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_181_INVALID_USER_TOKEN.value, status_code=status.HTTP_401_UNAUTHORIZED)
         try:
-            data = request.data
-            if not data:
-                 return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_168_SUBSCRIPTION_PLAN_DATA_NOT_GIVEN.value, status_code=status.HTTP_400_BAD_REQUEST)
-            subscriptionPlan = subscription_plan_service.get_subscription_plan_by_id(data)
-            subscriptionPlan.delete()
-            return NotifyMeException.handle_success(
-                message=SuccessCodeMessages.HTTP_137_SUBSCRIPTION_PLAN_DELETED_SUCCESSFULLY.value, status_code=status.HTTP_204_NO_CONTENT)
-        except NotifyMeException as e:
-            return NotifyMeException.handle_exception(message=e.message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            logger.error(f"Unexpected error while deleting Subscription Plan. Error: {e}")
-            return Response(f"UNEXPECTED_ERROR_WHILE_DELETING_SUBSCRIPTION_PLAN. ERROR: {e}", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-             
+            limit = int(request.query_params.get('limit', PageSize.DEFAULT.value))
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return NotifyMeException.handle_api_exception(message=ErrorCodeMessages.HTTP_172_INVALID_PAGINATION_PARAMETERS.value, status_code=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Fetching the inbox of user {user_id}")
+        user = UserService().get_user_by_id({'id': user_id})
+        inbox = notification_service.get_inbox(user, min(limit, PageSize.MAX.value), request.query_params.get('since'))
+        inbox["notifications"] = NotificationSerializer(inbox["notifications"], many=True).data
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_180_INBOX_FETCHED_SUCCESSFULLY.value,
+            data=inbox,
+            status_code=status.HTTP_200_OK)
 
 
-    
+#----------PRESENCE-API----------------
 
+class PresenceAPI(APIView):
+    def get(self, request):
+        presence_service = PresenceService()
+        logger.info("Fetching live connection counts")
+        counts = presence_service.get_connection_counts()
+        return NotifyMeException.handle_success(
+            message=SuccessCodeMessages.HTTP_177_PRESENCE_FETCHED_SUCCESSFULLY.value,
+            data=counts,
+            status_code=status.HTTP_200_OK)
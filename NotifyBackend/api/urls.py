@@ -1,10 +1,14 @@
-from NotifyMe.views.views import UserAPI, SubscriptionAPI, SubscriptionPlanAPI
+from NotifyMe.views.views import UserAPI, UserImportAPI, SubscriptionAPI, SubscriptionPlanAPI, NotificationAPI, NotificationInboxAPI, PresenceAPI
 from django.contrib import admin
 from django.urls import path
 
 # url patterns are list of urls
 urlpatterns = [
   path("user", UserAPI.as_view()),
+  path("user/import", UserImportAPI.as_view()),
   path("subscription", SubscriptionAPI.as_view()),
-  path("subscription-plan", SubscriptionPlanAPI.as_view())
+  path("subscription-plan", SubscriptionPlanAPI.as_view()),
+  path("notification", NotificationAPI.as_view()),
+  path("notification/inbox", NotificationInboxAPI.as_view()),
+  path("presence", PresenceAPI.as_view())
 ]
\ No newline at end of file